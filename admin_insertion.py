@@ -1,48 +1,163 @@
-import psycopg2
+"""
+Bulk admin provisioning.
+
+    python admin_insertion.py admins.csv --rounds 12
+    python admin_insertion.py --generate 1000
+
+The CSV needs full_name, email and password columns plus either role_id or
+role_name. Passwords are bcrypt-hashed in a process pool across all cores and
+the admins are written with one COPY and one INSERT ... SELECT; admins whose
+email already exists are skipped. A row whose role is missing or unknown
+stops the import before anything is hashed or written.
+"""
+import argparse
+import csv
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 import bcrypt
 from faker import Faker
-import random
-# Connect to PostgreSQL (update your credentials here)
-conn = psycopg2.connect(
-    dbname="AirportFlightManagement",
-    user="yasir",
-    password="yasir1234",
-    host="localhost",
-    port="6677"
-)
-cursor = conn.cursor()
-admin_roles = ['Super Admin','Flight Manager','Gates Manager']
-# for role in admin_roles:
-#     cursor.execute("INSERT INTO admin_roles (role_name) VALUES (%s)", (role,))
-#     conn.commit()
-fake=Faker()
-# Admin details
-# full_name = "Super Admin"
-# email = "superadmin@example.com"
-# password = "admin123"  # plain text password
-# role_id = 1  # assuming 1 = SuperAdmin
-
-print("Creating admins...")
-admins_data = []
-for _ in range(1000):  # Creating 20 admin accounts
-    full_name = fake.name()
-    email = fake.unique.email()
-    raw_password="admin12345"
-    password =  bcrypt.hashpw(raw_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8') # In real app, use proper password hashing
-    role_id = random.randint(1, len(admin_roles))
-    admins_data.append((full_name, email, password, role_id))
+from bulk_loader import copy_rows
+from db_connection import connect
+
+admin_roles = ['Super Admin', 'Flight Manager', 'Gates Manager']
+DEFAULT_ROUNDS = 12
+DEFAULT_PASSWORD = "admin12345"
+
+
+def hash_password(args):
+    password, rounds = args
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def read_admins(path):
+    """Rows of (full_name, email, password, role_id, role_name) from a CSV file."""
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        missing = {'full_name', 'email', 'password'} - set(reader.fieldnames or [])
+        if missing or not {'role_id', 'role_name'} & set(reader.fieldnames or []):
+            raise SystemExit(f"{path}: expected full_name, email, password and role_id or role_name columns")
+        return [
+            (row['full_name'], row['email'].strip().lower(), row['password'],
+             int(row['role_id']) if row.get('role_id') else None, row.get('role_name') or None)
+            for row in reader
+        ]
+
+
+def generate_admins(count, password):
+    fake = Faker()
+    return [
+        (fake.name(), fake.unique.email(), password, random.randint(1, len(admin_roles)), None)
+        for _ in range(count)
+    ]
+
+
+def hash_passwords(passwords, rounds, workers=None):
+    """bcrypt every password on a process pool; returns hashes in input order."""
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(passwords) // (workers * 4))
+        return list(pool.map(hash_password, [(p, rounds) for p in passwords], chunksize=chunksize))
+
+
+def resolve_roles(conn, admins):
+    """
+    The admins with role_name replaced by its role_id. Raises ValueError
+    listing every row whose role is missing or not in admin_roles.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT role_name, role_id FROM admin_roles")
+        roles = dict(cursor.fetchall())
+    conn.rollback()
+    resolved, bad = [], []
+    for line, (name, email, password, role_id, role_name) in enumerate(admins, start=2):
+        if role_id is None:
+            role_id = roles.get(role_name)
+        if role_id not in roles.values():
+            bad.append(f"row {line} ({email}): {role_name or role_id or 'no role'}")
+        resolved.append((name, email, password, role_id))
+    if bad:
+        shown = "; ".join(bad[:20]) + (f"; and {len(bad) - 20:,} more" if len(bad) > 20 else "")
+        raise ValueError(f"unknown role on {len(bad):,} of {len(admins):,} rows (known roles: {', '.join(sorted(roles))}): {shown}")
+    return resolved
+
+
+def insert_admins(conn, admins):
+    """
+    COPY admins (full_name, email, password hash, role_id) into a staging
+    table and insert them in one statement. Returns rows inserted.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TEMP TABLE admin_import (
+            full_name VARCHAR(100), email VARCHAR(100), password VARCHAR(255), role_id INT NOT NULL
+        ) ON COMMIT DROP
+    """)
+    copy_rows(cursor, 'admin_import', ['full_name', 'email', 'password', 'role_id'], admins)
     cursor.execute("""
-    INSERT INTO admins (full_name, email, password, role_id)
-    VALUES (%s, %s, %s, %s)
-""", (full_name, email, password, role_id))
+        INSERT INTO admins (full_name, email, password, role_id)
+        SELECT DISTINCT ON (email) full_name, email, password, role_id
+        FROM admin_import
+        ORDER BY email
+        ON CONFLICT (email) DO NOTHING
+    """)
+    inserted = cursor.rowcount
+    conn.commit()
+    cursor.close()
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-create admin accounts with bcrypt-hashed passwords.")
+    parser.add_argument("csv_path", nargs="?", help="CSV of admins to import")
+    parser.add_argument("--generate", type=int, metavar="N",
+                        help="create N fake admins instead of reading a CSV")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD,
+                        help="password for generated admins")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS,
+                        help="bcrypt cost factor (log2 rounds)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="processes used for hashing")
+    args = parser.parse_args()
+
+    if args.csv_path:
+        admins = read_admins(args.csv_path)
+    elif args.generate:
+        admins = generate_admins(args.generate, args.password)
+    else:
+        parser.error("give a CSV file or --generate N")
+
+    conn = connect()
+    try:
+        # before hashing, which is the slow part
+        admins = resolve_roles(conn, admins)
+    except ValueError as e:
+        conn.close()
+        raise SystemExit(f"Nothing imported: {e}")
+
+    print(f"Hashing {len(admins):,} passwords (cost {args.rounds}, {args.workers} workers)...")
+    start = time.perf_counter()
+    hashes = hash_passwords([a[2] for a in admins], args.rounds, args.workers)
+    hash_seconds = time.perf_counter() - start
+    print(f"  {len(hashes) / hash_seconds:,.1f} hashes/s ({hash_seconds:.1f}s)")
 
-conn.commit()
+    admins = [(name, email, hashed, role_id) for (name, email, _, role_id), hashed in zip(admins, hashes)]
 
-# Hash the password
+    try:
+        start = time.perf_counter()
+        inserted = insert_admins(conn, admins)
+        insert_seconds = time.perf_counter() - start
+    except Exception as e:
+        conn.rollback()
+        raise SystemExit(f"Error occurred: {e}")
+    finally:
+        conn.close()
 
+    total = hash_seconds + insert_seconds
+    print(f"Inserted {inserted:,} admins ({len(admins) - inserted:,} skipped as duplicate or existing emails) in {insert_seconds:.2f}s")
+    print(f"Total {total:.1f}s, {len(admins) / total:,.1f} admins/s")
 
-# Insert into the admins table
 
-print("Admin inserted with hashed password.")
-cursor.close()
-conn.close()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Compares dashboard rerun traces written with PROFILE_RERUNS=1.
+
+Each trace is one rerun in Chrome trace format (dashboard/modules/profiler.py).
+Record a session, change the code, record the same clicks again, then:
+
+    python benchmarks/compare_profiles.py dashboard/profiles/<before> dashboard/profiles/<after>
+
+Sections are matched by their path (page / panel / ...) and averaged over the
+reruns of each side; a single directory or file is summarized on its own.
+"""
+import argparse
+import glob
+import json
+import os
+from collections import defaultdict
+
+
+def load(path):
+    """{section path: [reruns, total ms, queries, query ms, cache hits, cache misses]} over the traces."""
+    files = sorted(glob.glob(os.path.join(path, "*.json"))) if os.path.isdir(path) else [path]
+    sections = defaultdict(lambda: [0, 0.0, 0, 0.0, 0, 0])
+    for name in files:
+        with open(name, encoding="utf-8") as f:
+            events = json.load(f)["traceEvents"]
+        for e in events:
+            s = sections[e["args"]["path"]]
+            s[0] += 1
+            s[1] += e["dur"] / 1000
+            s[2] += e["args"]["queries"]
+            s[3] += e["args"]["query_ms"]
+            s[4] += sum(e["args"]["cache_hits"].values())
+            s[5] += sum(e["args"]["cache_misses"].values())
+    return len(files), dict(sections)
+
+
+def _mean(s):
+    return s[1] / s[0], s[2] / s[0]
+
+
+def summarize(path):
+    runs, sections = load(path)
+    print(f"{runs} reruns in {path}")
+    print(f"{'section':60} {'runs':>5} {'mean ms':>10} {'queries':>8} {'query ms':>10} {'hits':>6} {'misses':>6}")
+    for key, s in sorted(sections.items(), key=lambda kv: -kv[1][1]):
+        ms, queries = _mean(s)
+        print(f"{key[:60]:60} {s[0]:5} {ms:10.1f} {queries:8.1f} {s[3] / s[0]:10.1f} {s[4]:6} {s[5]:6}")
+
+
+def compare(before, after):
+    _, a = load(before)
+    _, b = load(after)
+    print(f"{'section':60} {'before ms':>10} {'after ms':>10} {'change':>8} {'queries':>15}")
+    for key in sorted(a.keys() | b.keys(), key=lambda k: -max(_mean(a[k])[0] if k in a else 0,
+                                                               _mean(b[k])[0] if k in b else 0)):
+        ms_a, q_a = _mean(a[key]) if key in a else (None, None)
+        ms_b, q_b = _mean(b[key]) if key in b else (None, None)
+        fmt = lambda v: "-" if v is None else f"{v:.1f}"  # noqa: E731
+        change = f"{(ms_b - ms_a) / ms_a:+.0%}" if ms_a and ms_b is not None else ""
+        print(f"{key[:60]:60} {fmt(ms_a):>10} {fmt(ms_b):>10} {change:>8} {fmt(q_a):>7}->{fmt(q_b):<7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize or compare dashboard rerun traces.")
+    parser.add_argument("before", help="trace file or directory of traces")
+    parser.add_argument("after", nargs="?", help="second trace file or directory to compare against")
+    args = parser.parse_args()
+    if args.after:
+        compare(args.before, args.after)
+    else:
+        summarize(args.before)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+EXPLAIN (ANALYZE, BUFFERS) benchmark for the foreign-key index migration.
+
+Run it once before and once after `python migrate.py`, then compare:
+
+    python benchmarks/explain_indexes.py --label before
+    python migrate.py
+    python benchmarks/explain_indexes.py --label after
+    python benchmarks/explain_indexes.py --compare before after
+
+Every statement runs inside a transaction that is rolled back, so the DELETE
+cases measure the foreign-key checks without changing any data.
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db_connection import connect  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+REPEATS = 5
+
+# name -> (query, parameter lookup run once to pick realistic ids)
+QUERIES = {
+    "passenger_bookings": (
+        """SELECT b.*, fs.departure_time FROM bookings b
+           JOIN flight_schedules fs ON fs.schedule_id = b.schedule_id
+           WHERE b.passenger_id = %(passenger_id)s""",
+        "SELECT passenger_id FROM bookings ORDER BY booking_id LIMIT 1",
+    ),
+    "schedule_manifest": (
+        "SELECT * FROM bookings WHERE schedule_id = %(schedule_id)s ORDER BY seat_number",
+        "SELECT schedule_id FROM bookings ORDER BY booking_id LIMIT 1",
+    ),
+    "booking_payments": (
+        "SELECT * FROM payments WHERE booking_id = %(booking_id)s",
+        "SELECT booking_id FROM payments ORDER BY payment_id DESC LIMIT 1",
+    ),
+    "flight_next_departures": (
+        """SELECT * FROM flight_schedules WHERE flight_id = %(flight_id)s
+           AND departure_time >= %(departure_time)s ORDER BY departure_time LIMIT 5""",
+        "SELECT flight_id, departure_time FROM flight_schedules ORDER BY schedule_id LIMIT 1",
+    ),
+    "gate_timeline": (
+        """SELECT * FROM flight_schedules WHERE gate_id = %(gate_id)s
+           AND departure_time BETWEEN %(departure_time)s AND %(departure_time)s + INTERVAL '1 day'""",
+        "SELECT gate_id, departure_time FROM flight_schedules ORDER BY schedule_id LIMIT 1",
+    ),
+    "passenger_notifications": (
+        "SELECT * FROM notifications WHERE passenger_id = %(passenger_id)s ORDER BY sent_at DESC",
+        "SELECT passenger_id FROM notifications ORDER BY notification_id LIMIT 1",
+    ),
+    "route_flights": (
+        "SELECT * FROM flights WHERE origin_airport_id = %(o)s AND destination_airport_id = %(d)s",
+        "SELECT origin_airport_id AS o, destination_airport_id AS d FROM flights ORDER BY flight_id LIMIT 1",
+    ),
+    # parent deletes: the cost is in the foreign-key triggers on the child tables
+    "delete_unbooked_schedule": (
+        "DELETE FROM flight_schedules WHERE schedule_id = %(schedule_id)s",
+        """SELECT schedule_id FROM flight_schedules fs
+           WHERE NOT EXISTS (SELECT 1 FROM bookings b WHERE b.schedule_id = fs.schedule_id)
+           ORDER BY schedule_id LIMIT 1""",
+    ),
+    "delete_unbooked_passenger": (
+        "DELETE FROM passengers WHERE passenger_id = %(passenger_id)s",
+        """SELECT passenger_id FROM passengers p
+           WHERE NOT EXISTS (SELECT 1 FROM bookings b WHERE b.passenger_id = p.passenger_id)
+             AND NOT EXISTS (SELECT 1 FROM notifications n WHERE n.passenger_id = p.passenger_id)
+           ORDER BY passenger_id LIMIT 1""",
+    ),
+}
+
+
+def _lookup(cursor, sql):
+    cursor.execute(sql)
+    row = cursor.fetchone()
+    return dict(zip([d[0] for d in cursor.description], row)) if row else None
+
+
+def explain(conn, query, params):
+    """Best-of-REPEATS EXPLAIN ANALYZE, including time spent in triggers."""
+    best = None
+    with conn.cursor() as cursor:
+        for _ in range(REPEATS):
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query, params)
+            plan = cursor.fetchone()[0][0]
+            conn.rollback()
+            total = plan["Execution Time"]
+            if best is None or total < best["execution_ms"]:
+                root = plan["Plan"]
+                best = {
+                    "execution_ms": total,
+                    "planning_ms": plan["Planning Time"],
+                    "trigger_ms": sum(t["Time"] for t in plan.get("Triggers", [])),
+                    "shared_blocks": root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0),
+                    "plan": _node_summary(root),
+                }
+    return best
+
+
+def _node_summary(node):
+    name = node["Node Type"]
+    if "Index Name" in node:
+        name += f" using {node['Index Name']}"
+    elif "Relation Name" in node:
+        name += f" on {node['Relation Name']}"
+    children = [_node_summary(child) for child in node.get("Plans", [])]
+    return name + (f" [{', '.join(children)}]" if children else "")
+
+
+def run(label):
+    conn = connect()
+    results = {}
+    try:
+        with conn.cursor() as cursor:
+            for name, (query, lookup) in QUERIES.items():
+                params = _lookup(cursor, lookup)
+                conn.rollback()
+                if params is None:
+                    print(f"{name:<28} skipped (no suitable rows)")
+                    continue
+                results[name] = explain(conn, query, params)
+                r = results[name]
+                print(f"{name:<28} {r['execution_ms']:>9.2f} ms  {r['shared_blocks']:>7} blocks  {r['plan']}")
+    finally:
+        conn.close()
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"explain_{label}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved {path}")
+
+
+def compare(before, after):
+    with open(os.path.join(RESULTS_DIR, f"explain_{before}.json")) as f:
+        old = json.load(f)
+    with open(os.path.join(RESULTS_DIR, f"explain_{after}.json")) as f:
+        new = json.load(f)
+    print(f"{'query':<28} {before:>12} {after:>12} {'speedup':>9}")
+    for name in QUERIES:
+        if name in old and name in new:
+            a, b = old[name]["execution_ms"], new[name]["execution_ms"]
+            print(f"{name:<28} {a:>9.2f} ms {b:>9.2f} ms {a / max(b, 1e-3):>8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE the foreign-key access paths.")
+    parser.add_argument("--label", default="current", help="name the saved results are stored under")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two saved runs")
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+    else:
+        run(args.label)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+"""
+Load test: concurrent simulated dashboard users against the local database.
+
+Each user runs a scripted mix of actions (SCENARIOS) back to back for the
+given time, through one of two drivers:
+
+    data     the data-access functions the pages call (fetch_page,
+             search_table, insert_rows, update_rows, export_table), each
+             action on its own pooled session like one rerun
+    apptest  a headless Streamlit session of dashboard/app.py (AppTest):
+             super admins on dashboard(), flight managers on
+             flight_manager_dashboard(); an action is one widget change and
+             the rerun it triggers
+
+All users share this process and its connection pool, like the sessions of
+one Streamlit server. Per scenario and user count it reports throughput,
+p50/p95/p99 latency per action, server connections (pg_stat_activity),
+pool checkouts and RSS, and saves them to benchmarks/results/load_<label>.json.
+Rows it inserts are marked and deleted afterwards. Seed the database first
+(python inserting_dummy_data.py).
+
+    python benchmarks/load_test.py --users 1 5 20 --seconds 30 --label before
+    python benchmarks/load_test.py --driver apptest --users 4 --scenario browse
+    python benchmarks/load_test.py --compare before after
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DASHBOARD = os.path.join(ROOT, "dashboard")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, DASHBOARD)
+from db_connection import connect  # noqa: E402
+from config.db_config import get_session, pool_status  # noqa: E402
+from modules.catalog import primary_key  # noqa: E402
+from modules.table_browser import fetch_page  # noqa: E402
+from modules.search import search_table  # noqa: E402
+from modules.writes import insert_rows, update_rows, delete_rows  # noqa: E402
+from modules.export import export_table  # noqa: E402
+from modules.auth import issue_session_token  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+APP = os.path.join(DASHBOARD, "app.py")
+MARKER = "load-test"  # name prefix of the airports rows the write actions create
+EXPORT_ROWS = 10_000
+SAMPLE_INTERVAL = 0.25
+
+# scenario -> {action: weight}
+SCENARIOS = {
+    "browse": {"browse": 8, "search": 2},
+    "mixed": {"browse": 5, "search": 2, "insert": 1, "update": 1, "export": 1},
+    "write": {"browse": 2, "insert": 4, "update": 4},
+    "export": {"browse": 1, "export": 1},
+}
+ADMIN_TABLES = ["airports", "terminals", "gates", "passengers", "flights", "flight_schedules", "bookings",
+                "payments"]
+MANAGER_TABLES = ["flights", "flight_schedules", "gates"]
+EXPORT_TABLES = ["airports", "gates", "flights"]
+
+
+def rss_mb():
+    """Resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # peak, in KB on Linux
+
+
+class Setup:
+    """Keys, search terms and the admin the simulated users act as, read once."""
+
+    def __init__(self):
+        with get_session() as session:
+            start = time.perf_counter()
+            self.keys = {t: primary_key(session, t) for t in ADMIN_TABLES}
+            self.catalog_seconds = time.perf_counter() - start
+            self.max_key = {t: session.connection().exec_driver_sql(f"SELECT max({k}) FROM {t}").scalar() or 0
+                            for t, k in self.keys.items()}
+            self.terms = [r[0] for r in session.connection().exec_driver_sql(
+                "(SELECT city FROM airports WHERE city IS NOT NULL ORDER BY random() LIMIT 20) "
+                "UNION ALL (SELECT flight_number FROM flights ORDER BY random() LIMIT 20)")]
+            self.admin_id = session.connection().exec_driver_sql(
+                "SELECT admin_id FROM admins ORDER BY role_id, admin_id LIMIT 1").scalar()
+            self.roles = dict(session.connection().exec_driver_sql(
+                "SELECT role_id, role_name FROM admin_roles").fetchall())
+
+
+class Recorder:
+    """Latencies and errors per action, shared by all users of a run."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.messages = {}
+        self.inserted = []
+
+    def add(self, action, seconds, error=None):
+        with self.lock:
+            if error is None:
+                self.latencies[action].append(seconds)
+            else:
+                self.errors[action] += 1
+                self.messages.setdefault(action, (str(error).strip() or type(error).__name__).splitlines()[0][:200])
+
+
+class Sampler(threading.Thread):
+    """Samples server connections, pool checkouts and RSS while a run is going."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.stop = threading.Event()
+        self.connections, self.checked_out, self.rss = [], [], []
+
+    def run(self):
+        conn = connect()
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                while not self.stop.is_set():
+                    cursor.execute("SELECT count(*) FROM pg_stat_activity "
+                                   "WHERE datname = current_database() AND pid <> pg_backend_pid()")
+                    self.connections.append(cursor.fetchone()[0])
+                    self.checked_out.append(pool_status()["checked_out"])
+                    self.rss.append(rss_mb())
+                    self.stop.wait(SAMPLE_INTERVAL)
+        finally:
+            conn.close()
+
+
+class DataUser:
+    """Calls the page's data-access functions directly; one pooled session per action."""
+
+    def __init__(self, number, setup, recorder):
+        self.setup, self.recorder = setup, recorder
+        self.random = random.Random(number)
+        self.ids = []
+
+    def browse(self, session):
+        table = self.random.choice(ADMIN_TABLES)
+        after = self.random.randint(0, self.setup.max_key[table]) if self.random.random() < 0.7 else None
+        fetch_page(session, table, self.setup.keys[table], after, 50)
+
+    def search(self, session):
+        term = self.random.choice(self.setup.terms)
+        table = "airports" if self.random.random() < 0.5 else "flights"
+        search_table(session, table, self.setup.keys[table], term)
+
+    def insert(self, session):
+        code = uuid.uuid4().hex[:10].upper()
+        row = {"name": f"{MARKER} {code}", "city": "Load", "country": "Test", "code": code}
+        result = insert_rows(session, "airports", "airport_id", [row], self.setup.admin_id)
+        self.ids.extend(result.ids)
+        with self.recorder.lock:
+            self.recorder.inserted.extend(result.ids)
+
+    def update(self, session):
+        if not self.ids:
+            return self.insert(session)
+        row = {"airport_id": self.random.choice(self.ids), "city": f"Load {self.random.randint(1, 999)}"}
+        update_rows(session, "airports", "airport_id", [row], self.setup.admin_id)
+
+    def export(self, session):
+        table = self.random.choice(EXPORT_TABLES)
+        path, _, _ = export_table(session, table, self.setup.keys[table], "CSV", EXPORT_ROWS)
+        os.remove(path)
+
+    def act(self, action):
+        with get_session() as session:
+            getattr(self, action)(session)
+
+    def recover(self):
+        pass
+
+
+class AppUser:
+    """A headless Streamlit session; every action changes a widget and reruns the script."""
+
+    def __init__(self, number, setup, recorder, manager=False, login=None):
+        self.setup, self.recorder, self.manager = setup, recorder, manager
+        self.number, self.login = number, login
+        self.random = random.Random(number)
+        self.recover()
+
+    def recover(self):
+        """Starts a new session, like reloading the page in the browser."""
+        from streamlit.testing.v1 import AppTest
+        self.at = AppTest.from_file(APP, default_timeout=300)
+        role_id = 2 if self.manager else 1
+        if self.login:
+            self._rerun(self.at)
+            email, password = self.login
+            self._widget(self.at.selectbox, "Select Role").set_value(self.setup.roles[role_id])
+            self._widget(self.at.text_input, "Email").set_value(email)
+            self._widget(self.at.text_input, "Password").set_value(password)
+            self._rerun(self._widget(self.at.button, "Login").click())
+            if "user" not in self.at.session_state:
+                raise RuntimeError(f"login as {email} failed")
+        else:
+            user = {"admin_id": self.setup.admin_id, "role_id": role_id,
+                    "full_name": f"Load user {self.number}", "email": f"{MARKER}-{self.number}@example.com"}
+            self.at.session_state["user"] = user
+            self.at.session_state["session_token"] = issue_session_token(user)
+            self._rerun(self.at)
+
+    def _rerun(self, element):
+        element.run()
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].message)
+
+    def _widget(self, elements, label):
+        widget = next((e for e in elements if e.label.startswith(label)), None)
+        if widget is None:
+            raise RuntimeError(f"no widget labelled {label!r} on the page")
+        return widget
+
+    def _table(self, table):
+        box = self._widget(self.at.sidebar.selectbox, "Select Table")
+        if box.value != table:
+            self._rerun(box.set_value(table))
+
+    def browse(self):
+        tables = MANAGER_TABLES if self.manager else ADMIN_TABLES
+        box = self._widget(self.at.sidebar.selectbox, "Select Table")
+        table = self.random.choice(tables)
+        if box.value != table:
+            return self._rerun(box.set_value(table))
+        next_button = next((b for b in self.at.button if b.label == "Next ➡️" and not b.disabled), None)
+        self._rerun(next_button.click() if next_button else self.at)
+
+    def search(self):
+        try:
+            self._rerun(self._widget(self.at.text_input, "🔍 Search Table").set_value(
+                self.random.choice(self.setup.terms)))
+        finally:
+            # the next action starts from the unfiltered table again
+            self._widget(self.at.text_input, "🔍 Search Table").set_value("")
+
+    def insert(self):
+        if self.manager:
+            return self.browse()  # flight managers do not write airports
+        self._table("airports")
+        code = uuid.uuid4().hex[:10].upper()
+        for label, value in (("name", f"{MARKER} {code}"), ("city", "Load"), ("country", "Test"), ("code", code)):
+            self._widget(self.at.text_input, label).set_value(value)
+        self._rerun(self._widget(self.at.button, "Insert").click())
+        if not self.at.success:
+            raise RuntimeError(self.at.error[0].value if self.at.error else "insert showed no result")
+        new_id = int(self.at.success[-1].value.split("= ")[1].rstrip(")"))
+        with self.recorder.lock:
+            self.recorder.inserted.append(new_id)
+
+    def update(self):
+        if self.manager:
+            return self.browse()
+        self._table("airports")
+        with self.recorder.lock:
+            ids = list(self.recorder.inserted)
+        if not ids:
+            return self.insert()
+        self._rerun(self._widget(self.at.text_input, "Enter airport_id to update").set_value(str(self.random.choice(ids))))
+        self._widget(self.at.text_input, "city").set_value(f"Load {self.random.randint(1, 999)}")
+        self._rerun(self._widget(self.at.button, "Update").click())
+
+    def export(self):
+        self._table(self.random.choice(MANAGER_TABLES[2:] if self.manager else EXPORT_TABLES))
+        self._widget(self.at.number_input, "Max rows").set_value(EXPORT_ROWS)
+        self._rerun(self._widget(self.at.button, "Prepare export").click())
+
+    def act(self, action):
+        getattr(self, action)()
+
+
+def user_loop(user, actions, weights, deadline, recorder, think):
+    while time.monotonic() < deadline:
+        action = user.random.choices(actions, weights)[0]
+        start = time.perf_counter()
+        try:
+            user.act(action)
+        except Exception as e:
+            recorder.add(action, 0, e)
+            user.recover()
+        else:
+            recorder.add(action, time.perf_counter() - start)
+        if think:
+            time.sleep(user.random.uniform(0, 2 * think))
+
+
+def _percentiles(values):
+    if not values:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+    return {"count": len(values), "mean_ms": float(np.mean(values) * 1000), "p50_ms": float(p50),
+            "p95_ms": float(p95), "p99_ms": float(p99), "max_ms": float(np.max(values) * 1000)}
+
+
+def cleanup(setup, ids):
+    if ids:
+        with get_session() as session:
+            delete_rows(session, "airports", "airport_id", ids, setup.admin_id)
+
+
+def run(driver, scenario, users, seconds, setup, think=0.0, managers=0.0, login=None):
+    """One timed run of `users` concurrent users; returns its result dict."""
+    mix = SCENARIOS[scenario]
+    actions, weights = list(mix), list(mix.values())
+    recorder = Recorder()
+    rss_start = rss_mb()
+    start = time.perf_counter()
+    if driver == "data":
+        simulated = [DataUser(n, setup, recorder) for n in range(users)]
+    else:
+        simulated = [AppUser(n, setup, recorder, manager=n < round(users * managers), login=login)
+                     for n in range(users)]
+    warmup = time.perf_counter() - start
+    pool_before = pool_status()
+
+    sampler = Sampler()
+    sampler.start()
+    deadline = time.monotonic() + seconds
+    threads = [threading.Thread(target=user_loop, args=(u, actions, weights, deadline, recorder, think))
+               for u in simulated]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    sampler.stop.set()
+    sampler.join()
+    pool_after = pool_status()
+    cleanup(setup, recorder.inserted)
+
+    everything = [s for values in recorder.latencies.values() for s in values]
+    return {
+        "driver": driver, "scenario": scenario, "users": users, "seconds": elapsed,
+        "session_setup_seconds": warmup,
+        "operations": len(everything), "errors": sum(recorder.errors.values()),
+        "throughput_per_s": len(everything) / elapsed,
+        "latency": _percentiles(everything),
+        "actions": {a: {**_percentiles(recorder.latencies[a]), "errors": recorder.errors[a],
+                        **({"first_error": recorder.messages[a]} if a in recorder.messages else {})}
+                    for a in actions},
+        "connections": {"peak": max(sampler.connections, default=0),
+                        "mean": float(np.mean(sampler.connections)) if sampler.connections else 0.0},
+        "pool": {"peak_checked_out": max(sampler.checked_out, default=0),
+                 "checkouts": pool_after["checkouts"] - pool_before["checkouts"],
+                 "timeouts": pool_after["timeouts"] - pool_before["timeouts"],
+                 "wait_seconds_max": pool_after["wait_seconds_max"]},
+        "rss_mb": {"start": rss_start, "peak": max(sampler.rss, default=rss_start), "end": rss_mb()},
+        "rows_inserted": len(recorder.inserted),
+    }
+
+
+def report(result):
+    lat = result["latency"]
+    print(f"{result['scenario']:8} {result['users']:4} users  {result['throughput_per_s']:8.1f} ops/s  "
+          f"p50 {lat.get('p50_ms', 0):7.1f}  p95 {lat.get('p95_ms', 0):7.1f}  p99 {lat.get('p99_ms', 0):7.1f} ms  "
+          f"errors {result['errors']:4}  conns {result['connections']['peak']:3}  "
+          f"pool {result['pool']['peak_checked_out']:3}  rss {result['rss_mb']['peak']:6.0f} MB", flush=True)
+    for action, a in result["actions"].items():
+        if a["count"] or a["errors"]:
+            line = (f"    {action:8} {a['count']:6} ok  p50 {a.get('p50_ms', 0):7.1f}  p95 {a.get('p95_ms', 0):7.1f}  "
+                    f"p99 {a.get('p99_ms', 0):7.1f} ms  errors {a['errors']}")
+            print(line + (f"  ({a['first_error']})" if "first_error" in a else ""), flush=True)
+
+
+def compare(before, after):
+    with open(os.path.join(RESULTS_DIR, f"load_{before}.json")) as f:
+        a = {(r["driver"], r["scenario"], r["users"]): r for r in json.load(f)["runs"]}
+    with open(os.path.join(RESULTS_DIR, f"load_{after}.json")) as f:
+        b = {(r["driver"], r["scenario"], r["users"]): r for r in json.load(f)["runs"]}
+    print(f"{'run':24} {'ops/s':>17} {'p95 ms':>19} {'p99 ms':>19}")
+    for key in sorted(a.keys() & b.keys()):
+        ra, rb = a[key], b[key]
+        cells = [f"{ra['throughput_per_s']:7.1f} -> {rb['throughput_per_s']:7.1f}"]
+        for p in ("p95_ms", "p99_ms"):
+            cells.append(f"{ra['latency'].get(p, 0):7.1f} -> {rb['latency'].get(p, 0):7.1f}")
+        print(f"{'/'.join(map(str, key)):24} " + "  ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent dashboard users.")
+    parser.add_argument("--driver", choices=["data", "apptest"], default="data")
+    parser.add_argument("--scenario", nargs="+", choices=list(SCENARIOS), default=["mixed"])
+    parser.add_argument("--users", nargs="+", type=int, default=[1, 5, 20], help="concurrent users per run")
+    parser.add_argument("--seconds", type=float, default=30, help="length of each run")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between a user's actions")
+    parser.add_argument("--managers", type=float, default=0.0,
+                        help="share of apptest users on the flight manager dashboard")
+    parser.add_argument("--login", nargs=2, metavar=("EMAIL", "PASSWORD"),
+                        help="apptest users log in through the login page instead of starting logged in")
+    parser.add_argument("--label", default="current", help="name the results are saved under")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two saved runs")
+    args = parser.parse_args()
+    if args.compare:
+        return compare(*args.compare)
+
+    setup = Setup()
+    print(f"catalog loaded in {setup.catalog_seconds:.1f}s", flush=True)
+    runs = []
+    for scenario in args.scenario:
+        for users in args.users:
+            result = run(args.driver, scenario, users, args.seconds, setup, args.think, args.managers,
+                         args.login)
+            report(result)
+            runs.append(result)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"load_{args.label}.json")
+    with open(path, "w") as f:
+        json.dump({"label": args.label, "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                   "options": {k: v for k, v in vars(args).items() if k not in ("compare", "login")},
+                   "runs": runs}, f, indent=2)
+    print(f"saved {path}")
+
+
+if __name__ == "__main__":
+    main()
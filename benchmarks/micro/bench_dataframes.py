@@ -0,0 +1,28 @@
+"""In-memory DataFrame helpers of the dashboard, over generated passengers."""
+from modules.utils import filter_dataframe, export_to_excel
+
+TERM = "garcia"  # matches a few percent of the generated names and emails
+
+
+def fast_filter(df, search_term):
+    # the flight manager's former row-wise filter, kept as the baseline for filter_dataframe
+    search_term = search_term.lower()
+    return df[df.astype(str).apply(lambda row: row.str.lower().str.contains(search_term).any(), axis=1)]
+
+
+def bench_filter_dataframe(benchmark, passengers):
+    benchmark.group = f"filter {len(passengers)} rows"
+    result = benchmark.pedantic(filter_dataframe, args=(passengers, TERM), rounds=3)
+    assert len(result) > 0
+
+
+def bench_fast_filter(benchmark, passengers):
+    benchmark.group = f"filter {len(passengers)} rows"
+    result = benchmark.pedantic(fast_filter, args=(passengers, TERM), rounds=3)
+    assert len(result) > 0
+
+
+def bench_export_to_excel(benchmark, passengers):
+    benchmark.group = f"excel {len(passengers)} rows"
+    output = benchmark.pedantic(export_to_excel, args=(passengers,), rounds=3)
+    assert output.getbuffer().nbytes > 0
@@ -0,0 +1,64 @@
+"""Database read paths of the dashboard, against the seeded throwaway database."""
+import uuid
+import bcrypt
+import pytest
+from conftest import SIZES
+from config.db_config import get_session
+from modules import auth, catalog
+from utils.db_helpers import fetch_all
+
+PASSWORD = "bench-password"
+
+
+@pytest.fixture(scope="module")
+def admin(seeded):
+    """A super admin with a known password, hashed at bcrypt's default cost like real accounts."""
+    email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+    hashed = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt()).decode()
+    with seeded.cursor() as cursor:
+        cursor.execute("INSERT INTO admins (full_name, email, password, role_id) VALUES (%s, %s, %s, 1)",
+                       ("Bench Admin", email, hashed))
+    seeded.commit()
+    return email
+
+
+def bench_primary_key_cold(benchmark, seeded):
+    """First lookup in a process: loads the whole catalog from information_schema."""
+    benchmark.group = "primary key"
+
+    def lookup():
+        catalog.invalidate()
+        with get_session() as session:
+            return catalog.primary_key(session, "bookings")
+
+    assert benchmark.pedantic(lookup, rounds=3) == "booking_id"
+
+
+def bench_primary_key_warm(benchmark, seeded):
+    benchmark.group = "primary key"
+    with get_session() as session:
+        catalog.primary_key(session, "bookings")
+        assert benchmark(catalog.primary_key, session, "bookings") == "booking_id"
+
+
+@pytest.mark.parametrize("rows", SIZES, ids=lambda n: f"{n}rows")
+def bench_fetch_all(benchmark, seeded, rows):
+    benchmark.group = f"fetch_all {rows} rows"
+    result = benchmark.pedantic(fetch_all, args=("SELECT * FROM passengers ORDER BY passenger_id LIMIT %s", (rows,)),
+                                rounds=5)
+    assert len(result) == rows
+
+
+def bench_validate_login(benchmark, admin):
+    benchmark.group = "login"
+    user = benchmark.pedantic(auth.validate_login, args=(admin, PASSWORD, 1), rounds=5)
+    assert user and user["email"] == admin
+
+
+def bench_validate_login_unknown_email(benchmark, admin):
+    # a fresh address every round, so the failure limit never kicks in
+    benchmark.group = "login"
+    result = benchmark.pedantic(auth.validate_login,
+                                setup=lambda: ((f"nobody-{uuid.uuid4().hex}@example.com", PASSWORD, 1), {}),
+                                rounds=50)
+    assert result is None
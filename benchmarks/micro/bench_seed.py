@@ -0,0 +1,15 @@
+"""Seeding through inserting_dummy_data.py (COPY from the generator); runs last, as it replaces the data."""
+import pytest
+import datagen
+from conftest import SIZES
+from inserting_dummy_data import create_dummy_data
+
+
+@pytest.mark.parametrize("rows", SIZES, ids=lambda n: f"{n}rows")
+def bench_seed(benchmark, database, rows):
+    benchmark.group = f"seed {rows} rows per table"
+    spec = datagen.make_spec(rows / datagen.BASE_RECORDS)
+    benchmark.pedantic(create_dummy_data, args=(database, spec), rounds=1, iterations=1)
+    with database.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM passengers")
+        assert cursor.fetchone()[0] == rows
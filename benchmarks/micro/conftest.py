@@ -0,0 +1,77 @@
+"""
+Fixtures for the micro-benchmarks: a throwaway database and seeded data.
+
+The suite creates its own database (BENCH_DB, default airport_bench_<pid>)
+on the server from db_connection.py, builds the schema with
+generating_table.sql and migrate.py, or copies it from BENCH_TEMPLATE_DB
+when set (e.g. a database whose extensions are already installed), and
+drops it at the end unless BENCH_KEEP_DB=1. BENCH_SIZES lists the row
+counts every parameterized benchmark runs at, 1k to 1M by default; e.g.
+BENCH_SIZES=1000,10000 for a quick run.
+"""
+import os
+import sys
+import psycopg2
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "dashboard"))
+
+BENCH_DB = os.environ.get("BENCH_DB", f"airport_bench_{os.getpid()}")
+BENCH_TEMPLATE_DB = os.environ.get("BENCH_TEMPLATE_DB", "")
+BENCH_KEEP_DB = os.environ.get("BENCH_KEEP_DB", "0") == "1"
+SIZES = [int(n) for n in os.environ.get("BENCH_SIZES", "1000,10000,100000,1000000").split(",")]
+
+# db_connection.py and the dashboard's config read DB_NAME when imported
+os.environ["DB_NAME"] = BENCH_DB
+import db_connection  # noqa: E402
+import datagen  # noqa: E402
+
+
+def _server():
+    conn = psycopg2.connect(dbname="postgres", user=db_connection.DB_USER, password=db_connection.DB_PASSWORD,
+                            host=db_connection.DB_HOST, port=db_connection.DB_PORT)
+    conn.autocommit = True
+    return conn
+
+
+@pytest.fixture(scope="session")
+def database():
+    """psycopg2 connection to the throwaway database, with the full schema."""
+    import migrate
+    server = _server()
+    with server.cursor() as cursor:
+        cursor.execute(f'DROP DATABASE IF EXISTS "{BENCH_DB}" WITH (FORCE)')
+        template = f' TEMPLATE "{BENCH_TEMPLATE_DB}"' if BENCH_TEMPLATE_DB else ""
+        cursor.execute(f'CREATE DATABASE "{BENCH_DB}"{template}')
+    conn = db_connection.connect()
+    if not BENCH_TEMPLATE_DB:
+        with open(os.path.join(ROOT, "generating_table.sql"), encoding="utf-8") as f, conn.cursor() as cursor:
+            cursor.execute(f.read())
+        conn.commit()
+        migrate.migrate(conn)
+    yield conn
+
+    conn.close()
+    from config.db_config import get_engine
+    get_engine().dispose()
+    if not BENCH_KEEP_DB:
+        with server.cursor() as cursor:
+            cursor.execute(f'DROP DATABASE IF EXISTS "{BENCH_DB}" WITH (FORCE)')
+    server.close()
+
+
+@pytest.fixture(scope="session")
+def seeded(database):
+    """The database seeded with the generator at the largest benchmark size."""
+    from inserting_dummy_data import create_dummy_data
+    create_dummy_data(database, datagen.make_spec(max(SIZES) / datagen.BASE_RECORDS))
+    return database
+
+
+@pytest.fixture(scope="session", params=SIZES, ids=lambda n: f"{n}rows")
+def passengers(request):
+    """Generated passengers DataFrame of each benchmark size."""
+    spec = datagen.make_spec(request.param / datagen.BASE_RECORDS)
+    return datagen.passengers_frame(spec, 0, request.param)
@@ -0,0 +1,208 @@
+"""
+Concurrency stress test for the seat inventory (migrations/0009).
+
+Many bookers, each on its own pooled session, go after the seats of a few
+"hot" schedules at once through dashboard/modules/seat_inventory.py:
+
+    hold     hold_seats (a random free seat) or hold_any (the first free
+             one), then confirm_hold into a booking
+    direct   insert_rows of bookings for random seats straight away, so the
+             bookings trigger is the only thing standing between them
+
+Afterwards the bookings are checked: no seat is booked twice and every
+inventory bitmap agrees with its bookings. The bookings it made, and their
+audit rows, are deleted again unless --keep is given.
+
+    python benchmarks/seat_booking_stress.py --workers 32 --seconds 10
+    python benchmarks/seat_booking_stress.py --mode direct --schedules 1
+"""
+import argparse
+import random
+import os
+import sys
+import threading
+import time
+import psycopg2
+from psycopg2 import errorcodes
+from sqlalchemy import text
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "dashboard"))
+from db_connection import connect  # noqa: E402
+from config import db_config  # noqa: E402
+from config.db_config import get_session  # noqa: E402
+from modules.seat_inventory import (SeatError, available_seats, confirm_hold, hold_any, hold_seats,  # noqa: E402
+                                    load_inventory, release_hold, seat_label)
+from modules.writes import insert_rows  # noqa: E402
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.booked = []
+        self.conflicts = 0
+        self.latencies = []
+
+    def add(self, booking_ids=(), conflict=False, latency=None):
+        with self.lock:
+            self.booked += booking_ids
+            self.conflicts += conflict
+            if latency is not None:
+                self.latencies.append(latency)
+
+
+def pick_schedules(count):
+    """The `count` latest schedules whose aircraft has a layout: {schedule_id: (seats, seat_letters)}."""
+    with get_session() as session:
+        schedules = session.execute(text("""
+            SELECT s.schedule_id FROM flight_schedules s
+            JOIN flights f ON f.flight_id = s.flight_id
+            JOIN aircraft_layouts l ON l.aircraft_type = f.aircraft_type
+            ORDER BY s.departure_time DESC LIMIT :n
+        """), {"n": count}).scalars().all()
+        layouts = {}
+        for schedule_id in schedules:
+            seat_rows, seat_letters, _ = load_inventory(session, schedule_id)
+            layouts[schedule_id] = (seat_rows * len(seat_letters), seat_letters)
+        # keeps the inventory rows load_inventory built
+        session.commit()
+    return layouts
+
+
+def hold_worker(layouts, passenger_id, status_id, admin_id, stop, stats):
+    schedules = list(layouts)
+    with get_session() as session:
+        while not stop.is_set() and schedules:
+            schedule_id = random.choice(schedules)
+            start = time.perf_counter()
+            try:
+                if random.random() < 0.5:
+                    # a seat picked from the map, which others may be picking too
+                    free = available_seats(session, schedule_id)
+                    if not free:
+                        schedules.remove(schedule_id)
+                        continue
+                    token = hold_seats(session, schedule_id, [random.choice(free)])
+                else:
+                    token, _ = hold_any(session, schedule_id, 1)
+            except SeatError as e:
+                if str(e).startswith("Only 0 seats left"):
+                    schedules.remove(schedule_id)
+                else:
+                    stats.add(conflict=True)
+                continue
+            try:
+                result = confirm_hold(session, token, passenger_id, admin_id, status="Confirmed")
+                stats.add(result.ids, latency=time.perf_counter() - start)
+            except (SeatError, psycopg2.Error) as e:
+                if getattr(e, "pgcode", None) not in (None, errorcodes.UNIQUE_VIOLATION):
+                    raise
+                # the seat was booked between reading the map and holding it
+                release_hold(session, token)
+                stats.add(conflict=True)
+
+
+def direct_worker(layouts, passenger_id, status_id, admin_id, stop, stats):
+    schedules = list(layouts)
+    with get_session() as session:
+        while not stop.is_set():
+            schedule_id = random.choice(schedules)
+            seats, letters = layouts[schedule_id]
+            booking = {"passenger_id": passenger_id, "schedule_id": schedule_id,
+                       "seat_number": seat_label(random.randrange(seats), letters), "status_id": status_id}
+            start = time.perf_counter()
+            try:
+                result = insert_rows(session, "bookings", "booking_id", [booking], admin_id)
+                stats.add(result.ids, latency=time.perf_counter() - start)
+            except psycopg2.Error as e:
+                if e.pgcode != errorcodes.UNIQUE_VIOLATION:
+                    raise
+                stats.add(conflict=True)
+
+
+def verify(conn, schedules):
+    """Returns a list of problems found; empty when the inventory is consistent."""
+    problems = []
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT schedule_id, seat_number, count(*) FROM bookings
+            WHERE schedule_id = ANY(%s) GROUP BY 1, 2 HAVING count(*) > 1
+        """, (schedules,))
+        problems += [f"schedule {s}: seat {seat} booked {n} times" for s, seat, n in cursor.fetchall()]
+        cursor.execute("""
+            SELECT i.schedule_id, i.booked_count,
+                   length(replace(i.booked::text, '0', '')),
+                   (SELECT count(*) FROM bookings b WHERE b.schedule_id = i.schedule_id
+                      AND seat_index(b.seat_number, i.seat_rows, i.seat_letters) IS NOT NULL)
+            FROM seat_inventory i WHERE i.schedule_id = ANY(%s)
+        """, (schedules,))
+        for schedule_id, count, bits, bookings in cursor.fetchall():
+            if not count == bits == bookings:
+                problems.append(f"schedule {schedule_id}: booked_count {count}, bits {bits}, bookings {bookings}")
+    conn.rollback()
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hammer the seat inventory with concurrent bookers.")
+    parser.add_argument("--workers", type=int, default=16, help="concurrent bookers, one session each")
+    parser.add_argument("--seconds", type=float, default=10, help="how long to run")
+    parser.add_argument("--schedules", type=int, default=4, help="hot schedules they compete for")
+    parser.add_argument("--mode", choices=["hold", "direct"], default="hold")
+    parser.add_argument("--keep", action="store_true", help="keep the bookings made")
+    args = parser.parse_args()
+
+    # every booker holds one pooled session for the whole run
+    db_config.DB_POOL_SIZE = max(db_config.DB_POOL_SIZE, args.workers + 1)
+    layouts = pick_schedules(args.schedules)
+    if not layouts:
+        sys.exit("No schedule with a seat layout; load data first")
+    setup = connect()
+    with setup.cursor() as cursor:
+        cursor.execute("SELECT min(passenger_id) FROM passengers")
+        passenger_id = cursor.fetchone()[0]
+        cursor.execute("SELECT status_id FROM booking_statuses WHERE status_name = 'Confirmed'")
+        status_id = cursor.fetchone()[0]
+        cursor.execute("SELECT min(admin_id) FROM admins")
+        admin_id = cursor.fetchone()[0]
+    setup.rollback()
+    seats = sum(n for n, _ in layouts.values())
+    print(f"{args.workers} {args.mode} bookers on {len(layouts)} schedules ({seats} seats) for {args.seconds:g}s")
+
+    worker = hold_worker if args.mode == "hold" else direct_worker
+    stats, stop = Stats(), threading.Event()
+    threads = [threading.Thread(target=worker, args=(layouts, passenger_id, status_id, admin_id, stop, stats))
+               for _ in range(args.workers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(stats.latencies)
+    print(f"bookings   {len(stats.booked):>8,}  ({len(stats.booked) / elapsed:,.0f}/s)")
+    print(f"conflicts  {stats.conflicts:>8,}")
+    if latencies:
+        print(f"latency    p50 {latencies[len(latencies) // 2] * 1000:.1f} ms  "
+              f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms")
+
+    problems = verify(setup, list(layouts))
+    for problem in problems:
+        print("FAIL", problem)
+    if not args.keep and stats.booked:
+        with setup.cursor() as cursor:
+            cursor.execute("DELETE FROM bookings WHERE booking_id = ANY(%s)", (stats.booked,))
+            cursor.execute("DELETE FROM audit_logs WHERE table_name = 'bookings' AND record_id = ANY(%s)",
+                           (stats.booked,))
+        setup.commit()
+    setup.close()
+    print("OK: no seat booked twice, every bitmap matches its bookings" if not problems else "FAILED")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
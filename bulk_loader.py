@@ -0,0 +1,146 @@
+import io
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime
+
+# Characters that must be escaped in COPY text format
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def encode_rows(rows):
+    """Encode an iterable of tuples as COPY text format (tab separated, \\N for NULL)."""
+    return "".join("\t".join(map(_copy_value, row)) + "\n" for row in rows)
+
+
+def copy_text(cursor, table, columns, data, fmt="text"):
+    """Stream already-encoded COPY data (`fmt` text or csv) into `table` through an in-memory buffer."""
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT {fmt})",
+        io.StringIO(data)
+    )
+
+
+def copy_rows(cursor, table, columns, rows, batch_size=50000):
+    """COPY `rows` into `table`, flushing the buffer every `batch_size` rows."""
+    batch = []
+    total = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            copy_text(cursor, table, columns, encode_rows(batch))
+            total += len(batch)
+            batch = []
+    if batch:
+        copy_text(cursor, table, columns, encode_rows(batch))
+        total += len(batch)
+    return total
+
+
+def parallel_copy(cursor, table, columns, chunk_fn, chunk_args, workers=None, fmt="text"):
+    """
+    Generate chunks in a process pool and COPY each one as soon as it is ready.
+
+    `chunk_fn(args)` must be a module-level function returning
+    (row_count, data) with data encoded in COPY format `fmt`. At most two chunks per worker are in flight, so
+    memory stays bounded however many chunks the table has.
+    Returns the number of rows loaded.
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    total = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for args in chunk_args:
+            pending.append(pool.submit(chunk_fn, args))
+            if len(pending) >= workers * 2:
+                count, data = pending.popleft().result()
+                copy_text(cursor, table, columns, data, fmt)
+                total += count
+        while pending:
+            count, data = pending.popleft().result()
+            copy_text(cursor, table, columns, data, fmt)
+            total += count
+    elapsed = time.perf_counter() - start
+    print(f"  {table}: {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+    return total
+
+
+@contextmanager
+def without_secondary_indexes(conn, tables):
+    """
+    Drop foreign keys and secondary (non-constraint) indexes on `tables`,
+    and recreate them from their saved definitions when the block exits.
+    Primary keys and UNIQUE constraints stay in place.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE contype = 'f' AND conrelid = ANY(%s::regclass[])
+    """, (list(tables),))
+    foreign_keys = cursor.fetchall()
+    cursor.execute("""
+        SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = ANY(%s::regclass[])
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_constraint c
+              WHERE c.conrelid = i.indrelid AND c.conindid = i.indexrelid
+                AND c.contype IN ('p', 'u', 'x')
+          )
+    """, (list(tables),))
+    indexes = cursor.fetchall()
+
+    for table, name, _ in foreign_keys:
+        cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+    for name, _ in indexes:
+        cursor.execute(f"DROP INDEX {name}")
+    conn.commit()
+    print(f"Dropped {len(foreign_keys)} foreign keys and {len(indexes)} indexes for the load")
+
+    try:
+        yield
+    finally:
+        conn.rollback()
+        start = time.perf_counter()
+        for _, definition in indexes:
+            # a partitioned table's index is reported as "ON ONLY parent",
+            # which would leave its partitions without the index
+            cursor.execute(definition.replace(" ON ONLY ", " ON ", 1))
+        for table, name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}')
+        conn.commit()
+        print(f"Recreated indexes and foreign keys in {time.perf_counter() - start:.1f}s")
+        cursor.close()
+
+
+@contextmanager
+def without_user_triggers(conn, tables):
+    """
+    Disable the user triggers on `tables` (the trigger-based foreign keys,
+    seat checks and KPI dirty flags) while the block runs. The loaded data
+    is generated consistent, so checking it row by row is wasted work.
+    """
+    cursor = conn.cursor()
+    for table in tables:
+        cursor.execute(f"ALTER TABLE {table} DISABLE TRIGGER USER")
+    conn.commit()
+    try:
+        yield
+    finally:
+        conn.rollback()
+        for table in tables:
+            cursor.execute(f"ALTER TABLE {table} ENABLE TRIGGER USER")
+        conn.commit()
+        cursor.close()
@@ -1,11 +1,14 @@
 # app.py
 import streamlit as st
-from modules.auth import get_roles, validate_login
+from modules.auth import get_roles, validate_login, LoginBusy, LoginRateLimited
 from modules.utils import set_session_user, get_session_user, clear_session_user
 from modules.dashboards import load_dashboard
+from modules.instrumentation import set_page
+from modules.profiler import profiled_rerun, profile_sidebar
 
 def login_page():
     st.title("Airport Management System - Login")
+    set_page("login")
     
     roles = get_roles()
     role_dict = {r['role_name']: r['role_id'] for r in roles}
@@ -17,7 +20,14 @@ def login_page():
     
     if login_btn:
         role_id = role_dict[selected_role]
-        user = validate_login(email, password, role_id)
+        try:
+            user = validate_login(email, password, role_id)
+        except LoginRateLimited:
+            st.error("Too many failed attempts for this email. Please wait a few minutes.")
+            return
+        except LoginBusy:
+            st.warning("Login service is busy. Please try again in a moment.")
+            return
         if user:
             st.success(f"Logged in as {user['full_name']} ({selected_role})")
             set_session_user(user)
@@ -25,19 +35,24 @@ def login_page():
         else:
             st.error("Invalid credentials or role mismatch.")
 
-def logout():
-    clear_session_user()
+def logout(everywhere=False):
+    clear_session_user(everywhere)
     st.rerun()
 
 def main():
-    user = get_session_user()
-    if user:
-        st.sidebar.write(f"Logged in as: {user['full_name']}")
-        if st.sidebar.button("Logout"):
-            logout()
-        load_dashboard(user)
-    else:
-        login_page()
+    # PROFILE_RERUNS=1 traces this rerun and shows the breakdown in the sidebar
+    with profiled_rerun():
+        user = get_session_user()
+        if user:
+            st.sidebar.write(f"Logged in as: {user['full_name']}")
+            if st.sidebar.button("Logout"):
+                logout()
+            if st.sidebar.button("Log out everywhere"):
+                logout(everywhere=True)
+            load_dashboard(user)
+        else:
+            login_page()
+    profile_sidebar()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
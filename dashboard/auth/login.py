@@ -1,26 +1,16 @@
 # login.py
 
 import streamlit as st
-import psycopg2
 from auth.auth_utils import get_user_by_email_and_role, check_password
-
-def connect_db():
-    return psycopg2.connect(
-        host="localhost",
-        database="AirportFlightManagement",
-        user="yasir",
-        password="yasir1234",
-        port="6677"
-    )
+from config.db_config import get_connection
 
 def authenticate_user(email: str, password: str, role: str):
     if not email or not password or not role:
         return None
 
-    conn = None
     try:
-        conn = connect_db()
-        user = get_user_by_email_and_role(conn, email, role)
+        with get_connection() as conn:
+            user = get_user_by_email_and_role(conn, email, role)
         if user and check_password(password, user['hashed_password']):
             return user
         else:
@@ -28,9 +18,6 @@ def authenticate_user(email: str, password: str, role: str):
     except Exception as e:
         st.error(f"Error during authentication: {e}")
         return None
-    finally:
-        if conn:
-            conn.close()
 
 def login_screen():
     st.title("✈️ Airport Management Login")
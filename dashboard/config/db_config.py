@@ -1,26 +1,145 @@
 # config/db_config.py
-import psycopg2
-from psycopg2.extras import RealDictCursor
-import streamlit as st
+import os
+import threading
+import time
+from contextlib import contextmanager
+import psycopg2.extensions
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session
 
+# Connection settings, overridable through the environment
+DB_HOST = os.environ.get("DB_HOST", "localhost")
+DB_PORT = int(os.environ.get("DB_PORT", "6677"))
+DB_NAME = os.environ.get("DB_NAME", "AirportFlightManagement")
+DB_USER = os.environ.get("DB_USER", "yasir")
+DB_PASSWORD = os.environ.get("DB_PASSWORD", "yasir1234")
+
+# Pool limits: at most DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW server connections per process
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_POOL_MAX_OVERFLOW = int(os.environ.get("DB_POOL_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+
+# Time every query on pooled connections (modules/instrumentation.py); off
+# by default, since it adds work to every query
+QUERY_STATS = os.environ.get("QUERY_STATS", "0") == "1"
+
+# Range columns (e.g. flight_schedules.gate_occupancy) are read as their text
+# form, which the table views and every export format can show as is
+RANGE_TYPE_OIDS = (3904, 3906, 3908, 3910, 3912, 3926)  # int4, num, ts, tstz, date, int8 ranges
+psycopg2.extensions.register_type(
+    psycopg2.extensions.new_type(RANGE_TYPE_OIDS, "RANGE_AS_TEXT", lambda value, cursor: value)
+)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+_metrics_lock = threading.Lock()
+_metrics = {
+    "waiting": 0,
+    "checkouts": 0,
+    "timeouts": 0,
+    "wait_seconds_total": 0.0,
+    "wait_seconds_max": 0.0,
+}
+
+
+def get_database_url():
+    return f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+
+def get_engine():
+    """The process-wide engine; every module draws its connections from its pool."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                # same as db_connection.py, which loads the data
+                connect_args = {"client_encoding": "utf8"}
+                if QUERY_STATS:
+                    from modules.instrumentation import InstrumentedConnection
+                    connect_args["connection_factory"] = InstrumentedConnection
+                _engine = create_engine(
+                    get_database_url(),
+                    pool_size=DB_POOL_SIZE,
+                    max_overflow=DB_POOL_MAX_OVERFLOW,
+                    pool_timeout=DB_POOL_TIMEOUT,
+                    pool_recycle=DB_POOL_RECYCLE,
+                    pool_pre_ping=True,
+                    connect_args=connect_args,
+                )
+    return _engine
+
+
+def _checkout(connect):
+    with _metrics_lock:
+        _metrics["waiting"] += 1
+    start = time.perf_counter()
+    try:
+        return connect()
+    except PoolTimeoutError:
+        with _metrics_lock:
+            _metrics["timeouts"] += 1
+        raise
+    finally:
+        waited = time.perf_counter() - start
+        with _metrics_lock:
+            _metrics["waiting"] -= 1
+            _metrics["checkouts"] += 1
+            _metrics["wait_seconds_total"] += waited
+            _metrics["wait_seconds_max"] = max(_metrics["wait_seconds_max"], waited)
+
+
+@contextmanager
+def get_session():
+    """
+    SQLAlchemy session on a pooled connection.
+    Uncommitted work is rolled back and the connection goes back to the pool on exit.
+    """
+    conn = _checkout(get_engine().connect)
+    session = Session(bind=conn)
+    try:
+        yield session
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+        conn.close()
+
+
+@contextmanager
 def get_connection():
-    if 'db_conn' not in st.session_state:
-        conn = psycopg2.connect(
-            host="localhost",
-            database="AirportFlightManagement",
-            user="yasir",
-            password="yasir1234",
-            port=6677
-        )
-        st.session_state['db_conn'] = conn
-    return st.session_state['db_conn']
-
-def get_cursor():
-    """Returns just the cursor (for backward compatibility)"""
-    conn = get_connection()
-    return conn.cursor(cursor_factory=RealDictCursor)
-
-def get_cursor_and_connection():
-    """Returns both cursor and connection"""
-    conn = get_connection()
-    return conn.cursor(cursor_factory=RealDictCursor), conn
\ No newline at end of file
+    """
+    Raw psycopg2 connection from the same pool, for cursor-based code.
+    The pool rolls back anything left uncommitted when it is returned.
+    """
+    conn = _checkout(get_engine().raw_connection)
+    try:
+        yield conn
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def pool_status():
+    """Snapshot of pool usage: sizes, checked-out connections, waiters and wait times."""
+    pool = get_engine().pool
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    checkouts = metrics["checkouts"]
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": DB_POOL_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "waiting": metrics["waiting"],
+        "checkouts": checkouts,
+        "timeouts": metrics["timeouts"],
+        "wait_seconds_avg": metrics["wait_seconds_total"] / checkouts if checkouts else 0.0,
+        "wait_seconds_max": metrics["wait_seconds_max"],
+    }
@@ -0,0 +1,205 @@
+# modules/audit.py
+import atexit
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+from psycopg2.extras import execute_values
+from config.db_config import get_connection
+
+# AUDIT_MODE=transactional (default): audit rows are written by the caller
+# in the same transaction as the change they describe.
+# AUDIT_MODE=async: events go to an in-process queue after the change
+# commits; a background thread writes them in batches of AUDIT_BATCH_SIZE
+# or every AUDIT_FLUSH_INTERVAL seconds, whichever comes first.
+AUDIT_MODE = os.environ.get("AUDIT_MODE", "transactional")
+AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get("AUDIT_FLUSH_INTERVAL", "1.0"))
+
+# Backpressure: a full queue blocks the writer for up to AUDIT_ENQUEUE_TIMEOUT
+# seconds. Events that still do not fit, and batches the database rejects,
+# are appended to AUDIT_SPOOL_FILE and replayed on the next successful flush.
+AUDIT_QUEUE_SIZE = int(os.environ.get("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_ENQUEUE_TIMEOUT = float(os.environ.get("AUDIT_ENQUEUE_TIMEOUT", "2.0"))
+AUDIT_SPOOL_FILE = os.environ.get("AUDIT_SPOOL_FILE", "audit_spool.jsonl")
+# spooled lines that cannot be read back (e.g. cut short by a crash) are
+# moved here instead of blocking the replay
+AUDIT_SPOOL_REJECTS = f"{AUDIT_SPOOL_FILE}.rejected"
+
+INSERT_SQL = "INSERT INTO audit_logs (table_name, action, record_id, admin_id, timestamp) VALUES %s"
+
+_queue = queue.Queue(maxsize=AUDIT_QUEUE_SIZE)
+_spool_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"enqueued": 0, "flushed": 0, "batches": 0, "spooled": 0, "rejected": 0, "failures": 0, "last_flush_ms": 0.0}
+_worker = None
+_worker_lock = threading.Lock()
+_stop = threading.Event()
+
+
+def is_async():
+    return AUDIT_MODE == "async"
+
+
+def utc_now():
+    """The audit clock: naive UTC, as stored in audit_logs.timestamp (migrations/0015)."""
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def make_events(table_name, action, record_ids, admin_id):
+    """Audit rows (table_name, action, record_id, admin_id, timestamp), one per record."""
+    now = utc_now()
+    return [(table_name, action, record_id, admin_id, now) for record_id in record_ids]
+
+
+def write_events(cursor, events):
+    """Multi-row INSERT on the caller's cursor; the caller commits."""
+    if events:
+        execute_values(cursor, INSERT_SQL, events, page_size=AUDIT_BATCH_SIZE)
+
+
+def _count(key, n=1):
+    with _stats_lock:
+        _stats[key] += n
+
+
+def _spool(events):
+    with _spool_lock, open(AUDIT_SPOOL_FILE, "a", encoding="utf-8") as f:
+        for table_name, action, record_id, admin_id, ts in events:
+            f.write(json.dumps([table_name, action, record_id, admin_id, ts.isoformat()]) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    _count("spooled", len(events))
+
+
+def _take_spool():
+    """Claims the spool file, renamed so new spills start a fresh one; returns its new name or None."""
+    with _spool_lock:
+        if not os.path.exists(AUDIT_SPOOL_FILE):
+            return None
+        claimed = f"{AUDIT_SPOOL_FILE}.{os.getpid()}.replay"
+        os.replace(AUDIT_SPOOL_FILE, claimed)
+    return claimed
+
+
+def _read_spool(path):
+    """Events in a claimed spool file; lines that do not parse are moved to AUDIT_SPOOL_REJECTS."""
+    events, rejected = [], []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            try:
+                e = json.loads(line)
+                events.append((e[0], e[1], e[2], e[3], datetime.datetime.fromisoformat(e[4])))
+            except (ValueError, TypeError, IndexError, KeyError):
+                rejected.append(line.rstrip("\n") + "\n")
+    if rejected:
+        with _spool_lock, open(AUDIT_SPOOL_REJECTS, "a", encoding="utf-8") as f:
+            f.writelines(rejected)
+        _count("rejected", len(rejected))
+    return events
+
+
+def _flush(events):
+    start = time.perf_counter()
+    claimed, spooled = _take_spool(), None
+    try:
+        if claimed:
+            spooled = _read_spool(claimed)
+        with get_connection() as conn, conn.cursor() as cursor:
+            write_events(cursor, (spooled or []) + events)
+            conn.commit()
+    except Exception:
+        _count("failures")
+        _spool(events)
+        if claimed:
+            # put the claimed events back for the next attempt
+            if spooled is None:
+                _restore_spool(claimed)
+            else:
+                _spool(spooled)
+                _count("spooled", -len(spooled))
+            os.remove(claimed)
+        return
+    if claimed:
+        os.remove(claimed)
+    with _stats_lock:
+        _stats["flushed"] += len(events) + len(spooled or [])
+        _stats["batches"] += 1
+        _stats["last_flush_ms"] = (time.perf_counter() - start) * 1000
+
+
+def _restore_spool(claimed):
+    # the claimed file could not be read: its lines go back as they are
+    with _spool_lock, open(claimed, "rb") as src, open(AUDIT_SPOOL_FILE, "ab") as dst:
+        dst.write(src.read())
+        dst.flush()
+        os.fsync(dst.fileno())
+
+
+def _run():
+    while not _stop.is_set() or not _queue.empty():
+        batch = []
+        deadline = time.monotonic() + AUDIT_FLUSH_INTERVAL
+        while len(batch) < AUDIT_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.extend(_queue.get(timeout=remaining))
+            except queue.Empty:
+                if _stop.is_set():
+                    break
+        if batch or os.path.exists(AUDIT_SPOOL_FILE):
+            _flush(batch)
+
+
+def _ensure_worker():
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        with _worker_lock:
+            if _worker is None or not _worker.is_alive():
+                _worker = threading.Thread(target=_run, name="audit-flusher", daemon=True)
+                _worker.start()
+
+
+def submit(events):
+    """Queue events for the background flusher (async mode)."""
+    if not events:
+        return
+    _ensure_worker()
+    try:
+        _queue.put(events, timeout=AUDIT_ENQUEUE_TIMEOUT)
+        _count("enqueued", len(events))
+    except queue.Full:
+        _spool(events)
+
+
+def record(cursor, table_name, action, record_ids, admin_id):
+    """
+    Audit `record_ids`. Call before committing the change: in transactional
+    mode the rows are written on `cursor`; in async mode the returned events
+    must be passed to submit() once the commit succeeded.
+    """
+    events = make_events(table_name, action, record_ids, admin_id)
+    if is_async():
+        return events
+    write_events(cursor, events)
+    return []
+
+
+def stats():
+    with _stats_lock:
+        snapshot = dict(_stats)
+    snapshot["queued_batches"] = _queue.qsize()
+    snapshot["mode"] = AUDIT_MODE
+    return snapshot
+
+
+@atexit.register
+def shutdown(timeout=5.0):
+    """Flush what is queued before the process exits."""
+    _stop.set()
+    if _worker is not None and _worker.is_alive():
+        _worker.join(timeout)
@@ -0,0 +1,94 @@
+# modules/audit_viewer.py
+import datetime
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+from modules import audit
+from modules.table_browser import PAGE_SIZES
+from modules.utils import get_session
+
+ACTIONS = ["INSERT", "UPDATE", "DELETE"]
+
+
+def fetch_audit_page(session, start, end, before=None, table_name=None, action=None, admin_id=None, page_size=50):
+    """
+    One page of audit_logs, newest first, keyset-paginated on
+    (timestamp, audit_id). The [start, end) window on timestamp lets the
+    planner skip every monthly partition outside it.
+    Returns (page_df, has_more).
+    """
+    where = ["timestamp >= :start", "timestamp < :end"]
+    params = {"start": start, "end": end, "limit": page_size + 1}
+    if before is not None:
+        where.append("(timestamp, audit_id) < (:before_ts, :before_id)")
+        params["before_ts"], params["before_id"] = before
+    if table_name:
+        where.append("table_name = :table_name")
+        params["table_name"] = table_name
+    if action:
+        where.append("action = :action")
+        params["action"] = action
+    if admin_id:
+        where.append("admin_id = :admin_id")
+        params["admin_id"] = admin_id
+    query = f"""
+        SELECT audit_id, timestamp, table_name, action, record_id, admin_id
+        FROM audit_logs
+        WHERE {' AND '.join(where)}
+        ORDER BY timestamp DESC, audit_id DESC
+        LIMIT :limit
+    """
+    df = pd.read_sql(text(query), session.connection(), params=params)
+    return df.head(page_size), len(df) > page_size
+
+
+def audit_viewer():
+    # one pooled connection per rerun, released when the page is rendered
+    with get_session() as session:
+        _audit_page(session)
+
+
+def _audit_page(session):
+    st.subheader("🧾 Audit Log")
+
+    # audit timestamps are UTC, and so are the dates of the window
+    today = audit.utc_now().date()
+    col1, col2, col3, col4 = st.columns(4)
+    window = col1.date_input("Window (UTC)", (today - datetime.timedelta(days=7), today), key="audit_window")
+    table_name = col2.text_input("Table", key="audit_table").strip() or None
+    action = col3.selectbox("Action", ["All"] + ACTIONS, key="audit_action")
+    admin_id = col4.number_input("Admin ID (0 = all)", min_value=0, step=1, key="audit_admin")
+    page_size = st.sidebar.selectbox("Rows per page", PAGE_SIZES, index=1, key="audit_page_size")
+    if len(window) != 2:
+        return
+    start, end = window[0], window[1] + datetime.timedelta(days=1)
+
+    # cursor stack for Prev/Next, reset whenever a filter changes
+    filters = (start, end, table_name, action, admin_id, page_size)
+    state = st.session_state.setdefault("audit_pages", {"filters": filters, "cursors": [None]})
+    if state["filters"] != filters:
+        state.update(filters=filters, cursors=[None])
+
+    df, has_more = fetch_audit_page(
+        session, start, end, before=state["cursors"][-1], table_name=table_name,
+        action=None if action == "All" else action, admin_id=admin_id or None, page_size=page_size
+    )
+    st.caption(f"Page {len(state['cursors'])}")
+    st.dataframe(df, use_container_width=True)
+
+    prev_col, next_col = st.columns(2)
+    if prev_col.button("⬅️ Newer", disabled=len(state["cursors"]) == 1):
+        state["cursors"].pop()
+        st.rerun()
+    if next_col.button("Older ➡️", disabled=not has_more):
+        last = df.iloc[-1]
+        state["cursors"].append((last["timestamp"].to_pydatetime(), int(last["audit_id"])))
+        st.rerun()
+
+    if audit.is_async():
+        stats = audit.stats()
+        st.sidebar.markdown("**Audit queue**")
+        st.sidebar.write(
+            f"{stats['queued_batches']} batches queued · {stats['flushed']:,} flushed · "
+            f"{stats['spooled']:,} spooled · {stats['rejected']:,} rejected · last flush {stats['last_flush_ms']:.0f} ms"
+        )
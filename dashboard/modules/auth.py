@@ -1,41 +1,165 @@
 # modules/auth.py
+import base64
+import functools
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 import bcrypt
-from config.db_config import get_cursor
+from psycopg2.extras import RealDictCursor
+from config.db_config import get_connection
+from modules.profiler import cache_data
 
-ALLOWED_ROLE_IDS = {1, 2}  
+ALLOWED_ROLE_IDS = {1, 2}
 
+# Role list changes only when admin_roles is edited; refresh it every few minutes
+ROLE_CACHE_TTL = int(os.environ.get("ROLE_CACHE_TTL", "300"))
+
+# bcrypt runs off the script thread on a small pool; requests beyond
+# LOGIN_WORKERS + LOGIN_QUEUE_SIZE are turned away instead of piling up
+LOGIN_WORKERS = int(os.environ.get("LOGIN_WORKERS", "4"))
+LOGIN_QUEUE_SIZE = int(os.environ.get("LOGIN_QUEUE_SIZE", "16"))
+LOGIN_TIMEOUT = float(os.environ.get("LOGIN_TIMEOUT", "10"))
+# cost of the hash checked for unknown emails; match the admins' hashes
+# (admin_insertion.py --rounds) so both take as long
+LOGIN_DUMMY_ROUNDS = int(os.environ.get("LOGIN_DUMMY_ROUNDS", "12"))
+
+# At most LOGIN_MAX_FAILURES failed attempts per email within LOGIN_WINDOW seconds
+LOGIN_MAX_FAILURES = int(os.environ.get("LOGIN_MAX_FAILURES", "5"))
+LOGIN_WINDOW = int(os.environ.get("LOGIN_WINDOW", "300"))
+# emails with recent failures tracked at once; when full, the email whose
+# last failure is oldest is forgotten
+LOGIN_TRACKED_EMAILS = int(os.environ.get("LOGIN_TRACKED_EMAILS", "10000"))
+
+# Signed session tokens, kept in st.session_state and checked on every rerun.
+# Each carries a random token id and the admin's session_version
+# (migrations/0014). Logout lists the one token in revoked_session_tokens
+# (migrations/0018); logging out everywhere, or a role or password change,
+# bumps the version, which revokes every token issued before. Both are
+# rechecked at most every SESSION_CHECK_INTERVAL seconds per process.
+SESSION_SECRET = os.environ.get("SESSION_SECRET", "").encode() or secrets.token_bytes(32)
+SESSION_TTL = int(os.environ.get("SESSION_TTL", str(8 * 3600)))
+SESSION_CHECK_INTERVAL = float(os.environ.get("SESSION_CHECK_INTERVAL", "5"))
+
+_verify_pool = ThreadPoolExecutor(max_workers=LOGIN_WORKERS, thread_name_prefix="bcrypt")
+_verify_slots = threading.BoundedSemaphore(LOGIN_WORKERS + LOGIN_QUEUE_SIZE)
+
+_failures = {}  # email -> recent failure times; ordered by last failure, oldest first
+_failures_lock = threading.Lock()
+
+_states = {}  # (admin_id, token id) -> ((session_version or None, revoked), checked at)
+_states_lock = threading.Lock()
+
+
+class LoginRateLimited(Exception):
+    """Too many failed attempts for this email; try again later."""
+
+
+class LoginBusy(Exception):
+    """The password verifier is saturated; try again shortly."""
+
+
+@cache_data(ttl=ROLE_CACHE_TTL, show_spinner=False)
 def get_roles():
-    cursor = get_cursor()
-    cursor.execute("SELECT role_id, role_name FROM admin_roles WHERE role_id IN %s ORDER BY role_name", (tuple(ALLOWED_ROLE_IDS),))
-    roles = cursor.fetchall()
-    return roles
+    with get_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        cursor.execute("SELECT role_id, role_name FROM admin_roles WHERE role_id IN %s ORDER BY role_name", (tuple(ALLOWED_ROLE_IDS),))
+        roles = cursor.fetchall()
+    return [dict(r) for r in roles]
 
-import bcrypt
-from config.db_config import get_cursor
+def invalidate_roles():
+    """Drop the cached role list, e.g. after admin_roles changes."""
+    get_roles.clear()
 
-def validate_login(email, plain_password, role_id):
-  
-    ALLOWED_ROLE_IDS = {1, 2}
+def _recent_failures(key, now):
+    """Number of failures for `key` within the window; a key left with none is dropped."""
+    attempts = _failures.get(key)
+    if attempts is None:
+        return 0
+    while attempts and attempts[0] <= now - LOGIN_WINDOW:
+        attempts.popleft()
+    if not attempts:
+        del _failures[key]
+    return len(attempts)
+
+def _record_result(key, success):
+    now = time.monotonic()
+    with _failures_lock:
+        attempts = _failures.pop(key, None)
+        if success:
+            return
+        # expired or surplus entries sit at the front
+        while _failures:
+            oldest = next(iter(_failures))
+            if _failures[oldest][-1] > now - LOGIN_WINDOW and len(_failures) < LOGIN_TRACKED_EMAILS:
+                break
+            del _failures[oldest]
+        # only the last LOGIN_MAX_FAILURES attempts decide the lockout
+        attempts = attempts if attempts is not None else deque(maxlen=LOGIN_MAX_FAILURES)
+        attempts.append(now)
+        _failures[key] = attempts
+
+@functools.lru_cache(maxsize=1)
+def _dummy_hash():
+    return bcrypt.hashpw(secrets.token_bytes(16), bcrypt.gensalt(LOGIN_DUMMY_ROUNDS)).decode('utf-8')
+
+def _check_password(plain_password, stored_hashed_password):
+    """Run bcrypt on the bounded verifier pool."""
+    if not _verify_slots.acquire(blocking=False):
+        raise LoginBusy()
+    try:
+        future = _verify_pool.submit(
+            bcrypt.checkpw, plain_password.encode('utf-8'), stored_hashed_password.encode('utf-8')
+        )
+    except BaseException:
+        _verify_slots.release()
+        raise
+    # the slot is held until bcrypt finishes, even when we stop waiting for it
+    future.add_done_callback(lambda _: _verify_slots.release())
+    try:
+        return future.result(timeout=LOGIN_TIMEOUT)
+    except FuturesTimeoutError:
+        raise LoginBusy()
 
+def validate_login(email, plain_password, role_id):
+    """
+    Returns the admin dict on success and None on bad credentials.
+    Raises LoginRateLimited or LoginBusy when the attempt is refused.
+    """
     if role_id not in ALLOWED_ROLE_IDS:
         return None
 
-    cursor = get_cursor()
+    email = (email or "").strip()
+    limit_key = email.lower()
+    with _failures_lock:
+        if _recent_failures(limit_key, time.monotonic()) >= LOGIN_MAX_FAILURES:
+            raise LoginRateLimited()
+
     query = """
-        SELECT admin_id, full_name, email, password, role_id 
-        FROM admins 
+        SELECT admin_id, full_name, email, password, role_id
+        FROM admins
         WHERE email = %s AND role_id = %s
     """
-    cursor.execute(query, (email, role_id))
-    user = cursor.fetchone()
+    with get_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        cursor.execute(query, (email, role_id))
+        user = cursor.fetchone()
 
     if not user:
+        # the same bcrypt work as for a real admin, so the response time
+        # does not tell whether the email exists
+        _check_password(plain_password, _dummy_hash())
+        _record_result(limit_key, False)
         return None
 
     # RealDictCursor returns a dictionary
     stored_hashed_password = user['password']
 
-    if bcrypt.checkpw(plain_password.encode('utf-8'), stored_hashed_password.encode('utf-8')):
+    if _check_password(plain_password, stored_hashed_password):
+        _record_result(limit_key, True)
         return {
             'admin_id': user['admin_id'],
             'full_name': user['full_name'],
@@ -43,5 +167,94 @@ def validate_login(email, plain_password, role_id):
             'role_id': user['role_id']
         }
     else:
+        _record_result(limit_key, False)
+        return None
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def _token_state(admin_id, token_id=None):
+    """(session_version, revoked) of one of the admin's tokens; the version is None when the admin no longer exists."""
+    key = (admin_id, token_id)
+    now = time.monotonic()
+    with _states_lock:
+        cached = _states.get(key)
+    if cached is not None and now - cached[1] < SESSION_CHECK_INTERVAL:
+        return cached[0]
+    with get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT a.session_version, EXISTS (SELECT 1 FROM revoked_session_tokens r WHERE r.token_id = %s)
+            FROM admins a WHERE a.admin_id = %s
+        """, (token_id, admin_id))
+        row = cursor.fetchone()
+    state = (row[0], row[1]) if row else (None, False)
+    with _states_lock:
+        # entries due for a recheck would be read again anyway; drop them so
+        # tokens that are no longer used do not pile up
+        for stale in [k for k, (_, checked) in _states.items() if now - checked >= SESSION_CHECK_INTERVAL]:
+            del _states[stale]
+        _states[key] = (state, now)
+    return state
+
+def _forget(admin_id):
+    with _states_lock:
+        for key in [k for k in _states if k[0] == admin_id]:
+            del _states[key]
+
+def revoke_sessions(admin_id):
+    """Invalidates every session token issued to the admin so far (log out everywhere)."""
+    with get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("UPDATE admins SET session_version = session_version + 1 WHERE admin_id = %s", (admin_id,))
+        conn.commit()
+    _forget(admin_id)
+
+def revoke_session_token(token):
+    """Invalidates this one session token (logout); the admin's other sessions stay valid."""
+    claims = _claims(token)
+    if claims is None or 'jti' not in claims:
+        return
+    with get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO revoked_session_tokens (token_id, admin_id, expires_at)
+            VALUES (%s, %s, to_timestamp(%s)) ON CONFLICT (token_id) DO NOTHING
+        """, (claims['jti'], claims.get('admin_id'), claims.get('exp', 0)))
+        # tokens past their expiry are refused anyway
+        cursor.execute("DELETE FROM revoked_session_tokens WHERE expires_at < now()")
+        conn.commit()
+    _forget(claims.get('admin_id'))
+
+def issue_session_token(user):
+    """HMAC-signed token carrying the user dict, a token id, an expiry time and the session version."""
+    version, _ = _token_state(user['admin_id'])
+    claims = {**user, 'jti': secrets.token_urlsafe(16), 'ver': version, 'exp': int(time.time()) + SESSION_TTL}
+    payload = _b64(json.dumps(claims).encode())
+    signature = _b64(hmac.new(SESSION_SECRET, payload.encode(), hashlib.sha256).digest())
+    return f"{payload}.{signature}"
+
+def _claims(token):
+    """The claims of a correctly signed token, otherwise None."""
+    try:
+        payload, signature = token.split(".")
+        expected = _b64(hmac.new(SESSION_SECRET, payload.encode(), hashlib.sha256).digest())
+        if not hmac.compare_digest(signature, expected):
+            return None
+        return json.loads(_unb64(payload))
+    except (ValueError, TypeError):
         return None
 
+def verify_session_token(token):
+    """Returns the user dict from a valid, unexpired, unrevoked token, otherwise None."""
+    user = _claims(token)
+    if user is None or user.pop('exp', 0) < time.time():
+        return None
+    token_id = user.pop('jti', None)
+    version = user.pop('ver', None)
+    if token_id is None or version is None:
+        return None
+    current, revoked = _token_state(user.get('admin_id'), token_id)
+    if revoked or version != current:
+        return None
+    return user
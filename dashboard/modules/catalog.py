@@ -0,0 +1,169 @@
+# modules/catalog.py
+import datetime
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from modules.profiler import note_cache
+
+# Process-wide cache of table metadata from information_schema. It is loaded
+# once per schema version (bumped by the event trigger from migrations/0004)
+# and the version is rechecked at most every CATALOG_CHECK_INTERVAL seconds.
+CATALOG_CHECK_INTERVAL = float(os.environ.get("CATALOG_CHECK_INTERVAL", "5"))
+
+# data_type as information_schema reports it ("integer", "ARRAY", "USER-DEFINED");
+# sql_type is the type's own name, usable in a cast ("pg_catalog._int4", "public.mood")
+Column = namedtuple("Column", "name data_type nullable default is_generated max_length sql_type")
+Table = namedtuple("Table", "name columns primary_key foreign_keys partition_key partitions",
+                   defaults=(None, ()))
+# one range partition: (name, start, end); start/end are datetimes
+Partition = namedtuple("Partition", "name start end")
+
+_RANGE_BOUND = re.compile(r"FOR VALUES FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+_lock = threading.Lock()
+_tables = None
+_version = None
+_checked_at = 0.0
+
+
+def _schema_version(session):
+    try:
+        with session.begin_nested():
+            return session.execute(text("SELECT version FROM schema_version")).scalar()
+    except ProgrammingError:
+        # migration 0004 not applied: fall back to reloading on every check
+        return None
+
+
+def _load(session):
+    columns = session.execute(text("""
+        SELECT table_name, column_name, data_type, is_nullable = 'YES' AS nullable,
+               column_default, is_identity = 'YES' OR is_generated = 'ALWAYS' AS is_generated,
+               character_maximum_length, quote_ident(udt_schema) || '.' || quote_ident(udt_name) AS sql_type
+        FROM information_schema.columns
+        WHERE table_schema = current_schema()
+        ORDER BY table_name, ordinal_position
+    """)).fetchall()
+    # from pg_constraint: information_schema matches constraints by name, and
+    # every partition repeats its parent's foreign key names, which made this
+    # join grow with the square of the partition count. Foreign keys pointing
+    # at the partitions of a referenced table are left out; the parent's is kept.
+    keys = session.execute(text("""
+        SELECT c.relname AS table_name,
+               CASE con.contype WHEN 'p' THEN 'PRIMARY KEY' ELSE 'FOREIGN KEY' END AS constraint_type,
+               a.attname AS column_name, rc.relname AS ref_table, ra.attname AS ref_column
+        FROM pg_constraint con
+        JOIN pg_class c ON c.oid = con.conrelid
+        CROSS JOIN LATERAL unnest(con.conkey, con.confkey) WITH ORDINALITY AS k (attnum, ref_attnum, position)
+        JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+        LEFT JOIN pg_class rc ON rc.oid = con.confrelid
+        LEFT JOIN pg_attribute ra ON ra.attrelid = con.confrelid AND ra.attnum = k.ref_attnum
+        WHERE con.contype IN ('p', 'f') AND c.relnamespace = current_schema()::regnamespace
+          AND (con.contype = 'p' OR NOT rc.relispartition)
+        ORDER BY c.relname, k.position
+    """)).fetchall()
+
+    partition_keys = dict(session.execute(text("""
+        SELECT c.relname, a.attname
+        FROM pg_partitioned_table p
+        JOIN pg_class c ON c.oid = p.partrelid
+        JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0]
+        WHERE c.relnamespace = current_schema()::regnamespace
+    """)).fetchall())
+    partitions = {}
+    for parent, child, bound in session.execute(text("""
+        SELECT parent.relname, child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relkind = 'p' AND parent.relnamespace = current_schema()::regnamespace
+    """)).fetchall():
+        match = _RANGE_BOUND.match(bound or "")
+        if match:
+            start, end = (datetime.datetime.fromisoformat(v) for v in match.groups())
+            partitions.setdefault(parent, []).append(Partition(child, start, end))
+
+    tables = {}
+    for r in columns:
+        cols, pk, fks = tables.setdefault(r.table_name, ([], [], {}))
+        cols.append(Column(r.column_name, r.data_type, r.nullable, r.column_default, r.is_generated,
+                           r.character_maximum_length, r.sql_type))
+    for r in keys:
+        if r.table_name not in tables:
+            continue
+        _, pk, fks = tables[r.table_name]
+        if r.constraint_type == 'PRIMARY KEY':
+            pk.append(r.column_name)
+        else:
+            fks[r.column_name] = (r.ref_table, r.ref_column)
+    return {
+        name: Table(name, tuple(cols), tuple(pk), fks, partition_keys.get(name),
+                    tuple(sorted(partitions.get(name, []), key=lambda p: p.start)))
+        for name, (cols, pk, fks) in tables.items()
+    }
+
+
+def _refresh(session):
+    global _tables, _version, _checked_at
+    now = time.monotonic()
+    if _tables is not None and now - _checked_at < CATALOG_CHECK_INTERVAL:
+        note_cache("catalog", True)
+        return _tables
+    with _lock:
+        if _tables is not None and now - _checked_at < CATALOG_CHECK_INTERVAL:
+            note_cache("catalog", True)
+            return _tables
+        version = _schema_version(session)
+        stale = _tables is None or version is None or version != _version
+        if stale:
+            _tables = _load(session)
+            _version = version
+        note_cache("catalog", not stale)
+        _checked_at = time.monotonic()
+    return _tables
+
+
+def invalidate():
+    """Forget the cached metadata; the next lookup reloads it."""
+    global _tables
+    with _lock:
+        _tables = None
+
+
+def get_table(session, table_name):
+    """Metadata for `table_name`, or None if the table does not exist."""
+    return _refresh(session).get(table_name)
+
+
+def primary_key(session, table_name):
+    """
+    The single column that identifies a row of `table_name`, otherwise None.
+    Partitioned tables carry their partition key in the primary key too;
+    it is left out here, since the id alone is still unique.
+    """
+    table = get_table(session, table_name)
+    if table is None:
+        return None
+    key = [c for c in table.primary_key if c != table.partition_key]
+    return key[0] if len(key) == 1 else None
+
+
+def column_map(session, table_name):
+    """{column name: Column} for `table_name`."""
+    table = get_table(session, table_name)
+    return {c.name: c for c in table.columns} if table else {}
+
+
+def insertable_columns(session, table_name):
+    """Columns a user fills in: everything except identity, generated and serial columns."""
+    table = get_table(session, table_name)
+    if table is None:
+        return []
+    return [
+        c for c in table.columns
+        if not c.is_generated and not (c.default or "").startswith("nextval(")
+    ]
@@ -2,6 +2,14 @@
 import streamlit as st
 from modules.super_admin import dashboard
 from modules.flight_manager import flight_manager_dashboard
+from modules.kpi import kpi_dashboard
+from modules.audit_viewer import audit_viewer
+from modules.gate_conflicts import gate_conflicts_page
+from modules.seat_inventory import seats_page
+from modules.route_search import route_search_page
+from modules.flight_board import flight_board_page
+from modules.instrumentation import set_page, slow_queries_page
+from modules.profiler import section
 def load_dashboard(user):
     role_id = user['role_id']
     
@@ -10,15 +18,41 @@ def load_dashboard(user):
     st.write(f"Welcome, {user['full_name']}!")
     # st.write(f"Role ID: {role_id}")
 
-    # Here you will add role-specific dashboards, e.g.:
-    if role_id == 1:  # SuperAdmin (example)
-        st.write("Super Admin")
-        dashboard()
-        # call functions to show admin dashboard
-    elif role_id == 2:  # Manager
-        st.write("Flight Manager")
-        flight_manager_dashboard()
-        # pilot_dashboard(user)
+    pages = ["🗂️ Tables", "📈 KPIs", "🛫 Gate conflicts", "💺 Seats", "🧭 Routes", "🛬 Flight board"] + (["🧾 Audit log", "🐢 Slow queries"] if role_id == 1 else [])
+    page = st.sidebar.radio("Page", pages) if role_id in (1, 2) else None
+    set_page(page or "🗂️ Tables")
+    with section(page or "🗂️ Tables"):
+        if page == "📈 KPIs":
+            kpi_dashboard()
+            return
+        if page == "🛫 Gate conflicts":
+            gate_conflicts_page()
+            return
+        if page == "💺 Seats":
+            seats_page()
+            return
+        if page == "🧭 Routes":
+            route_search_page()
+            return
+        if page == "🛬 Flight board":
+            flight_board_page()
+            return
+        if page == "🧾 Audit log":
+            audit_viewer()
+            return
+        if page == "🐢 Slow queries":
+            slow_queries_page()
+            return
 
-    else:
-        st.write("Role dashboard not implemented yet.")
+        # Here you will add role-specific dashboards, e.g.:
+        if role_id == 1:  # SuperAdmin (example)
+            st.write("Super Admin")
+            dashboard()
+            # call functions to show admin dashboard
+        elif role_id == 2:  # Manager
+            st.write("Flight Manager")
+            flight_manager_dashboard()
+            # pilot_dashboard(user)
+
+        else:
+            st.write("Role dashboard not implemented yet.")
@@ -0,0 +1,228 @@
+# modules/export.py
+import csv
+import os
+import tempfile
+import time
+import uuid
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+import xlsxwriter
+from modules.table_browser import approximate_row_count, check_identifier
+
+# Exports are built only when requested: rows stream from a server-side
+# cursor in EXPORT_CHUNK_ROWS batches straight into a temporary file, so
+# memory stays flat no matter how big the table is.
+EXPORT_MAX_ROWS = int(os.environ.get("EXPORT_MAX_ROWS", "1000000"))
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", "10000"))
+EXPORT_DIR = os.environ.get("EXPORT_DIR", tempfile.gettempdir())
+# a prepared export is kept until the tab prepares another one; files left
+# behind by closed tabs are removed once they are this old
+EXPORT_MAX_AGE_HOURS = float(os.environ.get("EXPORT_MAX_AGE_HOURS", "6"))
+
+# every export file name starts with this, so the sweep touches nothing else in EXPORT_DIR
+EXPORT_PREFIX = "airport-export-"
+
+# Excel sheets stop at 1,048,576 rows, one of which is the header
+EXCEL_MAX_ROWS = 1048575
+
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+# PostgreSQL type OID -> Arrow type, for a Parquet schema that does not
+# depend on what the first chunk happens to contain
+_ARROW_TYPES = {
+    16: pa.bool_(),
+    20: pa.int64(), 21: pa.int64(), 23: pa.int64(),
+    700: pa.float64(), 701: pa.float64(),
+    1082: pa.date32(),
+    1114: pa.timestamp("us"),
+    1184: pa.timestamp("us", tz="UTC"),
+}
+
+
+def iter_chunks(session, table_name, pk_column, max_rows, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Yields (description, rows) batches of `table_name` in primary-key order
+    from a named (server-side) cursor on the session's connection.
+    """
+    check_identifier(table_name)
+    check_identifier(pk_column)
+    cursor = session.connection().connection.cursor(name=f"export_{uuid.uuid4().hex}")
+    try:
+        cursor.itersize = chunk_rows
+        cursor.execute(f"SELECT * FROM {table_name} ORDER BY {pk_column} LIMIT %s", (max_rows,))
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield cursor.description, rows
+    finally:
+        cursor.close()
+
+
+def _arrow_type(column):
+    if column.type_code == 1700 and column.precision:
+        return pa.decimal128(column.precision, column.scale or 0)
+    return _ARROW_TYPES.get(column.type_code, pa.string())
+
+
+def _arrow_column(values, arrow_type):
+    if arrow_type == pa.string():
+        values = [None if v is None else str(v) for v in values]
+    return pa.array(values, type=arrow_type)
+
+
+def write_csv(path, chunks, progress):
+    rows_written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        for description, rows in chunks:
+            if rows_written == 0:
+                writer.writerow([c.name for c in description])
+            writer.writerows(rows)
+            rows_written += len(rows)
+            progress(rows_written)
+    return rows_written
+
+
+def write_parquet(path, chunks, progress):
+    rows_written = 0
+    writer = None
+    try:
+        for description, rows in chunks:
+            if writer is None:
+                schema = pa.schema([(c.name, _arrow_type(c)) for c in description])
+                writer = pq.ParquetWriter(path, schema)
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [_arrow_column(values, field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            rows_written += len(rows)
+            progress(rows_written)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        open(path, "wb").close()
+    return rows_written
+
+
+def write_excel(path, chunks, progress):
+    # constant_memory flushes each row to disk as soon as the next one starts
+    workbook = xlsxwriter.Workbook(path, {
+        "constant_memory": True,
+        "default_date_format": "yyyy-mm-dd hh:mm:ss",
+        "remove_timezone": True,
+    })
+    worksheet = workbook.add_worksheet("Data")
+    rows_written = 0
+    try:
+        for description, rows in chunks:
+            if rows_written == 0:
+                worksheet.write_row(0, 0, [c.name for c in description])
+            for row in rows:
+                rows_written += 1
+                worksheet.write_row(rows_written, 0, row)
+            progress(rows_written)
+    finally:
+        workbook.close()
+    return rows_written
+
+
+WRITERS = {"CSV": write_csv, "Parquet": write_parquet, "Excel": write_excel}
+
+
+def sweep_exports(max_age_hours=EXPORT_MAX_AGE_HOURS):
+    """Removes export files older than `max_age_hours`; returns how many."""
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    for entry in os.scandir(EXPORT_DIR):
+        if not entry.name.startswith(EXPORT_PREFIX):
+            continue
+        try:
+            if entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass  # removed by another session's sweep
+    return removed
+
+
+def export_table(session, table_name, pk_column, fmt, max_rows=EXPORT_MAX_ROWS, progress=lambda rows: None):
+    """
+    Streams up to `max_rows` rows of `table_name` into a temporary file.
+    Returns (path, rows_written, seconds).
+    """
+    if fmt == "Excel":
+        max_rows = min(max_rows, EXCEL_MAX_ROWS)
+    extension, _ = FORMATS[fmt]
+    sweep_exports()
+    fd, path = tempfile.mkstemp(prefix=f"{EXPORT_PREFIX}{table_name}_", suffix=f".{extension}", dir=EXPORT_DIR)
+    os.close(fd)
+    start = time.perf_counter()
+    try:
+        rows_written = WRITERS[fmt](path, iter_chunks(session, table_name, pk_column, max_rows), progress)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, rows_written, time.perf_counter() - start
+
+
+def _reader(path):
+    """The file's contents, read when the download is clicked rather than on every rerun."""
+    def read():
+        with open(path, "rb") as f:
+            return f.read()
+    return read
+
+
+def _discard_export():
+    previous = st.session_state.pop("export_file", None)
+    if previous and os.path.exists(previous["path"]):
+        os.remove(previous["path"])
+
+
+def export_panel(session, table_name, pk_column):
+    """Export controls; nothing is read from the table until "Prepare export" is clicked."""
+    export = st.session_state.get("export_file")
+    if export and export["table"] != table_name:
+        _discard_export()
+
+    with st.expander("📤 Export"):
+        estimate = approximate_row_count(session, table_name)
+        col1, col2 = st.columns(2)
+        fmt = col1.selectbox("Format", list(FORMATS), key="export_format")
+        max_rows = col2.number_input(
+            "Max rows", min_value=1, max_value=EXPORT_MAX_ROWS,
+            value=max(1, min(estimate, EXPORT_MAX_ROWS)), step=1000
+        )
+        if estimate > EXPORT_MAX_ROWS:
+            st.caption(f"~{estimate:,} rows; exports are capped at {EXPORT_MAX_ROWS:,}.")
+
+        if st.button("Prepare export"):
+            _discard_export()
+            target = min(int(max_rows), EXCEL_MAX_ROWS if fmt == "Excel" else int(max_rows))
+            bar = st.progress(0.0, text="Exporting…")
+
+            def report(rows):
+                bar.progress(min(rows / max(target, 1), 1.0), text=f"Exported {rows:,} of ~{target:,} rows")
+
+            try:
+                path, rows, seconds = export_table(session, table_name, pk_column, fmt, int(max_rows), report)
+            except Exception as e:
+                session.rollback()
+                st.error(f"❌ Export failed: {e}")
+                return
+            st.session_state["export_file"] = {"path": path, "table": table_name, "format": fmt}
+            st.success(f"✅ {rows:,} rows in {seconds:.1f}s ({rows / max(seconds, 1e-6):,.0f} rows/sec)")
+
+        export = st.session_state.get("export_file")
+        if export and export["table"] == table_name and os.path.exists(export["path"]):
+            extension, mime = FORMATS[export["format"]]
+            st.download_button(f"⬇️ Download {table_name}.{extension}", data=_reader(export["path"]),
+                               file_name=f"{table_name}.{extension}", mime=mime, on_click="ignore")
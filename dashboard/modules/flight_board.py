@@ -0,0 +1,287 @@
+# modules/flight_board.py
+import datetime
+import logging
+import os
+import select
+import threading
+import time
+from collections import deque
+import pandas as pd
+import psycopg2
+import streamlit as st
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from config.db_config import DB_HOST, DB_NAME, DB_PASSWORD, DB_PORT, DB_USER, get_session
+from modules.reference_data import reference
+
+# Departures and arrivals boards per airport and terminal. Each process holds
+# the schedules departing in a sliding window around now (BoardFeed), loaded
+# once and then kept current from NOTIFY flight_board (migrations/0013),
+# which names the schedules or flights every write touched; only those rows
+# are read again. Boards are drawn from memory by a fragment that reruns on
+# its own every BOARD_REFRESH seconds, so the database sees the same few
+# queries however many boards are open.
+BOARD_REFRESH = float(os.environ.get("BOARD_REFRESH", "5"))
+BOARD_ROWS = int(os.environ.get("BOARD_ROWS", "20"))
+# departures held: far enough back for every flight still in the air, and ahead
+BOARD_BEHIND_HOURS = float(os.environ.get("BOARD_BEHIND_HOURS", "14"))
+BOARD_AHEAD_HOURS = float(os.environ.get("BOARD_AHEAD_HOURS", "12"))
+# departed and landed flights stay on the board this long
+BOARD_RECENT_MINUTES = float(os.environ.get("BOARD_RECENT_MINUTES", "30"))
+# replay a past day, e.g. "2025-01-14 06:00": the board clock starts there
+# when the process starts and runs in real time
+BOARD_REPLAY_FROM = os.environ.get("BOARD_REPLAY_FROM", "")
+
+CHANNEL = "flight_board"
+RECONNECT_DELAY = 5.0
+# how long the first board waits for the window to load
+LOAD_TIMEOUT = 30.0
+# the window is extended this much at a time
+SLIDE_STEP = datetime.timedelta(hours=1)
+# changes remembered for boards catching up; a board further behind is redrawn whole
+CHANGE_LOG = 200
+
+BOARD_QUERY = """
+    SELECT s.schedule_id, s.flight_id, f.flight_number, f.origin_airport_id, f.destination_airport_id,
+           s.departure_time, s.arrival_time, s.gate_id, f.status_id
+    FROM flight_schedules s
+    JOIN flights f ON f.flight_id = s.flight_id
+    WHERE s.departure_time >= :start AND s.departure_time < :end
+"""
+
+_log = logging.getLogger(__name__)
+_started = time.time()
+
+
+def board_now():
+    """The board clock: now, or the replayed moment."""
+    if BOARD_REPLAY_FROM:
+        return (datetime.datetime.fromisoformat(BOARD_REPLAY_FROM)
+                + datetime.timedelta(seconds=time.time() - _started))
+    return datetime.datetime.now()
+
+
+class BoardFeed:
+    """The schedules departing in the window, kept current by a listener thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.frame = None  # indexed by schedule_id
+        self.start = self.end = None
+        self.version = 0
+        self.changes = deque(maxlen=CHANGE_LOG)  # (version, changed schedule ids; None for a reload)
+        self.queries = 0
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="flight-board", daemon=True)
+
+    def snapshot(self):
+        """(frame, version); the frame is replaced, never changed, so it can be read without the lock."""
+        with self.lock:
+            return self.frame, self.version
+
+    def changed_since(self, version):
+        """Schedule ids changed after `version`, or None when that is too far back to tell."""
+        with self.lock:
+            newer = [ids for v, ids in self.changes if v > version]
+            if len(newer) < self.version - version or any(ids is None for ids in newer):
+                return None
+            return set().union(*newer)
+
+    def _read(self, condition="", **params):
+        with get_session() as session:
+            frame = pd.read_sql(text(BOARD_QUERY + condition), session.connection(), params=params)
+        self.queries += 1
+        return frame.set_index("schedule_id")
+
+    def _publish(self, frame, changed):
+        with self.lock:
+            self.frame = frame.sort_values("departure_time")
+            self.version += 1
+            self.changes.append((self.version, changed))
+
+    def _reload(self):
+        now = board_now()
+        start = now - datetime.timedelta(hours=BOARD_BEHIND_HOURS)
+        end = now + datetime.timedelta(hours=BOARD_AHEAD_HOURS) + SLIDE_STEP
+        frame = self._read(start=start, end=end)
+        self.start, self.end = start, end
+        self._publish(frame, None)
+
+    def _slide(self):
+        """Moves the window along with the clock, reading only the hour that enters it."""
+        now = board_now()
+        if now + datetime.timedelta(hours=BOARD_AHEAD_HOURS) < self.end:
+            return
+        start = now - datetime.timedelta(hours=BOARD_BEHIND_HOURS)
+        if start >= self.end:
+            return self._reload()
+        end = now + datetime.timedelta(hours=BOARD_AHEAD_HOURS) + SLIDE_STEP
+        entering = self._read(start=self.end, end=end)
+        frame = self.frame
+        leaving = frame.index[frame["departure_time"] < start]
+        self.start, self.end = start, end
+        self._publish(pd.concat([frame.drop(index=leaving), entering]), set(leaving) | set(entering.index))
+
+    def _apply(self, payloads):
+        """Re-reads the schedules and flights named in NOTIFY payloads ('s:1,2', 'f:7', 's:*')."""
+        schedules, flights = set(), set()
+        for payload in payloads:
+            kind, _, ids = payload.partition(":")
+            if ids == "*":
+                return self._reload()
+            (flights if kind == "f" else schedules).update(int(i) for i in ids.split(","))
+        rows = self._read("AND (s.schedule_id = ANY(:schedules) OR s.flight_id = ANY(:flights))",
+                          start=self.start, end=self.end, schedules=sorted(schedules), flights=sorted(flights))
+        frame = self.frame
+        # rows gone from the result were deleted or moved out of the window
+        stale = frame.index[frame.index.isin(schedules) | frame["flight_id"].isin(flights)]
+        kept = frame.drop(index=stale)
+        self._publish(pd.concat([kept, rows]) if len(rows) else kept, set(stale) | set(rows.index))
+
+    def _run(self):
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST,
+                                        port=DB_PORT, client_encoding="utf8", application_name="flight-board")
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {CHANNEL}")
+                # anything may have changed while we were not listening
+                self._reload()
+                self.ready.set()
+                while True:
+                    if select.select([conn], [], [], BOARD_REFRESH)[0]:
+                        conn.poll()
+                        payloads = [n.payload for n in conn.notifies]
+                        conn.notifies.clear()
+                        if payloads:
+                            self._apply(payloads)
+                    self._slide()
+            except (psycopg2.Error, SQLAlchemyError, OSError) as e:
+                _log.warning("flight board feed disconnected, reconnecting: %s", e)
+                time.sleep(RECONNECT_DELAY)
+            except Exception:
+                # e.g. a payload or row it cannot handle: the thread must not die
+                # and leave every board frozen, so start over with a full reload
+                _log.exception("flight board feed failed, reloading")
+                time.sleep(RECONNECT_DELAY)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def board_feed():
+    """The process-wide BoardFeed, started on first use."""
+    global _feed
+    if _feed is None:
+        with _feed_lock:
+            if _feed is None:
+                feed = BoardFeed()
+                feed.thread.start()
+                feed.ready.wait(LOAD_TIMEOUT)
+                _feed = feed
+    return _feed
+
+
+def board_rows(frame, kind, airport_id, terminal_id=None, now=None, rows=BOARD_ROWS):
+    """
+    The next `rows` departures from (kind "departures") or arrivals at
+    `airport_id`, with recently departed or landed ones, from the window.
+    Departures can be narrowed to the gates of one terminal.
+    """
+    now = now or board_now()
+    recent = now - datetime.timedelta(minutes=BOARD_RECENT_MINUTES)
+    if kind == "departures":
+        picked = frame[(frame["origin_airport_id"] == airport_id) & (frame["departure_time"] >= recent)]
+        if terminal_id:
+            terminals = reference(None, "gates").values("terminal_id", picked["gate_id"])
+            picked = picked[terminals == terminal_id]
+        return picked.sort_values("departure_time").head(rows)
+    picked = frame[(frame["destination_airport_id"] == airport_id) & (frame["arrival_time"] >= recent)]
+    return picked.sort_values("arrival_time").head(rows)
+
+
+def board_table(rows, kind, now=None):
+    """Board rows as displayed: time, flight, the other airport, gate and status."""
+    now = now or board_now()
+    departures = kind == "departures"
+    time_column = "departure_time" if departures else "arrival_time"
+    other = rows["destination_airport_id" if departures else "origin_airport_id"]
+    # statuses are per flight, not per schedule: a Delayed or Cancelled flight
+    # is shown as such, otherwise the board clock says whether it has gone
+    status = rows["status_id"].map(reference(None, "flight_statuses").labels)
+    status = status.where(status.isin(["Delayed", "Cancelled"]), "Scheduled")
+    passed = (rows[time_column] <= now) & (status != "Cancelled")
+    status = status.mask(passed, "Departed" if departures else "Landed")
+    table = pd.DataFrame({
+        "Time": rows[time_column].dt.strftime("%H:%M"),
+        "Flight": rows["flight_number"],
+        "To" if departures else "From": other.map(reference(None, "airports").labels),
+        "Status": status,
+    }, index=rows.index)
+    if departures:
+        # gate labels without the airport: "T1 1A"
+        table.insert(3, "Gate", rows["gate_id"].map(reference(None, "gates").labels).str.partition(" ")[2])
+    return table
+
+
+def flight_board_page():
+    # one pooled connection per rerun for the pickers; the board itself reads no database
+    with get_session() as session:
+        choice = _board_controls(session)
+    if choice is not None:
+        _board(*choice)
+
+
+def _board_controls(session):
+    st.subheader("🛬 Flight Board")
+    airports = reference(session, "airports")
+    codes = dict(zip(airports.ids.tolist(), airports.labels.tolist()))
+    if not codes:
+        st.info("Add airports first.")
+        return None
+    ids = sorted(codes, key=codes.get)
+    col1, col2, col3 = st.columns(3)
+    airport_id = col1.selectbox("Airport", ids, format_func=codes.get, key="board_airport")
+    terminals = reference(session, "terminals")
+    at_airport = terminals.ids[terminals.columns["airport_id"] == airport_id].tolist()
+    terminal_id = col2.selectbox("Terminal", [0] + at_airport, key="board_terminal",
+                                 format_func=lambda t: "All terminals" if t == 0 else terminals.row(t).terminal_code)
+    kind = col3.radio("Board", ["departures", "arrivals"], horizontal=True, format_func=str.title,
+                      key="board_kind")
+    if kind == "arrivals" and terminal_id:
+        st.caption("Arrivals have no gate, so they are shown for every terminal.")
+    return kind, airport_id, terminal_id
+
+
+@st.fragment(run_every=BOARD_REFRESH)
+def _board(kind, airport_id, terminal_id):
+    feed = board_feed()
+    frame, version = feed.snapshot()
+    if frame is None:
+        st.info("Connecting to the flight feed…")
+        return
+    now = board_now()
+    key = (kind, airport_id, terminal_id, now.replace(second=0, microsecond=0))
+    state = st.session_state.get("flight_board")
+    if state is not None and state["key"] == key and state["version"] == version:
+        # nothing changed since the last refresh: redraw the same table
+        table, changed = state["table"], set()
+    else:
+        changed = feed.changed_since(state["version"]) if state is not None else None
+        table = board_table(board_rows(frame, kind, airport_id, terminal_id or None, now), kind, now)
+        st.session_state["flight_board"] = {"key": key, "version": version, "table": table}
+    if table.empty:
+        st.info(f"No {kind} in the next {BOARD_AHEAD_HOURS:g} hours.")
+    else:
+        # rows changed since this board last refreshed are highlighted
+        highlight = changed or set()
+        st.dataframe(table.style.apply(
+            lambda row: ["background-color: #fff3b0" if row.name in highlight else ""] * len(row), axis=1),
+            use_container_width=True, hide_index=True)
+    st.caption(f"{now:%a %d %b %H:%M:%S} · {len(frame):,} schedules in memory · "
+               f"{feed.queries:,} feed queries in this process")
@@ -0,0 +1,230 @@
+# modules/gate_conflicts.py
+import datetime
+import heapq
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+from modules.utils import get_session
+from modules.writes import NULL, prepare_rows, update_rows, describe
+from modules.reference_data import decorate, reference
+
+# A schedule holds its gate for gate_block(departure_time) (migrations/0008),
+# stored as flight_schedules.gate_occupancy. The database refuses overlapping
+# blocks on one gate; these helpers report the overlaps already in the data
+# and suggest a conflict-free assignment.
+
+# no gate block is longer than this; bounds the range scans on departure_time
+MAX_BLOCK = datetime.timedelta(days=1)
+
+
+def gate_clashes(session, gate_id, departure_time, schedule_id=None):
+    """
+    Schedules that would overlap a block on `gate_id` departing at
+    `departure_time`: an index range scan on (gate_id, departure_time).
+    """
+    query = """
+        SELECT schedule_id, flight_id, departure_time,
+               lower(gate_occupancy) AS held_from, upper(gate_occupancy) AS held_until
+        FROM flight_schedules
+        WHERE gate_id = :gate_id
+          AND departure_time > :departure - :reach AND departure_time < :departure + :reach
+          AND gate_occupancy && gate_block(:departure)
+          AND schedule_id IS DISTINCT FROM :schedule_id
+        ORDER BY departure_time
+    """
+    params = {"gate_id": gate_id, "departure": departure_time, "reach": MAX_BLOCK, "schedule_id": schedule_id}
+    return pd.read_sql(text(query), session.connection(), params=params)
+
+
+def schedule_clash(session, values, schedule_id=None):
+    """
+    For a flight_schedules form: a message naming the schedules that the
+    gate block of `values` (gate_id, departure_time) would overlap, else None.
+    """
+    row = prepare_rows(session, "flight_schedules", [values])[0]
+    if row.get("gate_id") is None or row.get("departure_time") is None:
+        return None
+    clashes = gate_clashes(session, row["gate_id"], row["departure_time"], schedule_id)
+    if clashes.empty:
+        return None
+    held = ", ".join(f"{r.schedule_id} ({r.held_from:%Y-%m-%d %H:%M}–{r.held_until:%H:%M})"
+                     for r in clashes.itertuples(index=False))
+    return f"Gate {row['gate_id']} is already held by schedule {held}"
+
+
+def load_blocks(session, start, end, airport_id=None):
+    """
+    Gate blocks overlapping [start, end) for schedules departing from
+    `airport_id` (or every airport), including schedules without a gate.
+    """
+    params = {"start": start, "end": end, "reach": MAX_BLOCK}
+    where = ""
+    if airport_id:
+        where = "AND f.origin_airport_id = :airport_id"
+        params["airport_id"] = airport_id
+    query = f"""
+        SELECT s.schedule_id, s.flight_id, f.origin_airport_id AS airport_id, s.gate_id,
+               s.departure_time, lower(s.gate_occupancy) AS held_from, upper(s.gate_occupancy) AS held_until
+        FROM flight_schedules s
+        JOIN flights f ON f.flight_id = s.flight_id
+        WHERE s.departure_time >= :start - :reach AND s.departure_time < :end + :reach
+          AND s.gate_occupancy && tsrange(:start, :end)
+          {where}
+        ORDER BY s.gate_id, held_from
+    """
+    return pd.read_sql(text(query), session.connection(), params=params)
+
+
+def load_gates(session, airport_ids):
+    """{airport_id: [gate_id, ...]} for the given airports."""
+    gates = reference(session, "gates")
+    airport = reference(session, "terminals").values("airport_id", gates.columns["terminal_id"])
+    wanted = np.isin(airport, [int(a) for a in airport_ids])
+    by_airport = {}
+    for airport_id, gate_id in zip(airport[wanted].astype(np.int64).tolist(), gates.ids[wanted].tolist()):
+        by_airport.setdefault(airport_id, []).append(gate_id)
+    return by_airport
+
+
+def find_conflicts(blocks):
+    """
+    Every pair of overlapping blocks on the same gate, by a sweep over each
+    gate's blocks in start order with a heap of the ones still open:
+    O(n log n + conflicts). Returns a DataFrame, one row per pair.
+    """
+    pairs = []
+    open_blocks = []
+    current_gate = None
+    assigned = blocks.dropna(subset=["gate_id"]).sort_values(["gate_id", "held_from"])
+    for row in assigned.itertuples(index=False):
+        if row.gate_id != current_gate:
+            current_gate, open_blocks = row.gate_id, []
+        while open_blocks and open_blocks[0][0] <= row.held_from:
+            heapq.heappop(open_blocks)
+        for held_until, schedule_id, held_from in open_blocks:
+            pairs.append((int(row.gate_id), schedule_id, row.schedule_id,
+                          max(held_from, row.held_from), min(held_until, row.held_until)))
+        heapq.heappush(open_blocks, (row.held_until, row.schedule_id, row.held_from))
+    return pd.DataFrame(pairs, columns=["gate_id", "schedule_id", "clashes_with", "overlap_from", "overlap_until"])
+
+
+def suggest_gates(blocks, gates, movable_from=None, movable_until=None):
+    """
+    Greedy reassignment per airport: blocks are taken in start order; one
+    keeps its gate when that gate is free, otherwise it gets the gate that
+    has been free the longest. A free-time heap per airport makes this
+    O(n log gates). Blocks starting before `movable_from` (held since the day
+    before) or at or after `movable_until` stay where they are and only keep
+    their gates busy. Returns the moves as a DataFrame; new_gate_id is None
+    when every gate at the airport is busy (a remote stand).
+    """
+    moves = []
+    for airport_id, group in blocks.sort_values(["held_from", "schedule_id"]).groupby("airport_id", sort=False):
+        free_at = {gate_id: pd.Timestamp.min for gate_id in gates.get(airport_id, [])}
+        reserved_from = dict.fromkeys(free_at, pd.Timestamp.max)
+        if movable_from is not None:
+            pinned = group[group["held_from"] < movable_from].dropna(subset=["gate_id"])
+            for gate_id, held_until in pinned.groupby("gate_id")["held_until"].max().items():
+                if int(gate_id) in free_at:
+                    free_at[int(gate_id)] = held_until
+            group = group[group["held_from"] >= movable_from]
+        if movable_until is not None:
+            fixed = group[group["held_from"] >= movable_until].dropna(subset=["gate_id"])
+            for gate_id, held_from in fixed.groupby("gate_id")["held_from"].min().items():
+                reserved_from[int(gate_id)] = held_from
+            group = group[group["held_from"] < movable_until]
+        heap = [(t, gate_id) for gate_id, t in free_at.items()]
+        heapq.heapify(heap)
+
+        for row in group.itertuples(index=False):
+            old_gate = None if pd.isna(row.gate_id) else int(row.gate_id)
+            gate_id = old_gate
+            if gate_id not in free_at or free_at[gate_id] > row.held_from or reserved_from[gate_id] < row.held_until:
+                gate_id, skipped = None, []
+                while heap and heap[0][0] <= row.held_from:
+                    t, candidate = heapq.heappop(heap)
+                    if t != free_at[candidate]:
+                        continue  # stale entry, the gate was taken since
+                    skipped.append((t, candidate))
+                    if reserved_from[candidate] >= row.held_until:
+                        gate_id = candidate
+                        break
+                for entry in skipped:
+                    heapq.heappush(heap, entry)
+            if gate_id is not None:
+                free_at[gate_id] = row.held_until
+                heapq.heappush(heap, (row.held_until, gate_id))
+            # a block already on a remote stand that stays there is no move
+            if gate_id != old_gate:
+                moves.append((row.schedule_id, row.flight_id, airport_id, row.departure_time, old_gate, gate_id))
+    return pd.DataFrame(moves, columns=["schedule_id", "flight_id", "airport_id", "departure_time",
+                                        "gate_id", "new_gate_id"]).astype({"gate_id": "Int64", "new_gate_id": "Int64"})
+
+
+def apply_moves(session, moves, admin_id):
+    """
+    Move schedules to their suggested gates in one statement (checked as a
+    whole); those with no free gate go to a remote stand (gate_id NULL).
+    """
+    rows = [{"schedule_id": int(m.schedule_id),
+             "gate_id": NULL if pd.isna(m.new_gate_id) else int(m.new_gate_id)}
+            for m in moves.itertuples(index=False)]
+    return update_rows(session, "flight_schedules", "schedule_id", rows, admin_id)
+
+
+def airports(session):
+    return sorted(reference(session, "airports").rows(), key=lambda a: a.code)
+
+
+def gate_conflicts_page():
+    # one pooled connection per rerun, released when the page is rendered
+    with get_session() as session:
+        _gate_page(session)
+
+
+def _gate_page(session):
+    st.subheader("🛫 Gate Conflicts")
+
+    options = {0: "All airports"} | {a.airport_id: f"{a.code} · {a.name}" for a in airports(session)}
+    col1, col2 = st.columns(2)
+    day = col1.date_input("Day", datetime.date.today(), key="gate_day")
+    airport_id = col2.selectbox("Airport", list(options), format_func=options.get, key="gate_airport")
+    start = datetime.datetime.combine(day, datetime.time())
+    end = start + datetime.timedelta(days=1)
+
+    # the next day's blocks are loaded too, so moves cannot clash with them
+    blocks = load_blocks(session, start, end + MAX_BLOCK, airport_id or None)
+    today = blocks[blocks["held_from"] < end]
+    conflicts = find_conflicts(blocks)
+    conflicts = conflicts[conflicts["overlap_from"] < end]
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Schedules", f"{len(today):,}")
+    c2.metric("Conflicting pairs", f"{len(conflicts):,}")
+    c3.metric("Without a gate", f"{int(today['gate_id'].isna().sum()):,}")
+    if conflicts.empty:
+        st.success("✅ No gate is double-booked on this day.")
+    else:
+        st.dataframe(decorate(session, conflicts, columns={"gate_id": "gates"}), use_container_width=True)
+
+    if st.button("🧭 Suggest reassignments", disabled=today.empty):
+        gates = load_gates(session, blocks["airport_id"].unique())
+        st.session_state["gate_moves"] = ((day, airport_id), suggest_gates(blocks, gates, movable_from=start, movable_until=end))
+
+    key, moves = st.session_state.get("gate_moves", (None, None))
+    if moves is None or key != (day, airport_id):
+        return
+    if moves.empty:
+        st.info("Every schedule already has a free gate.")
+        return
+    unplaced = int(moves["new_gate_id"].isna().sum())
+    st.caption(f"{len(moves) - unplaced:,} schedules to move" + (f", {unplaced:,} to a remote stand (no free gate)" if unplaced else ""))
+    st.dataframe(decorate(session, moves, columns={"airport_id": "airports", "gate_id": "gates",
+                                                   "new_gate_id": "gates"}), use_container_width=True)
+    if st.button("✅ Apply moves"):
+        try:
+            result = apply_moves(session, moves, st.session_state.user['admin_id'])
+            st.success(describe(result, "Moved"))
+            del st.session_state["gate_moves"]
+        except Exception as e:
+            st.error(f"❌ Moves failed, nothing was changed: {e}")
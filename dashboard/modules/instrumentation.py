@@ -0,0 +1,309 @@
+# modules/instrumentation.py
+import contextvars
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+import numpy as np
+import pandas as pd
+import psycopg2.errors
+import psycopg2.extensions
+import streamlit as st
+from config.db_config import QUERY_STATS, get_connection
+from modules.profiler import note_query
+
+# Per-statement query statistics. Every pooled connection is created with
+# InstrumentedConnection (config/db_config.py), whose cursors time each
+# execute. Statements are grouped by their text with literals replaced by
+# "?", together with the dashboard page and the module function that ran
+# them. Latencies of the last QUERY_STATS_WINDOW runs per group give rolling
+# percentiles; the slowest run keeps its full SQL for EXPLAIN.
+QUERY_STATS_WINDOW = int(os.environ.get("QUERY_STATS_WINDOW", "1000"))
+# Written every QUERY_STATS_EXPORT_INTERVAL seconds when set: Prometheus text
+# format, or JSON when the name ends in .json
+QUERY_STATS_FILE = os.environ.get("QUERY_STATS_FILE", "")
+QUERY_STATS_EXPORT_INTERVAL = float(os.environ.get("QUERY_STATS_EXPORT_INTERVAL", "15"))
+
+SAMPLE_ROWS = 20  # rows fetched (and rewound) to estimate the bytes a result carries
+MODULES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|(?<![\w.])\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\((?:\?|NULL)(?:, ?(?:\?|NULL))*\)(?:, ?\((?:\?|NULL)(?:, ?(?:\?|NULL))*\))+|ARRAY\[[?, ]*\]")
+_SPACE = re.compile(r"\s+")
+# statements EXPLAIN may run (ANALYZE), by their first word; anything else is only planned
+_QUERY = re.compile(r"\s*\(*\s*(SELECT|WITH|VALUES|TABLE)\b", re.IGNORECASE)
+
+_page = contextvars.ContextVar("query_stats_page", default="background")
+_lock = threading.Lock()
+_stats = {}
+_exporter = None
+
+
+class _Stat:
+    __slots__ = ("statement", "page", "caller", "calls", "seconds", "max_seconds", "rows", "bytes_sent",
+                 "bytes_received", "latencies", "slowest_sql")
+
+    def __init__(self, statement, page, caller):
+        self.statement, self.page, self.caller = statement, page, caller
+        self.calls = self.rows = self.bytes_sent = self.bytes_received = 0
+        self.seconds = self.max_seconds = 0.0
+        self.latencies = deque(maxlen=QUERY_STATS_WINDOW)
+        self.slowest_sql = None
+
+
+def set_page(name):
+    """Labels the queries of the current rerun with the dashboard page being rendered."""
+    _page.set(name)
+
+
+def normalize(sql):
+    """Statement text with literals and value lists collapsed, so runs of one query group together."""
+    sql = _LITERALS.sub("?", _SPACE.sub(" ", sql).strip())
+    return _LISTS.sub("(...)", sql)
+
+
+def _caller():
+    """module.function of the innermost dashboard module frame, skipping this one."""
+    frame = sys._getframe(3)
+    while frame is not None:
+        path = frame.f_code.co_filename
+        if path.startswith(MODULES_DIR) and not path.endswith("instrumentation.py"):
+            return f"{os.path.basename(path)[:-3]}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "other"
+
+
+def _received(cursor):
+    """Approximate result size: the text length of a few sampled rows, scaled to the row count."""
+    if cursor.description is None or cursor.rowcount <= 0 or cursor.name is not None:
+        return 0
+    try:
+        sample = psycopg2.extensions.cursor.fetchmany(cursor, SAMPLE_ROWS)
+    except (psycopg2.Error, ValueError):
+        # a value the caller's typecasters would decode differently; leave the result to them
+        return 0
+    finally:
+        psycopg2.extensions.cursor.scroll(cursor, 0, mode="absolute")
+    size = sum(len(str(v)) for row in sample for v in (row.values() if isinstance(row, dict) else row)
+               if v is not None)
+    return size * cursor.rowcount // max(len(sample), 1)
+
+
+def record(template, sql, seconds, rows, bytes_sent, bytes_received):
+    statement = normalize(template)
+    key = (hashlib.sha1(statement.encode()).hexdigest()[:10], _page.get(), _caller())
+    with _lock:
+        stat = _stats.get(key)
+        if stat is None:
+            stat = _stats[key] = _Stat(statement, key[1], key[2])
+        stat.calls += 1
+        stat.seconds += seconds
+        stat.rows += max(rows, 0)
+        stat.bytes_sent += bytes_sent
+        stat.bytes_received += bytes_received
+        stat.latencies.append(seconds)
+        if seconds >= stat.max_seconds:
+            stat.max_seconds, stat.slowest_sql = seconds, sql
+    note_query(seconds)
+    _start_exporter()
+
+
+class _Timed:
+    """Mixin that records every execute of a psycopg2 cursor class."""
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._record(query, time.perf_counter() - start)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._record(query, time.perf_counter() - start)
+
+    def _record(self, query, seconds):
+        if isinstance(query, bytes):
+            query = query.decode(errors="replace")
+        sql = (self.query or b"").decode(errors="replace")
+        record(str(query), sql, seconds, self.rowcount, len(sql), _received(self))
+
+
+_timed_classes = {}
+
+
+def _timed(cursor_class):
+    if cursor_class not in _timed_classes:
+        _timed_classes[cursor_class] = type(f"Timed{cursor_class.__name__}", (_Timed, cursor_class), {})
+    return _timed_classes[cursor_class]
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """psycopg2 connection whose cursors, of whatever cursor_factory, are timed."""
+
+    def cursor(self, *args, **kwargs):
+        kwargs["cursor_factory"] = _timed(kwargs.get("cursor_factory") or self.cursor_factory
+                                          or psycopg2.extensions.cursor)
+        return super().cursor(*args, **kwargs)
+
+
+def snapshot():
+    """One row per statement group, slowest total time first."""
+    with _lock:
+        stats = [(key, s, np.array(s.latencies)) for key, s in _stats.items()]
+    rows = []
+    for (query_id, page, caller), s, lat in stats:
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99]) * 1000 if len(lat) else (0.0, 0.0, 0.0)
+        rows.append({
+            "query_id": query_id, "page": page, "caller": caller, "calls": s.calls,
+            "total_ms": s.seconds * 1000, "mean_ms": s.seconds * 1000 / s.calls,
+            "p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "max_ms": s.max_seconds * 1000,
+            "rows": s.rows, "bytes_sent": s.bytes_sent, "bytes_received": s.bytes_received,
+            "statement": s.statement,
+        })
+    columns = ["query_id", "page", "caller", "calls", "total_ms", "mean_ms", "p50_ms", "p95_ms", "p99_ms",
+               "max_ms", "rows", "bytes_sent", "bytes_received", "statement"]
+    return pd.DataFrame(rows, columns=columns).sort_values("total_ms", ascending=False, ignore_index=True)
+
+
+def slowest_sql(query_id, page, caller):
+    with _lock:
+        stat = _stats.get((query_id, page, caller))
+        return stat.slowest_sql if stat else None
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def prometheus_text(frame=None):
+    """The statistics in Prometheus text exposition format."""
+    frame = snapshot() if frame is None else frame
+    lines = [
+        "# HELP dashboard_query_duration_seconds Query latency over the last runs of each statement.",
+        "# TYPE dashboard_query_duration_seconds summary",
+    ]
+    counters = []
+    for r in frame.itertuples(index=False):
+        labels = f'query_id="{r.query_id}",page="{_label(r.page)}",caller="{_label(r.caller)}"'
+        for q, value in (("0.5", r.p50_ms), ("0.95", r.p95_ms), ("0.99", r.p99_ms)):
+            lines.append(f'dashboard_query_duration_seconds{{{labels},quantile="{q}"}} {value / 1000:.6f}')
+        lines.append(f"dashboard_query_duration_seconds_sum{{{labels}}} {r.total_ms / 1000:.6f}")
+        lines.append(f"dashboard_query_duration_seconds_count{{{labels}}} {r.calls}")
+        counters.append((labels, r))
+    for name, field, help_text in (("rows", "rows", "Rows returned or affected."),
+                                   ("bytes_sent", "bytes_sent", "Bytes of SQL sent."),
+                                   ("bytes_received", "bytes_received", "Estimated bytes of results received.")):
+        lines.append(f"# HELP dashboard_query_{name}_total {help_text}")
+        lines.append(f"# TYPE dashboard_query_{name}_total counter")
+        lines += [f"dashboard_query_{name}_total{{{labels}}} {getattr(r, field)}" for labels, r in counters]
+    return "\n".join(lines) + "\n"
+
+
+def json_text(frame=None):
+    frame = snapshot() if frame is None else frame
+    return json.dumps({"generated_at": time.time(), "statements": frame.to_dict(orient="records")}, indent=2)
+
+
+def export(path=None):
+    """Writes the statistics to `path` (default QUERY_STATS_FILE) atomically; returns the path."""
+    path = path or QUERY_STATS_FILE
+    body = json_text() if path.endswith(".json") else prometheus_text()
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        f.write(body)
+    os.replace(f"{path}.tmp", path)
+    return path
+
+
+def _export_loop():
+    while True:
+        time.sleep(QUERY_STATS_EXPORT_INTERVAL)
+        try:
+            export()
+        except OSError:
+            pass
+
+
+def _start_exporter():
+    global _exporter
+    if _exporter is None and QUERY_STATS_FILE:
+        with _lock:
+            if _exporter is None:
+                _exporter = threading.Thread(target=_export_loop, name="query-stats-export", daemon=True)
+                _exporter.start()
+
+
+def explain(sql):
+    """
+    The plan of `sql` as text, and whether it was run. Queries get EXPLAIN
+    (ANALYZE, BUFFERS) in a read-only transaction that is rolled back;
+    anything that writes, including a query that turns out to, gets a plain
+    EXPLAIN and is never executed.
+    """
+    with get_connection() as conn:
+        try:
+            with conn.cursor() as cursor:
+                if _QUERY.match(sql):
+                    try:
+                        cursor.execute("SET TRANSACTION READ ONLY")
+                        cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql)
+                        return "\n".join(r[0] for r in cursor.fetchall()), True
+                    except psycopg2.errors.ReadOnlySqlTransaction:
+                        conn.rollback()
+                cursor.execute("EXPLAIN " + sql)
+                return "\n".join(r[0] for r in cursor.fetchall()), False
+        finally:
+            conn.rollback()
+
+
+def slow_queries_page():
+    st.subheader("🐢 Slow Queries")
+    if not QUERY_STATS:
+        st.info("Query statistics are off; start the dashboard with QUERY_STATS=1.")
+        return
+
+    frame = snapshot()
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Statements", f"{len(frame):,}")
+    c2.metric("Queries", f"{int(frame['calls'].sum()):,}")
+    c3.metric("Time in queries", f"{frame['total_ms'].sum() / 1000:,.1f} s")
+    order = st.selectbox("Sort by", ["total_ms", "p95_ms", "p99_ms", "max_ms", "calls", "bytes_received"],
+                         key="slow_sort")
+    frame = frame.sort_values(order, ascending=False, ignore_index=True)
+    st.dataframe(frame.round(2), use_container_width=True, hide_index=True)
+
+    col1, col2, col3 = st.columns(3)
+    col1.download_button("⬇️ Prometheus", prometheus_text(frame), "query_stats.prom", "text/plain")
+    col2.download_button("⬇️ JSON", json_text(frame), "query_stats.json", "application/json")
+    if col3.button("🧹 Reset"):
+        reset()
+        st.rerun()
+    if frame.empty:
+        return
+
+    labels = {i: f"{r.query_id} · {r.page} · {r.caller} · p95 {r.p95_ms:.1f} ms"
+              for i, r in enumerate(frame.itertuples(index=False))}
+    chosen = frame.iloc[st.selectbox("Statement", list(labels), format_func=labels.get, key="slow_statement")]
+    sql = slowest_sql(chosen["query_id"], chosen["page"], chosen["caller"])
+    st.caption(f"Slowest run, {chosen['max_ms']:.1f} ms:")
+    st.code(sql or chosen["statement"], language="sql")
+    if sql and st.button("🔬 EXPLAIN"):
+        try:
+            plan, analyzed = explain(sql)
+            st.caption("EXPLAIN (ANALYZE, BUFFERS): the query ran in a read-only transaction that was rolled back."
+                       if analyzed else "EXPLAIN only: the statement writes, so it was planned but not run.")
+            st.code(plan)
+        except Exception as e:
+            st.error(f"❌ {e}")
@@ -0,0 +1,162 @@
+# modules/kpi.py
+import datetime
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+from modules.utils import get_session
+from modules.profiler import cache_data
+
+# The page reads only the materialized views from migrations/0003; they are
+# kept fresh by kpi_refresh.py. Cached results are keyed on the view's
+# last_refreshed_at, so a rerun hits the database again only after a refresh.
+
+
+def refresh_state(session):
+    """{view_name: (last_refreshed_at, dirty)} from kpi_refresh_state."""
+    rows = session.execute(text("SELECT view_name, last_refreshed_at, dirty FROM kpi_refresh_state")).fetchall()
+    return {r.view_name: (r.last_refreshed_at, r.dirty) for r in rows}
+
+
+@cache_data(show_spinner=False)
+def departure_range(_session, refreshed_at):
+    """(first, last) departure date in the load-factor view, or None when it is empty."""
+    row = _session.execute(text(
+        "SELECT min(departure_time)::date AS first, max(departure_time)::date AS last FROM mv_schedule_load_factor"
+    )).one()
+    return None if row.first is None else (row.first, row.last)
+
+
+@cache_data(show_spinner=False, max_entries=64)
+def load_factor(_session, refreshed_at, start, end, lowest, limit=50):
+    order = "ASC" if lowest else "DESC"
+    query = f"""
+        SELECT l.schedule_id, l.flight_number, l.departure_time,
+               o.code AS origin, d.code AS destination, l.aircraft_type,
+               l.booked_seats, l.seat_capacity, l.load_factor
+        FROM mv_schedule_load_factor l
+        JOIN airports o ON o.airport_id = l.origin_airport_id
+        JOIN airports d ON d.airport_id = l.destination_airport_id
+        WHERE l.departure_time >= :start AND l.departure_time < :end
+        ORDER BY l.load_factor {order} NULLS LAST, l.schedule_id
+        LIMIT :limit
+    """
+    return pd.read_sql(text(query), _session.connection(), params={"start": start, "end": end, "limit": limit})
+
+
+@cache_data(show_spinner=False, max_entries=64)
+def load_factor_summary(_session, refreshed_at, start, end):
+    query = """
+        SELECT COUNT(*) AS schedules,
+               SUM(booked_seats) AS booked_seats,
+               SUM(booked_seats)::numeric / NULLIF(SUM(seat_capacity), 0) AS load_factor
+        FROM mv_schedule_load_factor
+        WHERE departure_time >= :start AND departure_time < :end
+    """
+    return dict(_session.execute(text(query), {"start": start, "end": end}).mappings().one())
+
+
+@cache_data(show_spinner=False, max_entries=64)
+def route_revenue(_session, refreshed_at, start, end, limit=50):
+    query = """
+        SELECT o.code AS origin, d.code AS destination,
+               SUM(r.payments) AS payments, SUM(r.revenue) AS revenue
+        FROM mv_route_daily_revenue r
+        JOIN airports o ON o.airport_id = r.origin_airport_id
+        JOIN airports d ON d.airport_id = r.destination_airport_id
+        WHERE r.flight_date >= :start AND r.flight_date < :end
+        GROUP BY o.code, d.code
+        ORDER BY revenue DESC
+        LIMIT :limit
+    """
+    return pd.read_sql(text(query), _session.connection(), params={"start": start, "end": end, "limit": limit})
+
+
+@cache_data(show_spinner=False, max_entries=64)
+def daily_revenue(_session, refreshed_at, start, end):
+    query = """
+        SELECT flight_date, SUM(revenue) AS revenue
+        FROM mv_route_daily_revenue
+        WHERE flight_date >= :start AND flight_date < :end
+        GROUP BY flight_date
+        ORDER BY flight_date
+    """
+    return pd.read_sql(text(query), _session.connection(), params={"start": start, "end": end})
+
+
+@cache_data(show_spinner=False)
+def airport_punctuality(_session, refreshed_at):
+    query = """
+        SELECT code, name, departures, on_time, delayed, cancelled, on_time_rate, delay_rate
+        FROM mv_airport_punctuality
+        ORDER BY delay_rate DESC, departures DESC
+    """
+    return pd.read_sql(text(query), _session.connection())
+
+
+@cache_data(show_spinner=False)
+def payment_failures(_session, refreshed_at):
+    query = """
+        SELECT method_name, payments, failed, failure_rate, failed_amount
+        FROM mv_payment_method_failures
+        ORDER BY failure_rate DESC NULLS LAST
+    """
+    return pd.read_sql(text(query), _session.connection())
+
+
+def kpi_dashboard():
+    # one pooled connection per rerun, released when the page is rendered
+    with get_session() as session:
+        _kpi_page(session)
+
+
+def _kpi_page(session):
+    st.subheader("📈 Operational KPIs")
+
+    state = refresh_state(session)
+    if not state:
+        st.error("❌ KPI views are missing. Run `python migrate.py` first.")
+        return
+
+    oldest = min(refreshed for refreshed, _ in state.values())
+    pending = sorted(name for name, (_, dirty) in state.items() if dirty)
+    st.caption(f"Data as of {oldest:%Y-%m-%d %H:%M:%S}"
+               + (f" · refresh pending for {', '.join(pending)}" if pending else ""))
+
+    # the window starts out covering every departure in the views
+    default = departure_range(session, state["mv_schedule_load_factor"][0])
+    if default is None:
+        today = datetime.date.today()
+        default = (today - datetime.timedelta(days=30), today + datetime.timedelta(days=30))
+    window = st.date_input("Departure window", default)
+    if len(window) != 2:
+        return
+    start, end = window[0], window[1] + datetime.timedelta(days=1)
+
+    load_tab, revenue_tab, punctuality_tab, payments_tab = st.tabs(
+        ["✈️ Load factor", "💰 Route revenue", "⏱️ Punctuality", "💳 Failed payments"]
+    )
+
+    with load_tab:
+        refreshed_at = state["mv_schedule_load_factor"][0]
+        summary = load_factor_summary(session, refreshed_at, start, end)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Schedules", f"{summary['schedules']:,}")
+        col2.metric("Booked seats", f"{summary['booked_seats'] or 0:,}")
+        col3.metric("Load factor", f"{float(summary['load_factor'] or 0):.1%}")
+        lowest = st.radio("Show", ["Fullest", "Emptiest"], horizontal=True) == "Emptiest"
+        st.dataframe(load_factor(session, refreshed_at, start, end, lowest), use_container_width=True)
+
+    with revenue_tab:
+        refreshed_at = state["mv_route_daily_revenue"][0]
+        daily = daily_revenue(session, refreshed_at, start, end)
+        if not daily.empty:
+            st.line_chart(daily.set_index("flight_date")["revenue"])
+        st.dataframe(route_revenue(session, refreshed_at, start, end), use_container_width=True)
+
+    with punctuality_tab:
+        st.dataframe(airport_punctuality(session, state["mv_airport_punctuality"][0]), use_container_width=True)
+
+    with payments_tab:
+        df = payment_failures(session, state["mv_payment_method_failures"][0])
+        st.bar_chart(df.set_index("method_name")["failure_rate"])
+        st.dataframe(df, use_container_width=True)
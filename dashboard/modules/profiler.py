@@ -0,0 +1,207 @@
+# modules/profiler.py
+import contextvars
+import functools
+import json
+import os
+import re
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+import altair as alt
+import pandas as pd
+import streamlit as st
+
+# Rerun profiling. Streamlit runs the whole script again on every widget
+# change; with PROFILE_RERUNS=1 each rerun is traced as a tree of named
+# sections (pages, panels, widgets) with their wall time, the queries they
+# ran (reported by modules/instrumentation.py, so QUERY_STATS must stay on)
+# and the cache hits and misses seen inside them. The last rerun is drawn in
+# the sidebar, and every trace is written to PROFILE_DIR in Chrome trace
+# format (chrome://tracing, Perfetto, speedscope) for
+# benchmarks/compare_profiles.py.
+PROFILE_RERUNS = os.environ.get("PROFILE_RERUNS", "0") == "1"
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "20"))  # reruns kept per session for the sidebar
+
+_span = contextvars.ContextVar("profile_span", default=None)
+_WIDGET_VALUE = (str, int, float, bool, type(None))
+
+
+class Span:
+    __slots__ = ("name", "start", "seconds", "queries", "query_seconds", "hits", "misses", "children")
+
+    def __init__(self, name, start):
+        self.name, self.start, self.seconds = name, start, 0.0
+        self.queries, self.query_seconds = 0, 0.0
+        self.hits, self.misses = {}, {}
+        self.children = []
+
+    def walk(self, path=(), depth=0):
+        """(path, depth, span) for this span and everything under it, depth first."""
+        path = path + (self.name,)
+        yield path, depth, self
+        for child in self.children:
+            yield from child.walk(path, depth + 1)
+
+
+@contextmanager
+def section(name):
+    """Times the block as a child of the current section; does nothing outside a profiled rerun."""
+    parent = _span.get()
+    if parent is None:
+        yield None
+        return
+    span = Span(name, time.perf_counter())
+    parent.children.append(span)
+    token = _span.set(span)
+    try:
+        yield span
+    finally:
+        span.seconds = time.perf_counter() - span.start
+        _span.reset(token)
+
+
+def note_query(seconds):
+    """Charges one query to the innermost open section."""
+    span = _span.get()
+    if span is not None:
+        span.queries += 1
+        span.query_seconds += seconds
+
+
+def note_cache(name, hit):
+    """Counts a lookup of cache `name` in the innermost open section."""
+    span = _span.get()
+    if span is not None:
+        counts = span.hits if hit else span.misses
+        counts[name] = counts.get(name, 0) + 1
+
+
+def cache_data(**kwargs):
+    """st.cache_data that also reports its hits and misses to the profiler."""
+    def decorate(fn):
+        if not PROFILE_RERUNS:
+            return st.cache_data(**kwargs)(fn)
+        name = f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+        # only runs on a miss; keeps fn's name and source, which st.cache_data keys on
+        @functools.wraps(fn)
+        def compute(*args, **kw):
+            note_cache(name, False)
+            return fn(*args, **kw)
+
+        cached = st.cache_data(**kwargs)(compute)
+
+        @functools.wraps(fn)
+        def lookup(*args, **kw):
+            span = _span.get()
+            misses = span.misses.get(name, 0) if span is not None else 0
+            result = cached(*args, **kw)
+            if span is not None and span.misses.get(name, 0) == misses:
+                note_cache(name, True)
+            return result
+
+        lookup.clear = cached.clear
+        return lookup
+    return decorate
+
+
+def _trigger():
+    """Keyed widgets whose value changed since the previous rerun of this session."""
+    values = {k: v for k, v in st.session_state.items()
+              if isinstance(v, _WIDGET_VALUE) and not str(k).startswith("profile_")}
+    before = st.session_state.get("profile_widgets")
+    st.session_state["profile_widgets"] = values
+    if before is None:
+        return "first run"
+    changed = sorted(str(k) for k in values.keys() & before.keys() if values[k] != before[k])
+    return ", ".join(changed) or "button or unkeyed widget"
+
+
+@contextmanager
+def profiled_rerun(name="rerun"):
+    """Traces the rerun run inside the block; yields its root Span (None when profiling is off)."""
+    if not PROFILE_RERUNS:
+        yield None
+        return
+    root = Span(name, time.perf_counter())
+    trigger = _trigger()
+    token = _span.set(root)
+    try:
+        yield root
+    finally:
+        root.seconds = time.perf_counter() - root.start
+        _span.reset(token)
+        runs = st.session_state.setdefault("profile_runs", deque(maxlen=PROFILE_KEEP))
+        runs.append((time.strftime("%H:%M:%S"), trigger, root))
+        try:
+            dump(root, trigger)
+        except OSError:
+            pass
+
+
+def breakdown(root):
+    """One row per section: total and self time, queries and cache counts."""
+    rows = []
+    for path, depth, span in root.walk():
+        child_seconds = sum(c.seconds for c in span.children)
+        rows.append({
+            "section": "  " * depth + span.name, "path": " / ".join(path), "depth": depth,
+            "start_ms": (span.start - root.start) * 1000, "total_ms": span.seconds * 1000,
+            "self_ms": (span.seconds - child_seconds) * 1000,
+            "queries": span.queries, "query_ms": span.query_seconds * 1000,
+            "cache_hits": sum(span.hits.values()), "cache_misses": sum(span.misses.values()),
+        })
+    return pd.DataFrame(rows)
+
+
+def trace_events(root, trigger=""):
+    """The span tree as Chrome trace "complete" events, times in microseconds."""
+    events = []
+    for path, depth, span in root.walk():
+        events.append({
+            "name": span.name, "ph": "X", "pid": 1, "tid": 1,
+            "ts": round((span.start - root.start) * 1e6), "dur": round(span.seconds * 1e6),
+            "args": {"path": " / ".join(path), "queries": span.queries,
+                     "query_ms": round(span.query_seconds * 1000, 3),
+                     "cache_hits": span.hits, "cache_misses": span.misses},
+        })
+    return {"traceEvents": events, "otherData": {"trigger": trigger, "recorded_at": time.time()}}
+
+
+def dump(root, trigger=""):
+    """Writes the trace to PROFILE_DIR/<session>/<sequence>-<name>.json; returns the path."""
+    session = st.session_state.setdefault("profile_session", uuid.uuid4().hex[:8])
+    sequence = st.session_state["profile_sequence"] = st.session_state.get("profile_sequence", 0) + 1
+    label = re.sub(r"\W+", "_", root.children[-1].name if root.children else root.name).strip("_")
+    folder = os.path.join(PROFILE_DIR, session)
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{sequence:05d}-{label or 'rerun'}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(trace_events(root, trigger), f)
+    return path
+
+
+def profile_sidebar():
+    """Flame chart and table of the last profiled reruns, in the sidebar."""
+    runs = st.session_state.get("profile_runs")
+    if not PROFILE_RERUNS or not runs:
+        return
+    with st.sidebar.expander("⏱️ Rerun profile", expanded=True):
+        labels = {i: f"{at} · {root.seconds * 1000:,.0f} ms · {trigger}"
+                  for i, (at, trigger, root) in enumerate(runs)}
+        chosen = st.selectbox("Rerun", list(reversed(list(labels))), format_func=labels.get)
+        frame = breakdown(runs[chosen][2])
+        frame["end_ms"] = frame["start_ms"] + frame["total_ms"]
+        chart = alt.Chart(frame).mark_bar(stroke="white").encode(
+            x=alt.X("start_ms:Q", title="ms"), x2="end_ms:Q",
+            y=alt.Y("depth:O", title=None, axis=None),
+            color=alt.Color("self_ms:Q", scale=alt.Scale(scheme="orangered"), legend=None),
+            tooltip=["path", alt.Tooltip("total_ms:Q", format=",.1f"), alt.Tooltip("self_ms:Q", format=",.1f"),
+                     "queries", alt.Tooltip("query_ms:Q", format=",.1f"), "cache_hits", "cache_misses"],
+        ).properties(height=22 * (frame["depth"].max() + 1))
+        st.altair_chart(chart, use_container_width=True)
+        st.dataframe(frame[["section", "total_ms", "self_ms", "queries", "query_ms", "cache_hits", "cache_misses"]]
+                     .round(1), hide_index=True, use_container_width=True)
+        st.caption(f"Traces are written to `{os.path.abspath(PROFILE_DIR)}`.")
@@ -0,0 +1,176 @@
+# modules/reference_data.py
+import threading
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from config.db_config import get_session
+from modules import result_cache
+from modules.catalog import get_table
+from modules.profiler import note_cache
+
+# The small lookup tables, held in memory per process so that displayed ids
+# can be shown with their names without a join. Each table is loaded once,
+# column by column into arrays, and dropped when result_cache reports a
+# change to it (a write through the dashboard, or NOTIFY from the triggers
+# of migrations/0012); the next lookup loads it again.
+
+# table: (key column, column the label is made of)
+REFERENCE_TABLES = {
+    "airports": ("airport_id", "code"),
+    "terminals": ("terminal_id", "terminal_code"),
+    "gates": ("gate_id", "gate_code"),
+    "flight_statuses": ("status_id", "status_name"),
+    "booking_statuses": ("status_id", "status_name"),
+    "payment_methods": ("method_id", "method_name"),
+    "admin_roles": ("role_id", "role_name"),
+}
+# terminal and gate codes repeat across airports; their labels are prefixed
+# with their parent's label: "JFK T1", "JFK T1 1A"
+PARENTS = {"terminals": ("airport_id", "airports"), "gates": ("terminal_id", "terminals")}
+
+_lock = threading.Lock()
+_tables = {}
+_generations = dict.fromkeys(REFERENCE_TABLES, 0)
+_subscribed = False
+
+
+class Row:
+    """One row of a ReferenceTable; its columns are attributes."""
+
+    __slots__ = ("_table", "_at")
+
+    def __init__(self, table, at):
+        self._table, self._at = table, at
+
+    def __getattr__(self, name):
+        try:
+            value = self._table.columns[name][self._at]
+        except KeyError:
+            raise AttributeError(name) from None
+        # plain Python values, which psycopg2 can send as parameters
+        return value.item() if isinstance(value, np.generic) else value
+
+    def __repr__(self):
+        return f"Row({self._table.name}, {self._table.ids[self._at]})"
+
+
+class ReferenceTable:
+    """A lookup table as one array per column, with id -> row and label -> id maps."""
+
+    __slots__ = ("name", "key", "ids", "columns", "labels", "_positions", "_by_label")
+
+    def __init__(self, name, key, frame, labels):
+        self.name, self.key = name, key
+        self.columns = {c: frame[c].to_numpy() for c in frame.columns}
+        self.ids = self.columns[key]
+        # id -> label; the argument of Series.map when decorating
+        self.labels = pd.Series(labels, index=self.ids, name=name)
+        self._positions = dict(zip(self.ids.tolist(), range(len(self.ids))))
+        self._by_label = dict(zip(self.labels.tolist(), self.ids.tolist()))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row(self, id_):
+        """Row with key `id_`, or None."""
+        at = self._positions.get(id_)
+        return None if at is None else Row(self, at)
+
+    def rows(self):
+        return [Row(self, at) for at in range(len(self.ids))]
+
+    def label(self, id_):
+        at = self._positions.get(id_)
+        return None if at is None else self.labels.iat[at]
+
+    def id_for(self, label):
+        """Key of the row labelled `label` (e.g. an airport code), or None."""
+        return self._by_label.get(label)
+
+    def values(self, column, ids):
+        """`column` of the rows with the given keys, as an array; NaN for unknown keys."""
+        return pd.Series(self.columns[column], index=self.labels.index).reindex(ids).to_numpy()
+
+
+def _changed(table):
+    # table None: the change feed was interrupted, anything may have changed
+    with _lock:
+        for name in REFERENCE_TABLES:
+            if table is None or table in _lineage(name):
+                _tables.pop(name, None)
+                _generations[name] += 1
+
+
+def _lineage(name):
+    """`name` and the tables its labels are made from."""
+    names = [name]
+    while names[-1] in PARENTS:
+        names.append(PARENTS[names[-1]][1])
+    return names
+
+
+def _load(session, name):
+    key, label_column = REFERENCE_TABLES[name]
+    frame = pd.read_sql(text(f"SELECT * FROM {name} ORDER BY {key}"), session.connection())
+    labels = frame[label_column].astype(str)
+    if name in PARENTS:
+        column, parent = PARENTS[name]
+        prefix = pd.Series(reference(session, parent).labels.reindex(frame[column]).to_numpy(), index=frame.index)
+        labels = (prefix.fillna("?") + " " + labels).where(frame[column].notna(), labels)
+    return ReferenceTable(name, key, frame, labels.to_numpy())
+
+
+def reference(session, name):
+    """
+    The ReferenceTable `name`, loaded on first use and after every change to
+    it. With session None, a connection is checked out only to load it.
+    """
+    global _subscribed
+    table = _tables.get(name)
+    note_cache("reference_data", table is not None)
+    if table is not None:
+        return table
+    with _lock:
+        subscribe, _subscribed = not _subscribed, True
+    if subscribe:
+        # outside the lock: the listener's first clear() calls _changed
+        result_cache.on_change(_changed)
+    with _lock:
+        generation = _generations[name]
+    if session is None:
+        with get_session() as session:
+            table = _load(session, name)
+    else:
+        table = _load(session, name)
+    with _lock:
+        # a change that arrived while loading leaves the table to be loaded again
+        if _generations[name] == generation:
+            _tables[name] = table
+    return table
+
+
+def label_column(column, frame):
+    """Name of the label column shown next to id column `column`: gate_id -> gate."""
+    name = column[:-3] if column.endswith("_id") else f"{column}_label"
+    return name if name not in frame.columns else f"{column}_label"
+
+
+def decorate(session, frame, table_name=None, columns=None):
+    """
+    Copy of `frame` with a label column after each id column that refers to
+    a reference table: the foreign keys of `table_name` (from the catalog)
+    and `columns` ({column: reference table}). Each is one Series.map.
+    """
+    refs = {}
+    table = get_table(session, table_name) if table_name else None
+    if table is not None:
+        refs.update({c: ref for c, (ref, _) in table.foreign_keys.items() if ref in REFERENCE_TABLES})
+    refs.update(columns or {})
+    refs = {c: ref for c, ref in refs.items() if c in frame.columns}
+    if not refs:
+        return frame
+    frame = frame.copy()
+    for column, ref in refs.items():
+        frame.insert(frame.columns.get_loc(column) + 1, label_column(column, frame),
+                     frame[column].map(reference(session, ref).labels))
+    return frame
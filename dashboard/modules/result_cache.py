@@ -0,0 +1,301 @@
+# modules/result_cache.py
+import hashlib
+import logging
+import os
+import pickle
+import select
+import stat
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+import pandas as pd
+import psycopg2
+from config.db_config import DB_HOST, DB_NAME, DB_PASSWORD, DB_PORT, DB_USER
+from modules.profiler import note_cache
+
+# Read-through cache of query results (DataFrames), keyed by the statement
+# text and its parameters. Each entry remembers the version of every table
+# it read; a write bumps the table's version, so the next read misses and
+# goes to the database. Versions are bumped by writes.py right after it
+# commits, and by NOTIFY table_changes from the triggers in migrations/0012,
+# which every process LISTENs for (writes from other processes and
+# scripts). RESULT_CACHE_TTL bounds how long an entry can live regardless.
+RESULT_CACHE = os.environ.get("RESULT_CACHE", "1") == "1"
+RESULT_CACHE_MB = float(os.environ.get("RESULT_CACHE_MB", "64"))
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", "600"))
+# memory: per process. file: pickles in RESULT_CACHE_DIR shared by every
+# process on the machine; point it at /dev/shm to keep them in shared memory.
+# The directory must belong to the dashboard's user and be closed to everyone
+# else (it is created 0700); the dashboard refuses to start otherwise, since
+# whoever can write to it can make the dashboard unpickle anything.
+RESULT_CACHE_BACKEND = os.environ.get("RESULT_CACHE_BACKEND", "memory")
+RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "airport-result-cache"))
+# small, rarely written tables whose browser pages are cached too
+RESULT_CACHE_TABLES = set(os.environ.get(
+    "RESULT_CACHE_TABLES",
+    "airports,terminals,gates,flight_statuses,booking_statuses,payment_methods,admin_roles").split(","))
+
+CHANNEL = "table_changes"
+RECONNECT_DELAY = 5.0
+# how long the first read waits for LISTEN to be in place
+LISTEN_TIMEOUT = 5.0
+
+
+class _MemoryStore:
+    """LRU of entries within the memory budget, with per-process table versions."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.entries = OrderedDict()  # key -> (entry, size)
+        self.size = 0
+        self.versions = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            found = self.entries.get(key)
+            if found is None:
+                return None
+            self.entries.move_to_end(key)
+            return found[0]
+
+    def put(self, key, entry, size):
+        evicted = 0
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+            if size > self.budget:
+                return 0
+            self.entries[key] = (entry, size)
+            self.size += size
+            while self.size > self.budget:
+                _, (_, dropped) = self.entries.popitem(last=False)
+                self.size -= dropped
+                evicted += 1
+        return evicted
+
+    def version(self, table):
+        return self.versions.get(table, 0)
+
+    def bump(self, table):
+        with self.lock:
+            self.versions[table] = self.versions.get(table, 0) + 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+            self.versions = {t: v + 1 for t, v in self.versions.items()}
+
+    def usage(self):
+        return len(self.entries), self.size
+
+
+def _private_dir(path):
+    """Creates `path` 0700, or checks that the existing one is ours and 0700."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(
+            f"{path} must be a directory owned by this user with mode 0700 "
+            f"(found owner {info.st_uid}, mode {stat.filemode(info.st_mode)})")
+
+
+class _FileStore:
+    """Entries and table versions as files, shared by every process using the directory."""
+
+    def __init__(self, directory, budget):
+        self.directory, self.budget = directory, budget
+        self.versions_dir = os.path.join(directory, "versions")
+        _private_dir(directory)
+        _private_dir(self.versions_dir)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def _write(self, path, data):
+        # written aside and renamed, so readers in other processes never see half a file
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+            os.utime(path)  # recency for the LRU sweep
+            return entry
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def put(self, key, entry, size):
+        data = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.budget:
+            return 0
+        self._write(self._path(key), data)
+        files = []
+        with os.scandir(self.directory) as it:
+            for e in it:
+                if e.name.endswith(".pkl"):
+                    try:
+                        stat = e.stat()
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, e.path))
+        total, evicted = sum(f[1] for f in files), 0
+        for _, size, path in sorted(files):
+            if total <= self.budget:
+                break
+            try:
+                os.remove(path)
+                evicted += 1
+            except OSError:
+                pass
+            total -= size
+        return evicted
+
+    def version(self, table):
+        try:
+            with open(os.path.join(self.versions_dir, table), encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return ""
+
+    def bump(self, table):
+        self._write(os.path.join(self.versions_dir, table), uuid.uuid4().hex.encode())
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def usage(self):
+        sizes = [e.stat().st_size for e in os.scandir(self.directory) if e.name.endswith(".pkl")]
+        return len(sizes), sum(sizes)
+
+
+_log = logging.getLogger(__name__)
+_store = (_FileStore(RESULT_CACHE_DIR, RESULT_CACHE_MB * 2**20) if RESULT_CACHE_BACKEND == "file"
+          else _MemoryStore(RESULT_CACHE_MB * 2**20))
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+_listener = None
+_listener_lock = threading.Lock()
+_listening = threading.Event()
+_callbacks = []
+
+
+def _count(name, n=1):
+    with _stats_lock:
+        _stats[name] += n
+
+
+def cache_key(sql, params):
+    """Statement text with whitespace collapsed, plus its parameters in name order."""
+    statement = " ".join(sql.split())
+    return hashlib.sha1(repr((statement, sorted((params or {}).items()))).encode()).hexdigest()
+
+
+def read_frame(session, sql, params=None, tables=()):
+    """
+    pd.read_sql of `sql`, served from the cache while none of `tables` (every
+    table the statement reads) has changed. Treat the result as read-only.
+    """
+    if not RESULT_CACHE or not tables:
+        return pd.read_sql(sql, session.connection(), params=params)
+    _start_listener()
+    key = cache_key(str(sql), params)
+    # versions are taken before reading: a write that commits meanwhile makes the entry stale at once
+    versions = tuple(_store.version(t) for t in tables)
+    entry = _store.get(key)
+    if entry is not None and entry[0] == versions and time.time() - entry[1] < RESULT_CACHE_TTL:
+        _count("hits")
+        note_cache("result_cache", True)
+        return entry[2]
+    _count("misses")
+    note_cache("result_cache", False)
+    frame = pd.read_sql(sql, session.connection(), params=params)
+    evicted = _store.put(key, (versions, time.time(), frame), int(frame.memory_usage(deep=True).sum()))
+    if evicted:
+        _count("evictions", evicted)
+    return frame
+
+
+def invalidate(table):
+    """Marks every cached result that read `table` as stale."""
+    _store.bump(table)
+    _count("invalidations")
+    for callback in _callbacks:
+        callback(table)
+
+
+def clear():
+    _store.clear()
+    for callback in _callbacks:
+        callback(None)
+
+
+def on_change(callback):
+    """
+    Calls callback(table) whenever `table` is invalidated, and callback(None)
+    when anything may have changed (the cache was cleared). Starts listening
+    for notifications, if not yet started.
+    """
+    _callbacks.append(callback)
+    _start_listener()
+
+
+def cache_stats():
+    """Hit/miss/eviction/invalidation counts and the entries and bytes held."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["entries"], stats["bytes"] = _store.usage()
+    stats["backend"] = RESULT_CACHE_BACKEND
+    return stats
+
+
+def _listen_forever():
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD, host=DB_HOST, port=DB_PORT,
+                                    client_encoding="utf8", application_name="result-cache-listener")
+            conn.autocommit = True
+            conn.cursor().execute(f"LISTEN {CHANNEL}")
+            # changes made while we were not listening were missed
+            clear()
+            _listening.set()
+            while True:
+                if select.select([conn], [], [], 60)[0]:
+                    conn.poll()
+                    while conn.notifies:
+                        invalidate(conn.notifies.pop(0).payload)
+        except (psycopg2.Error, OSError) as e:
+            _log.warning("result cache listener disconnected, reconnecting: %s", e)
+            time.sleep(RECONNECT_DELAY)
+        except Exception:
+            # e.g. a failing on_change callback: without the listener nothing
+            # would be invalidated again, so reconnect, which clears everything
+            _log.exception("result cache listener failed, reconnecting")
+            time.sleep(RECONNECT_DELAY)
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+def _start_listener():
+    global _listener
+    if _listener is None:
+        with _listener_lock:
+            if _listener is None:
+                _listener = threading.Thread(target=_listen_forever, name="result-cache-listener", daemon=True)
+                _listener.start()
+                # so that nothing is read, and cached, before the first clear()
+                _listening.wait(LISTEN_TIMEOUT)
@@ -0,0 +1,325 @@
+# modules/route_search.py
+import datetime
+import heapq
+import os
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+from modules.utils import get_session
+
+# Connection search over the flight network. Every schedule that is not
+# cancelled is one connection (origin, destination, departure, arrival),
+# held in NumPy arrays sorted by departure; times are minutes since the
+# Unix epoch. A CSR index (out_ptr/out_conn) lists each airport's
+# departures in time order. The network is loaded once per process and
+# then patched from the schedule_changes log (migrations/0010).
+MIN_CONNECTION_MINUTES = int(os.environ.get("MIN_CONNECTION_MINUTES", "45"))
+ROUTE_MAX_HOURS = int(os.environ.get("ROUTE_MAX_HOURS", "48"))  # searched from the requested departure
+ROUTE_REFRESH_INTERVAL = float(os.environ.get("ROUTE_REFRESH_INTERVAL", "30"))
+ROUTE_RELOAD_HOURS = float(os.environ.get("ROUTE_RELOAD_HOURS", "6"))  # full rebuild after this long
+CHANGE_RETENTION = datetime.timedelta(days=1)
+
+Network = namedtuple("Network", [
+    "airport_ids", "codes",                       # per airport index
+    "dep_airport", "arr_airport", "dep", "arr",   # per connection, sorted by dep
+    "schedule_id", "flight_id",
+    "out_ptr", "out_conn", "out_dep",             # CSR: departures of airport a are out_conn[out_ptr[a]:out_ptr[a + 1]]
+    "xmin", "seen", "loaded_at", "synced_at",     # change-log position
+])
+
+_CONNECTIONS = """
+    SELECT s.schedule_id, s.flight_id, f.origin_airport_id, f.destination_airport_id,
+           s.departure_time, s.arrival_time
+    FROM flight_schedules s
+    JOIN flights f ON f.flight_id = s.flight_id
+    WHERE s.arrival_time > s.departure_time
+      AND f.origin_airport_id <> f.destination_airport_id
+      AND f.status_id IS DISTINCT FROM (SELECT status_id FROM flight_statuses WHERE status_name = 'Cancelled')
+"""
+
+_lock = threading.Lock()
+_network = None
+_checked_at = 0.0
+
+
+def to_minutes(value):
+    return int(pd.Timestamp(value).value // 60_000_000_000)
+
+
+def from_minutes(minutes):
+    return pd.to_datetime(np.asarray(minutes, dtype=np.int64), unit="m")
+
+
+def _connections(session, schedule_ids=None):
+    query, params = _CONNECTIONS, {}
+    if schedule_ids is not None:
+        query += " AND s.schedule_id = ANY(:ids)"
+        params["ids"] = [int(i) for i in schedule_ids]
+    frame = pd.read_sql(text(query), session.connection(), params=params)
+    frame["departure_time"] = frame["departure_time"].to_numpy(dtype="datetime64[m]").astype(np.int64)
+    frame["arrival_time"] = frame["arrival_time"].to_numpy(dtype="datetime64[m]").astype(np.int64)
+    return frame
+
+
+def _build(session, frame, xmin, seen, loaded_at, synced_at):
+    airports = session.execute(text("SELECT airport_id, code FROM airports ORDER BY airport_id")).fetchall()
+    airport_ids = np.array([a.airport_id for a in airports], dtype=np.int64)
+    lookup = np.full(int(airport_ids.max(initial=0)) + 1, -1, dtype=np.int32)
+    lookup[airport_ids] = np.arange(len(airport_ids), dtype=np.int32)
+
+    frame = frame.sort_values(["departure_time", "schedule_id"], kind="stable")
+    dep_airport = lookup[frame["origin_airport_id"].to_numpy()]
+    dep = frame["departure_time"].to_numpy()
+    out_conn = np.argsort(dep_airport, kind="stable").astype(np.int32)
+    return Network(
+        airport_ids, [a.code for a in airports],
+        dep_airport, lookup[frame["destination_airport_id"].to_numpy()],
+        dep, frame["arrival_time"].to_numpy(),
+        frame["schedule_id"].to_numpy(), frame["flight_id"].to_numpy(),
+        np.searchsorted(dep_airport[out_conn], np.arange(len(airport_ids) + 1)), out_conn, dep[out_conn],
+        xmin, seen, loaded_at, synced_at,
+    )
+
+
+def _frame(network):
+    """The network's connections back as a frame of ids, for patching."""
+    return pd.DataFrame({
+        "schedule_id": network.schedule_id, "flight_id": network.flight_id,
+        "origin_airport_id": network.airport_ids[network.dep_airport],
+        "destination_airport_id": network.airport_ids[network.arr_airport],
+        "departure_time": network.dep, "arrival_time": network.arr,
+    })
+
+
+def _position(session):
+    """(oldest running transaction, now): entries from that transaction on may still be unread."""
+    return session.execute(text(
+        "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint, LOCALTIMESTAMP"
+    )).one()
+
+
+def load_network(session):
+    """Builds the network from every schedule, and prunes the change log."""
+    xmin, now = _position(session)
+    network = _build(session, _connections(session), xmin, frozenset(), now, now)
+    session.execute(text("DELETE FROM schedule_changes WHERE changed_at < :cutoff"),
+                    {"cutoff": now - CHANGE_RETENTION})
+    session.commit()
+    return network
+
+
+def refresh_network(session, network):
+    """
+    `network` with the schedules logged since it was synced reloaded; the
+    same object when nothing changed. Falls back to a full load after a
+    truncate or once the network is ROUTE_RELOAD_HOURS old.
+    """
+    xmin, now = _position(session)
+    if now - network.loaded_at > datetime.timedelta(hours=ROUTE_RELOAD_HOURS):
+        return load_network(session)
+    rows = session.execute(text("""
+        SELECT change_id, txid::text::bigint AS txid, schedule_id FROM schedule_changes
+        WHERE txid >= CAST(CAST(:xmin AS text) AS xid8)
+    """), {"xmin": network.xmin}).fetchall()
+    # entries of transactions still running at `xmin` are read again next time
+    seen = frozenset(r.change_id for r in rows if r.txid >= xmin)
+    new = [r for r in rows if r.change_id not in network.seen]
+    if any(r.schedule_id is None for r in new):
+        return load_network(session)
+    changed = {r.schedule_id for r in new}
+    if not changed:
+        return network._replace(xmin=xmin, seen=seen, synced_at=now)
+    frame = _frame(network)
+    frame = pd.concat([frame[~frame["schedule_id"].isin(changed)], _connections(session, changed)],
+                      ignore_index=True)
+    return _build(session, frame, xmin, seen, network.loaded_at, now)
+
+
+def get_network(session):
+    """The process-wide network, brought up to date at most every ROUTE_REFRESH_INTERVAL seconds."""
+    global _network, _checked_at
+    if _network is not None and time.monotonic() - _checked_at < ROUTE_REFRESH_INTERVAL:
+        return _network
+    with _lock:
+        if _network is None:
+            _network = load_network(session)
+        elif time.monotonic() - _checked_at >= ROUTE_REFRESH_INTERVAL:
+            _network = refresh_network(session, _network)
+        _checked_at = time.monotonic()
+    return _network
+
+
+def _window(depart_after, max_hours):
+    start = to_minutes(depart_after)
+    end = start + 60 * (max_hours or ROUTE_MAX_HOURS)
+    return start, end
+
+
+def _airport(network, airport_id):
+    index = np.flatnonzero(network.airport_ids == airport_id)
+    if not len(index):
+        raise ValueError(f"Unknown airport {airport_id}")
+    return int(index[0])
+
+
+def earliest_arrival(network, origin, destination, depart_after, min_connection=None, max_hours=None):
+    """
+    Legs (connection indexes) of the itinerary from airport `origin` to
+    `destination` that leaves at or after `depart_after` and arrives
+    first, with at least `min_connection` minutes between flights. One
+    connection scan over the departures in the next `max_hours` hours.
+    Empty when there is no such itinerary.
+    """
+    mct = MIN_CONNECTION_MINUTES if min_connection is None else min_connection
+    o, d = _airport(network, origin), _airport(network, destination)
+    start, end = _window(depart_after, max_hours)
+    lo, hi = np.searchsorted(network.dep, [start, end])
+    deps = network.dep[lo:hi].tolist()
+    arrs = network.arr[lo:hi].tolist()
+    froms = network.dep_airport[lo:hi].tolist()
+    tos = network.arr_airport[lo:hi].tolist()
+
+    best = [float("inf")] * len(network.airport_ids)
+    best[o] = start - mct  # the first flight only has to leave after `depart_after`
+    via = {}
+    for c, departs in enumerate(deps):
+        if departs >= best[d]:
+            break
+        if best[froms[c]] + mct <= departs and arrs[c] < best[tos[c]]:
+            best[tos[c]] = arrs[c]
+            via[tos[c]] = c
+    if d not in via:
+        return []
+    legs, airport = [], d
+    while airport != o:
+        c = via[airport]
+        legs.append(lo + c)
+        airport = froms[c]
+    return legs[::-1]
+
+
+def itineraries(network, origin, destination, depart_after, k=3, max_legs=3, min_connection=None,
+                max_hours=None):
+    """
+    Up to `k` itineraries from `origin` to `destination`, earliest arrival
+    first, each a list of connection indexes with at most `max_legs`
+    flights and no airport visited twice. A best-first search over the
+    airports' departure lists that expands each airport at most k times;
+    once k arrivals at `destination` are queued, later labels are dropped.
+    """
+    mct = MIN_CONNECTION_MINUTES if min_connection is None else min_connection
+    o, d = _airport(network, origin), _airport(network, destination)
+    start, end = _window(depart_after, max_hours)
+    expanded = [0] * len(network.airport_ids)
+    heap = [(start - mct, 0, o, ())]
+    queued = []  # max-heap (negated) of the k earliest arrivals queued for `destination`
+    found = []
+    while heap and len(found) < k:
+        arrival, legs, airport, path = heapq.heappop(heap)
+        if airport == d:
+            found.append(list(path))
+            continue
+        if legs == max_legs or expanded[airport] >= k:
+            continue
+        expanded[airport] += 1
+        visited = {o} | {int(network.arr_airport[c]) for c in path}
+        first, last = network.out_ptr[airport], network.out_ptr[airport + 1]
+        lo, hi = np.searchsorted(network.out_dep[first:last], [arrival + mct, end]) + first
+        conns = network.out_conn[lo:hi]
+        # only the k earliest arrivals at each next airport can be expanded
+        to, arrives = network.arr_airport[conns], network.arr[conns]
+        order = np.lexsort((arrives, to))
+        rank = np.arange(len(order)) - np.searchsorted(to[order], to[order])
+        keep = order[rank < k]
+        bound = -queued[0] if len(queued) == k else float("inf")
+        for c, b, t in zip(conns[keep].tolist(), to[keep].tolist(), arrives[keep].tolist()):
+            if t > bound or b in visited or (expanded[b] >= k and b != d):
+                continue
+            if b == d:
+                if len(queued) == k:
+                    heapq.heapreplace(queued, -t)
+                else:
+                    heapq.heappush(queued, -t)
+                bound = -queued[0] if len(queued) == k else bound
+            heapq.heappush(heap, (t, legs + 1, b, path + (c,)))
+    return found
+
+
+def legs_frame(network, legs):
+    """One row per leg of an itinerary."""
+    legs = np.asarray(legs, dtype=np.int64)
+    frame = pd.DataFrame({
+        "schedule_id": network.schedule_id[legs],
+        "flight_id": network.flight_id[legs],
+        "from": [network.codes[a] for a in network.dep_airport[legs]],
+        "to": [network.codes[a] for a in network.arr_airport[legs]],
+        "departs": from_minutes(network.dep[legs]),
+        "arrives": from_minutes(network.arr[legs]),
+    })
+    frame["layover"] = frame["departs"] - frame["arrives"].shift()
+    return frame
+
+
+def duration(delta):
+    minutes = int(delta.total_seconds() // 60)
+    return f"{minutes // 60}h {minutes % 60:02d}m"
+
+
+def flight_numbers(session, flight_ids):
+    rows = session.execute(text("SELECT flight_id, flight_number FROM flights WHERE flight_id = ANY(:ids)"),
+                           {"ids": [int(i) for i in flight_ids]}).fetchall()
+    return dict(rows)
+
+
+def route_search_page():
+    # one pooled connection per rerun, released when the page is rendered
+    with get_session() as session:
+        _route_page(session)
+
+
+def _route_page(session):
+    st.subheader("🧭 Route Search")
+
+    network = get_network(session)
+    codes = {int(a): c for a, c in zip(network.airport_ids, network.codes)}
+    if len(codes) < 2:
+        st.info("Add airports and schedules first.")
+        return
+    ids = sorted(codes, key=codes.get)
+    col1, col2 = st.columns(2)
+    origin = col1.selectbox("From", ids, format_func=codes.get, key="route_from")
+    destination = col2.selectbox("To", ids, index=1, format_func=codes.get, key="route_to")
+    first = from_minutes([network.dep[0]])[0] if len(network.dep) else pd.Timestamp.today()
+    col1, col2 = st.columns(2)
+    day = col1.date_input("Departing on", first.date(), key="route_day")
+    at = col2.time_input("After", datetime.time(6, 0), key="route_time")
+    col1, col2, col3 = st.columns(3)
+    k = col1.number_input("Itineraries", 1, 10, 3, key="route_k")
+    max_legs = col2.number_input("Max flights", 1, 5, 3, key="route_legs")
+    mct = col3.number_input("Min connection (min)", 0, 360, MIN_CONNECTION_MINUTES, step=5, key="route_mct")
+    if origin == destination:
+        st.warning("Pick two different airports.")
+        return
+
+    depart_after = datetime.datetime.combine(day, at)
+    started = time.perf_counter()
+    found = itineraries(network, origin, destination, depart_after, int(k), int(max_legs), int(mct))
+    elapsed = (time.perf_counter() - started) * 1000
+    st.caption(f"{len(network.dep):,} connections in memory · searched in {elapsed:.1f} ms")
+    if not found:
+        st.info(f"No connection within {ROUTE_MAX_HOURS} hours.")
+        return
+
+    numbers = flight_numbers(session, np.concatenate([network.flight_id[legs] for legs in found]))
+    for n, legs in enumerate(found, start=1):
+        frame = legs_frame(network, legs)
+        frame.insert(1, "flight_number", frame.pop("flight_id").map(numbers))
+        departs, arrives = frame["departs"].iloc[0], frame["arrives"].iloc[-1]
+        frame["layover"] = frame["layover"].map(lambda v: "" if pd.isna(v) else duration(v))
+        st.markdown(f"**{n}. Arrives {arrives:%a %d %b %H:%M}** · {duration(arrives - departs)} · "
+                    f"{len(legs)} flight{'s' if len(legs) > 1 else ''}")
+        st.dataframe(frame, use_container_width=True, hide_index=True)
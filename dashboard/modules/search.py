@@ -0,0 +1,105 @@
+# modules/search.py
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+from modules.table_browser import check_identifier, window_predicate
+from modules.catalog import get_table
+from modules.reference_data import decorate
+
+TEXT_TYPES = ("character varying", "character", "text")
+INTEGER_TYPES = ("integer", "bigint", "smallint")
+# Columns that must never be matched or ranked against user input
+EXCLUDED_COLUMNS = {"password"}
+
+
+def get_searchable_columns(session, table_name):
+    """Returns (text_columns, integer_columns) of `table_name`."""
+    columns = get_table(session, table_name).columns
+    text_cols = [c.name for c in columns if c.data_type in TEXT_TYPES and c.name not in EXCLUDED_COLUMNS]
+    int_cols = [c.name for c in columns if c.data_type in INTEGER_TYPES]
+    return text_cols, int_cols
+
+
+def _escape_like(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def build_search_query(table_name, pk_column, text_cols, int_cols, term, window=None):
+    """
+    Build the ranked, parameterized search statement for `term`.
+    Text columns are matched with ILIKE (served by the pg_trgm GIN indexes)
+    and ranked by similarity(); a numeric term also matches integer columns.
+    `window` is an optional (column, start, end) range, for partition pruning.
+    Returns (sql, params), or (None, None) when nothing can match.
+    """
+    check_identifier(table_name)
+    check_identifier(pk_column)
+    params = {"term": term, "pattern": f"%{_escape_like(term)}%"}
+
+    predicates = [f"{col} ILIKE :pattern" for col in text_cols]
+    # str.isdigit() also accepts digits int() cannot parse, such as "²"
+    numeric = term.isascii() and term.isdigit()
+    if numeric:
+        params["num"] = int(term)
+        predicates += [f"{col} = :num" for col in int_cols]
+    if not predicates:
+        return None, None
+
+    if text_cols:
+        rank = "GREATEST(" + ", ".join(f"similarity(COALESCE({col}, ''), :term)" for col in text_cols) + ")"
+    else:
+        rank = "1.0"
+    if numeric:
+        # an exact key match outranks any fuzzy text match
+        rank = f"CASE WHEN {pk_column} = :num THEN 2.0 ELSE {rank} END"
+
+    where = " OR ".join(predicates)
+    in_window = window_predicate(window, params)
+    if in_window:
+        where = f"({where}) AND {in_window}"
+    sql = f"""
+        SELECT *, {rank} AS search_rank
+        FROM {table_name}
+        WHERE {where}
+        ORDER BY search_rank DESC, {pk_column}
+        LIMIT :limit OFFSET :offset
+    """
+    return sql, params
+
+
+def search_table(session, table_name, pk_column, term, page=1, page_size=50, window=None):
+    """
+    One page of search results, best matches first.
+    Returns (page_df, has_more).
+    """
+    text_cols, int_cols = get_searchable_columns(session, table_name)
+    sql, params = build_search_query(table_name, pk_column, text_cols, int_cols, term.strip(), window)
+    if sql is None:
+        # keep the column list so the page can still build its forms
+        return pd.read_sql(text(f"SELECT * FROM {table_name} LIMIT 0"), session.connection()), False
+    # read one extra row to know whether another page exists
+    params.update({"limit": page_size + 1, "offset": (page - 1) * page_size})
+    df = pd.read_sql(text(sql), session.connection(), params=params)
+    return df.iloc[:page_size].drop(columns="search_rank"), len(df) > page_size
+
+
+def search_results(session, table_name, pk_column, term, page_size=50, window=None):
+    """Render paginated search results for `term`; returns the displayed page."""
+    key = f"search_{table_name}"
+    state = st.session_state.setdefault(key, {"term": term, "page": 1, "window": window})
+    if state["term"] != term or state.get("window") != window:
+        state.update({"term": term, "page": 1, "window": window})
+
+    page, has_more = search_table(session, table_name, pk_column, term, state["page"], page_size, window)
+    st.caption(f"Search results · page {state['page']}")
+    st.dataframe(decorate(session, page, table_name), use_container_width=True)
+
+    prev_col, next_col = st.columns(2)
+    if prev_col.button("⬅️ Previous", key=f"search_prev_{table_name}", disabled=state["page"] == 1):
+        state["page"] -= 1
+        st.rerun()
+    if next_col.button("Next ➡️", key=f"search_next_{table_name}", disabled=not has_more):
+        state["page"] += 1
+        st.rerun()
+
+    return page
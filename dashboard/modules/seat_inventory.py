@@ -0,0 +1,256 @@
+# modules/seat_inventory.py
+import os
+import uuid
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+from modules.utils import get_session
+from modules.writes import insert_rows, describe
+
+# Seats of a schedule live in one seat_inventory row (migrations/0009): a
+# bitmap of booked seats over its aircraft layout, kept in step with
+# bookings by a trigger. A booker first holds seats, which inserts their
+# (schedule, seat) keys into seat_holds, and then confirms the hold, which
+# turns it into bookings in one transaction. Expired holds are taken over.
+SEAT_HOLD_MINUTES = int(os.environ.get("SEAT_HOLD_MINUTES", "10"))
+
+
+class SeatError(ValueError):
+    """A hold or confirm could not be done; nothing was changed."""
+
+
+def seat_label(index, seat_letters):
+    return f"{index // len(seat_letters) + 1}{seat_letters[index % len(seat_letters)]}"
+
+
+def seat_number_index(seat, seat_rows, seat_letters):
+    """Bit index of seat label `seat` ("12C"), mirroring seat_index() in SQL; None if not on the layout."""
+    seat = str(seat).strip().upper()
+    row, letter = seat[:-1], seat[-1:]
+    if not row.isdigit() or not 1 <= int(row) <= seat_rows or not letter or letter not in seat_letters:
+        return None
+    return (int(row) - 1) * len(seat_letters) + seat_letters.index(letter)
+
+
+def load_inventory(session, schedule_id):
+    """
+    (seat_rows, seat_letters, booked as a bool array), or None if the aircraft
+    has no layout. A seat_inventory row built here is kept only if the caller
+    commits.
+    """
+    session.execute(text("SELECT ensure_seat_inventory(:s)"), {"s": schedule_id})
+    row = session.execute(text("""
+        SELECT seat_rows, seat_letters, booked::text FROM seat_inventory WHERE schedule_id = :s
+    """), {"s": schedule_id}).fetchone()
+    if row is None:
+        return None
+    return row.seat_rows, row.seat_letters, np.frombuffer(row.booked.encode(), dtype=np.uint8) == ord("1")
+
+
+def held_seats(session, schedule_id, exclude_token=None):
+    """Bit indexes of the unexpired holds on `schedule_id`, other than `exclude_token`'s."""
+    return [r[0] for r in session.execute(text("""
+        SELECT seat_index FROM seat_holds
+        WHERE schedule_id = :s AND held_until > LOCALTIMESTAMP
+          AND hold_token IS DISTINCT FROM CAST(:token AS uuid)
+    """), {"s": schedule_id, "token": exclude_token})]
+
+
+def seat_map(session, schedule_id):
+    """
+    Seat grid of `schedule_id` as a DataFrame, one row per seat row:
+    🟩 free, 🟨 held, 🟥 booked. None if the aircraft has no layout.
+    """
+    inventory = load_inventory(session, schedule_id)
+    if inventory is None:
+        return None
+    seat_rows, seat_letters, booked = inventory
+    cells = np.where(booked, "🟥", "🟩").astype(object)
+    held = held_seats(session, schedule_id)
+    cells[held] = np.where(booked[held], "🟥", "🟨")
+    return pd.DataFrame(cells.reshape(seat_rows, len(seat_letters)),
+                        index=pd.RangeIndex(1, seat_rows + 1, name="row"), columns=list(seat_letters))
+
+
+def available_seats(session, schedule_id):
+    """Labels of the seats of `schedule_id` that are neither booked nor held."""
+    inventory = load_inventory(session, schedule_id)
+    if inventory is None:
+        return []
+    seat_rows, seat_letters, booked = inventory
+    free = ~booked
+    free[held_seats(session, schedule_id)] = False
+    return [seat_label(i, seat_letters) for i in np.flatnonzero(free)]
+
+
+def _claim(session, schedule_id, indexes, token):
+    """
+    Inserts holds for `indexes`, taking over expired ones; a seat another
+    booker holds is skipped rather than waited on. Returns the indexes held.
+    """
+    rows = session.execute(text("""
+        INSERT INTO seat_holds (schedule_id, seat_index, hold_token, held_until)
+        SELECT :s, i, CAST(:token AS uuid), LOCALTIMESTAMP + make_interval(mins => :minutes)
+        FROM unnest(CAST(:indexes AS int[])) AS i
+        ON CONFLICT (schedule_id, seat_index) DO UPDATE
+            SET hold_token = EXCLUDED.hold_token, held_until = EXCLUDED.held_until
+            WHERE seat_holds.held_until <= LOCALTIMESTAMP
+        RETURNING seat_index
+    """), {"s": schedule_id, "indexes": [int(i) for i in indexes], "token": token,
+           "minutes": SEAT_HOLD_MINUTES}).fetchall()
+    return sorted(r[0] for r in rows)
+
+
+def hold_seats(session, schedule_id, seats, token=None):
+    """
+    Holds every seat in `seats` ("12C", ...) on `schedule_id` for
+    SEAT_HOLD_MINUTES, or none of them. Returns the hold token.
+    """
+    token = token or str(uuid.uuid4())
+    try:
+        inventory = load_inventory(session, schedule_id)
+        if inventory is None:
+            raise SeatError(f"Schedule {schedule_id} has no seat layout")
+        seat_rows, seat_letters, booked = inventory
+        indexes = []
+        for seat in seats:
+            index = seat_number_index(seat, seat_rows, seat_letters)
+            if index is None:
+                raise SeatError(f"Seat {seat} does not exist on schedule {schedule_id}")
+            if booked[index]:
+                raise SeatError(f"Seat {seat} is already booked")
+            indexes.append(index)
+        held = _claim(session, schedule_id, sorted(set(indexes)), token)
+        taken = sorted(set(indexes) - set(held))
+        if taken:
+            raise SeatError("Held by another booker: " + ", ".join(seat_label(i, seat_letters) for i in taken))
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return token
+
+
+def hold_any(session, schedule_id, count, token=None, attempts=3):
+    """
+    Holds `count` free seats chosen by the system, front rows first, or none.
+    Seats claimed by others in the meantime are replaced by the next free
+    ones. Returns (token, seat labels).
+    """
+    token = token or str(uuid.uuid4())
+    try:
+        inventory = load_inventory(session, schedule_id)
+        if inventory is None:
+            raise SeatError(f"Schedule {schedule_id} has no seat layout")
+        seat_rows, seat_letters, booked = inventory
+        free = ~booked
+        held = []
+        for _ in range(attempts):
+            free[held_seats(session, schedule_id, exclude_token=token)] = False
+            free[held] = False
+            candidates = np.flatnonzero(free)[:count - len(held)]
+            if len(candidates) < count - len(held):
+                raise SeatError(f"Only {len(held) + len(candidates)} seats left on schedule {schedule_id}")
+            held += _claim(session, schedule_id, candidates, token)
+            if len(held) == count:
+                session.commit()
+                return token, [seat_label(i, seat_letters) for i in sorted(held)]
+        raise SeatError("Seats are being taken too fast, try again")
+    except Exception:
+        session.rollback()
+        raise
+
+
+def release_hold(session, token):
+    """Drops every seat held under `token`; returns how many."""
+    released = session.execute(text("DELETE FROM seat_holds WHERE hold_token = CAST(:token AS uuid)"),
+                               {"token": token}).rowcount
+    session.commit()
+    return released
+
+
+def confirm_hold(session, token, passenger_id, admin_id, status="Confirmed"):
+    """
+    Books every seat held under `token` for `passenger_id`: the holds are
+    removed and the bookings inserted in one transaction, so a hold that
+    expired or was taken over confirms nothing. Returns the WriteResult.
+    """
+    try:
+        rows = session.execute(text("""
+            DELETE FROM seat_holds h
+            USING seat_inventory i
+            WHERE h.hold_token = CAST(:token AS uuid) AND h.held_until > LOCALTIMESTAMP
+              AND i.schedule_id = h.schedule_id
+            RETURNING h.schedule_id, h.seat_index, i.seat_letters
+        """), {"token": token}).fetchall()
+        if not rows:
+            raise SeatError("The hold has expired; choose the seats again")
+        status_id = session.execute(text("SELECT status_id FROM booking_statuses WHERE status_name = :name"),
+                                    {"name": status}).scalar()
+        bookings = [{"passenger_id": passenger_id, "schedule_id": r.schedule_id,
+                     "seat_number": seat_label(r.seat_index, r.seat_letters), "status_id": status_id}
+                    for r in sorted(rows)]
+    except Exception:
+        session.rollback()
+        raise
+    # commits the removed holds together with the bookings
+    return insert_rows(session, "bookings", "booking_id", bookings, admin_id)
+
+
+def seats_page():
+    # one pooled connection per rerun, released when the page is rendered
+    with get_session() as session:
+        _seats_page(session)
+
+
+def _seats_page(session):
+    st.subheader("💺 Seats")
+
+    col1, col2 = st.columns(2)
+    schedule_id = col1.number_input("Schedule ID", min_value=1, step=1, key="seat_schedule")
+    passenger_id = col2.number_input("Passenger ID", min_value=1, step=1, key="seat_passenger")
+    grid = seat_map(session, int(schedule_id))
+    session.commit()  # keeps the seat_inventory row if seat_map had to build it
+    if grid is None:
+        st.warning("This schedule does not exist or its aircraft has no seat layout.")
+        return
+    booked = int((grid == "🟥").to_numpy().sum())
+    held = int((grid == "🟨").to_numpy().sum())
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Free", f"{grid.size - booked - held:,}")
+    c2.metric("Held", f"{held:,}")
+    c3.metric("Booked", f"{booked:,}")
+    st.dataframe(grid, use_container_width=True)
+
+    hold = st.session_state.get("seat_hold")
+    if hold and hold[0] == schedule_id:
+        _, token, seats = hold
+        st.info(f"Holding {', '.join(seats)} for {SEAT_HOLD_MINUTES} minutes.")
+        c1, c2 = st.columns(2)
+        if c1.button("✅ Confirm booking"):
+            try:
+                result = confirm_hold(session, token, int(passenger_id), st.session_state.user['admin_id'])
+                st.success(describe(result, "Booked"))
+                del st.session_state["seat_hold"]
+            except Exception as e:
+                st.error(f"❌ Booking failed: {e}")
+        if c2.button("↩️ Release"):
+            release_hold(session, token)
+            del st.session_state["seat_hold"]
+            st.rerun()
+        return
+
+    seats = st.text_input("Seats (e.g. 12A, 12B), or leave empty to pick automatically", key="seat_numbers")
+    count = st.number_input("Number of seats", min_value=1, max_value=9, step=1, key="seat_count")
+    if st.button("🔒 Hold seats"):
+        try:
+            if seats.strip():
+                labels = [s.strip().upper() for s in seats.split(",") if s.strip()]
+                token = hold_seats(session, int(schedule_id), labels)
+            else:
+                token, labels = hold_any(session, int(schedule_id), int(count))
+            st.session_state["seat_hold"] = (schedule_id, token, labels)
+            st.rerun()
+        except SeatError as e:
+            st.error(f"❌ {e}")
@@ -1,18 +1,13 @@
 
-import uuid
 import streamlit as st
-from config.db_config import get_cursor
-from datetime import datetime
-from config.db_config import get_cursor_and_connection
-import streamlit as st
-import pandas as pd
-from modules.utils import export_to_excel, filter_dataframe
-from modules.utils import log_action
-from sqlalchemy import text
+from modules.export import export_panel
+from modules.catalog import primary_key, insertable_columns, column_map
+from modules.writes import insert_rows, update_rows, delete_rows, bulk_write_panel, describe
+from modules.table_browser import paginated_table, month_window, fetch_row
+from modules.search import search_results
+from modules.profiler import section
 
-# session = SessionLocal()
 from modules.utils import get_session
-session = get_session()
 
             
 st.set_page_config(layout="wide")
@@ -24,25 +19,15 @@ st.markdown(
 )
 
 # Session 
-from sqlalchemy import text
 
-import re
 # session=set_session_user()
-def get_primary_key_column(session, table_name):
-    if not re.match(r'^\w+$', table_name):
-        raise ValueError("Invalid table name")
-
-    query = f"""
-        SELECT a.attname
-        FROM pg_index i
-        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
-        WHERE i.indrelid = '{table_name}'::regclass AND i.indisprimary;
-    """
-    result = session.execute(text(query)).fetchone()
-    return result[0] if result else None
+def dashboard():
+    # one pooled connection per rerun, released when the page is rendered
+    with get_session() as session:
+        _table_dashboard(session)
 
 
-def dashboard():
+def _table_dashboard(session):
 
     st.sidebar.title("📋 Dashboard Menu")
     tables = [
@@ -51,37 +36,45 @@ def dashboard():
     ]
     table = st.sidebar.selectbox("Select Table", tables)
 
+    # Primary key from the cached catalog; no query per rerun
+    with section("catalog"):
+        pk_column = primary_key(session, table)
+
     # View & Filter
-    df = pd.read_sql(f"SELECT * FROM {table} ", session.bind)
     search = st.text_input("🔍 Search Table")
-    if search:
-        df = filter_dataframe(df, search)
-
-    st.dataframe(df, use_container_width=True)
-
-    # Export
-    if st.download_button("📤 Export to Excel", data=export_to_excel(df),
-                          file_name=f"{table}.xlsx", mime="application/vnd.ms-excel"):
-        st.success("Downloaded")
+    # time-partitioned tables are read one month (partition) at a time
+    window = month_window(session, table)
+    with section("search" if search else "browse"):
+        if search and pk_column:
+            df = search_results(session, table, pk_column, search, window=window)
+        elif pk_column:
+            df = paginated_table(session, table, pk_column, window)
+        else:
+            st.error(f"❌ No primary key found for table `{table}`.")
+
+    # Export (built only when requested)
+    if pk_column:
+        with section("export"):
+            export_panel(session, table, pk_column)
 
     # Create
     st.subheader(f"➕ Add New Record to {table}")
-    cols = df.columns.tolist()
-    new_data = {col: st.text_input(f"{col}") for col in cols if col != 'id'}
+    with section("insert form"):
+        new_data = {
+            col.name: st.text_input(f"{col.name} ({col.data_type}{'' if col.nullable or col.default else ', required'})")
+            for col in insertable_columns(session, table)
+        }
 
-    if st.button("Insert"):
-        try:
-            columns = ", ".join(new_data.keys())
-            values = ", ".join([f"'{v}'" for v in new_data.values()])
-            query = text(f"INSERT INTO {table} ({columns}) VALUES ({values}) RETURNING *")
-            result = session.execute(query)
-            session.commit()
-            inserted_id = result.fetchone()[0]
-            log_action(session, table, "INSERT", inserted_id, st.session_state.user['admin_id'])
-            st.success("✅ Inserted Successfully")
-        except Exception as e:
-            session.rollback()  # 👈 This is crucial
-            st.error(f"❌ Insert failed: {e}")
+        if st.button("Insert") and pk_column:
+            try:
+                result = insert_rows(session, table, pk_column, [new_data], st.session_state.user['admin_id'])
+                st.success(f"✅ Inserted Successfully ({pk_column} = {result.ids[0]})")
+            except Exception as e:
+                st.error(f"❌ Insert failed: {e}")
+
+    if pk_column:
+        with section("bulk write"):
+            bulk_write_panel(session, table, pk_column, st.session_state.user['admin_id'])
 
 
 
@@ -90,68 +83,54 @@ def dashboard():
     # Delete
     # Delete
     st.subheader("❌ Delete Record")
-    del_id = st.text_input("Enter ID to delete")
+    del_id = st.text_input(f"Enter {pk_column or 'ID'} to delete (comma-separated for several)")
 
-    if st.button("Delete"):
-        # Find primary key column for the selected table
-        primary_key = df.columns[0]  # assume first column is primary key
-        delete_query = text(f"DELETE FROM {table} WHERE {primary_key} = :id")
-        session.execute(delete_query, {"id": del_id})
-        session.commit()
-        log_action(session, table, "DELETE", del_id, st.session_state.user['admin_id'])
-        st.success("Deleted Successfully")
+    if st.button("Delete") and pk_column:
+        with section("delete"):
+            try:
+                # several keys may be given, separated by commas
+                result = delete_rows(session, table, pk_column, del_id.split(","), st.session_state.user['admin_id'])
+                st.success(describe(result, "Deleted"))
+            except Exception as e:
+                st.error(f"❌ Delete failed: {e}")
 
     
         # Update
     # Update
     st.subheader("✏️ Update Record")
 
-    # Get primary key column of selected table
-    pk_column = get_primary_key_column(session, table)
     if not pk_column:
         st.error(f"❌ No primary key found for table `{table}`.")
     else:
         update_id = st.text_input(f"Enter {pk_column} to update")
 
         if update_id:
-            # Fetch the record using dynamic primary key
-            record = session.execute(
-                text(f"SELECT * FROM {table} WHERE {pk_column} = :pk"),
-                {"pk": update_id}
-            ).fetchone()
-
-            if record:
-                record_dict = dict(record._mapping)
-                updated_data = {}
-
-                st.markdown("### Update Fields")
-                for key, value in record_dict.items():
-                    if key == pk_column:
-                        st.text_input(f"{key}", value, disabled=True)
-                    else:
-                        updated_data[key] = st.text_input(f"{key}", str(value))
-
-                if st.button("Update"):
-                    # Dynamically build update query
-                    update_query = text(f"""
-                        UPDATE {table} SET
-                        {', '.join([f"{col} = :{col}" for col in updated_data])}
-                        WHERE {pk_column} = :pk
-                    """)
-                    updated_data["pk"] = update_id
-                    try:
-                        session.execute(update_query, updated_data)
-                        session.commit()
-                        log_action(session, table, "UPDATE", update_id, st.session_state.user['admin_id'])
-                        st.success("✅ Record updated successfully!")
-                    except Exception as e:
-                        st.error(f"❌ Failed to update record: {e}")
-            else:
-                st.warning(f"No record found with `{pk_column}` = {update_id}.")
-
-
-
-
-
-
-
+            with section("update record"):
+                # the browsed month first: one partition of a partitioned table
+                record_dict = fetch_row(session, table, pk_column, update_id, window)
+
+                if record_dict:
+                    updated_data = {}
+
+                    st.markdown("### Update Fields")
+                    columns = column_map(session, table)
+                    for key, value in record_dict.items():
+                        if key == pk_column or columns[key].is_generated:
+                            st.text_input(f"{key}", value, disabled=True)
+                        else:
+                            updated_data[key] = st.text_input(f"{key}", "" if value is None else str(value))
+
+                    if st.button("Update"):
+                        # blank fields are left unchanged
+                        try:
+                            result = update_rows(session, table, pk_column, [{pk_column: update_id, **updated_data}],
+                                                 st.session_state.user['admin_id'], current=[record_dict])
+                            if result.rows:
+                                st.success("✅ Record updated successfully!")
+                            else:
+                                # matched on the month shown too: a row moved meanwhile is left alone
+                                st.warning("Nothing was updated; the record may have changed meanwhile.")
+                        except Exception as e:
+                            st.error(f"❌ Failed to update record: {e}")
+                else:
+                    st.warning(f"No record found with `{pk_column}` = {update_id}.")
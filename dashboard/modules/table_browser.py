@@ -0,0 +1,181 @@
+# modules/table_browser.py
+import datetime
+import re
+import streamlit as st
+from sqlalchemy import text
+from modules.catalog import get_table
+from modules.profiler import note_cache
+from modules.reference_data import decorate
+from modules.result_cache import RESULT_CACHE_TABLES, read_frame
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def check_identifier(name):
+    if not re.match(r'^\w+$', name):
+        raise ValueError(f"Invalid identifier: {name}")
+    return name
+
+
+def approximate_row_count(session, table_name):
+    """
+    Row count from the planner statistics in pg_class.
+    Falls back to COUNT(*) only when the table has never been analyzed.
+    """
+    check_identifier(table_name)
+    estimate = session.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:t AS regclass)"),
+        {"t": table_name}
+    ).scalar()
+    if estimate is None or estimate < 0:
+        estimate = session.execute(text(f"SELECT COUNT(*) FROM {table_name}")).scalar()
+    return int(estimate)
+
+
+def window_predicate(window, params):
+    """
+    SQL condition for a (column, start, end) time window, adding its bind
+    parameters to `params`; None when there is no window. A literal range on
+    the partition key lets PostgreSQL skip every other partition.
+    """
+    if window is None:
+        return None
+    column, start, end = window
+    check_identifier(column)
+    params.update({"window_start": start, "window_end": end})
+    return f"{column} >= :window_start AND {column} < :window_end"
+
+
+def window_partition(session, table_name, window):
+    """Name of the partition holding exactly `window`, if there is one."""
+    if window is None:
+        return None
+    table = get_table(session, table_name)
+    _, start, end = window
+    return next((p.name for p in table.partitions if p.start == start and p.end == end), None)
+
+
+def fetch_page(session, table_name, pk_column, after=None, page_size=50, prefetch=True, window=None):
+    """
+    Keyset page of `table_name` ordered by its primary key, optionally
+    limited to a (column, start, end) time window.
+    Returns (page_df, next_page_df); the next page is read in the same
+    round trip when `prefetch` is set, otherwise it is None.
+    """
+    check_identifier(table_name)
+    check_identifier(pk_column)
+    limit = page_size * 2 if prefetch else page_size
+    params = {"after": after, "limit": limit}
+    conditions = [f"{pk_column} > :after"] if after is not None else []
+    in_window = window_predicate(window, params)
+    if in_window:
+        conditions.append(in_window)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = text(f"SELECT * FROM {table_name} {where} ORDER BY {pk_column} LIMIT :limit")
+    # pages of small reference tables come from the result cache
+    df = read_frame(session, query, params, tables=(table_name,) if table_name in RESULT_CACHE_TABLES else ())
+    page = df.iloc[:page_size].reset_index(drop=True)
+    next_page = df.iloc[page_size:].reset_index(drop=True) if prefetch else None
+    return page, next_page
+
+
+def fetch_row(session, table_name, pk_column, key, window=None):
+    """
+    The row of `table_name` with primary key `key` as a dict, or None. It is
+    looked for in `window` first, so a row of the month being browsed costs
+    one partition's index; other months are searched only when it is not there.
+    """
+    check_identifier(table_name)
+    check_identifier(pk_column)
+    params = {"pk": key}
+    in_window = window_predicate(window, params)
+    if in_window:
+        row = session.execute(text(f"SELECT * FROM {table_name} WHERE {pk_column} = :pk AND {in_window}"),
+                              params).fetchone()
+        if row:
+            return dict(row._mapping)
+    row = session.execute(text(f"SELECT * FROM {table_name} WHERE {pk_column} = :pk"), {"pk": key}).fetchone()
+    return dict(row._mapping) if row else None
+
+
+def _last_key(page, pk_column):
+    # a plain Python value: psycopg2 cannot send NumPy scalars as parameters
+    return page[pk_column].tolist()[-1]
+
+
+def _browser_state(table_name):
+    key = f"browser_{table_name}"
+    if key not in st.session_state:
+        # stack of page start keys; None is the first page
+        st.session_state[key] = {"stack": [None], "prefetched": {}, "page_size": PAGE_SIZES[1]}
+    return st.session_state[key]
+
+
+def month_window(session, table_name):
+    """
+    Sidebar month picker for tables partitioned by time. Returns the
+    (column, start, end) window of the chosen monthly partition, or None for
+    unpartitioned tables and "All months". Defaults to the latest month up
+    to now that has rows, so the first page reads a single partition.
+    """
+    table = get_table(session, table_name)
+    if table is None or not table.partition_key or not table.partitions:
+        return None
+    months = list(reversed(table.partitions))
+    sizes = dict(session.execute(
+        text("SELECT relname, reltuples FROM pg_class WHERE relname = ANY(:names)"),
+        {"names": [p.name for p in months]}
+    ).fetchall())
+    now = datetime.datetime.now()
+    default = next((i for i, p in enumerate(months) if p.start <= now and sizes.get(p.name, 0) > 0),
+                   next((i for i, p in enumerate(months) if sizes.get(p.name, 0) > 0), None))
+    labels = ["All months"] + [f"{p.start:%Y-%m}" for p in months]
+    choice = st.sidebar.selectbox(f"Month ({table.partition_key})", labels,
+                                  index=0 if default is None else default + 1,
+                                  key=f"month_{table_name}")
+    if choice == "All months":
+        return None
+    month = months[labels.index(choice) - 1]
+    return table.partition_key, month.start, month.end
+
+
+def paginated_table(session, table_name, pk_column, window=None):
+    """
+    Render one page of `table_name` with Previous/Next navigation, limited
+    to `window` when given. Only the visible page (and the prefetched next
+    page) is held in memory. Returns the DataFrame currently displayed.
+    """
+    state = _browser_state(table_name)
+    if state.get("window") != window:
+        state.update({"stack": [None], "prefetched": {}, "window": window})
+
+    page_size = st.selectbox("Rows per page", PAGE_SIZES,
+                             index=PAGE_SIZES.index(state["page_size"]),
+                             key=f"page_size_{table_name}")
+    if page_size != state["page_size"]:
+        state.update({"stack": [None], "prefetched": {}, "page_size": page_size})
+
+    after = state["stack"][-1]
+    page = state["prefetched"].pop(after, None)
+    note_cache("table_browser.prefetch", page is not None)
+    if page is None:
+        page, next_page = fetch_page(session, table_name, pk_column, after, page_size, window=window)
+        if not page.empty and next_page is not None and not next_page.empty:
+            state["prefetched"][_last_key(page, pk_column)] = next_page
+
+    total = approximate_row_count(session, window_partition(session, table_name, window) or table_name)
+    page_num = len(state["stack"])
+    total_pages = max((total - 1) // page_size + 1, 1)
+    st.caption(f"Page {page_num} of ~{total_pages} · ~{total:,} rows")
+    # ids of airports, gates, statuses, ... are shown with their names
+    st.dataframe(decorate(session, page, table_name), use_container_width=True)
+
+    prev_col, next_col = st.columns(2)
+    if prev_col.button("⬅️ Previous", key=f"prev_{table_name}", disabled=page_num == 1):
+        state["stack"].pop()
+        st.rerun()
+    if next_col.button("Next ➡️", key=f"next_{table_name}", disabled=len(page) < page_size):
+        state["stack"].append(_last_key(page, pk_column))
+        st.rerun()
+
+    return page
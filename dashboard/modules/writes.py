@@ -0,0 +1,289 @@
+# modules/writes.py
+import datetime
+import io
+import time
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+import pandas as pd
+import streamlit as st
+from psycopg2.extras import execute_values
+from modules import audit, result_cache
+from modules.catalog import column_map, get_table, insertable_columns
+from modules.table_browser import check_identifier
+
+# Typed, batched writes. Every call validates and converts all rows against
+# the catalog first, sends them as multi-row statements of up to BATCH_SIZE
+# rows and commits once. Audit rows are written in the same transaction, or
+# queued after the commit when AUDIT_MODE=async (see modules/audit.py).
+BATCH_SIZE = 1000
+
+WriteResult = namedtuple("WriteResult", "rows seconds ids")
+
+INTEGER_TYPES = ("smallint", "integer", "bigint")
+FLOAT_TYPES = ("real", "double precision")
+TIMESTAMP_TYPES = ("timestamp without time zone", "timestamp with time zone")
+TRUE_VALUES = {"true", "t", "yes", "y", "1"}
+FALSE_VALUES = {"false", "f", "no", "n", "0"}
+# a value in rows given to prepare_rows that sets the column to NULL; blank
+# values are dropped instead, so that defaults apply
+NULL = object()
+
+
+class WriteError(ValueError):
+    """A row failed validation; nothing was written."""
+
+    def __init__(self, row, column, message):
+        super().__init__(f"Row {row}, {column}: {message}")
+        self.row = row
+        self.column = column
+
+
+def is_blank(value):
+    return value is None or (isinstance(value, str) and value.strip() == "") or (
+        isinstance(value, float) and value != value)
+
+
+def coerce(column, value):
+    """Convert a user-supplied value to the Python type psycopg2 sends for `column`."""
+    if is_blank(value):
+        return None
+    if not isinstance(value, str):
+        return value
+    value = value.strip()
+    data_type = column.data_type
+    if data_type in INTEGER_TYPES:
+        return int(value)
+    if data_type == "numeric":
+        try:
+            return Decimal(value)
+        except InvalidOperation:
+            raise ValueError(f"invalid number {value!r}")
+    if data_type in FLOAT_TYPES:
+        return float(value)
+    if data_type == "boolean":
+        if value.lower() in TRUE_VALUES:
+            return True
+        if value.lower() in FALSE_VALUES:
+            return False
+        raise ValueError(f"invalid boolean {value!r}")
+    if data_type == "date":
+        return datetime.date.fromisoformat(value)
+    if data_type in TIMESTAMP_TYPES:
+        return datetime.datetime.fromisoformat(value)
+    if column.max_length and len(value) > column.max_length:
+        raise ValueError(f"longer than {column.max_length} characters")
+    return value
+
+
+def prepare_rows(session, table_name, rows, key=None):
+    """
+    Validate and convert `rows` (dicts of column -> value, e.g. strings from a
+    form or CSV). Blank values are dropped so column defaults apply, NULL
+    sets the column to NULL; `key` must be present in every row. Raises WriteError on the first bad value.
+    """
+    columns = column_map(session, table_name)
+    prepared = []
+    for n, row in enumerate(rows, start=1):
+        out = {}
+        for name, value in row.items():
+            if name not in columns:
+                raise WriteError(n, name, f"no such column in {table_name}")
+            if columns[name].is_generated:
+                raise WriteError(n, name, "generated column, computed by the database")
+            if value is NULL:
+                if not columns[name].nullable:
+                    raise WriteError(n, name, "value required")
+                out[name] = None
+                continue
+            try:
+                value = coerce(columns[name], value)
+            except ValueError as e:
+                raise WriteError(n, name, e)
+            if value is not None:
+                out[name] = value
+        if key and key not in out:
+            raise WriteError(n, key, "missing key")
+        prepared.append(out)
+    return prepared
+
+
+def _check_required(session, table_name, rows):
+    required = [c.name for c in insertable_columns(session, table_name)
+                if not c.nullable and c.default is None]
+    for n, row in enumerate(rows, start=1):
+        for name in required:
+            if name not in row:
+                raise WriteError(n, name, "value required")
+
+
+def _groups(rows):
+    """Rows grouped by the exact set of columns they set, in first-seen order."""
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(row), []).append(row)
+    return groups.items()
+
+
+def _run(session, table_name, action, admin_id, write):
+    """Runs `write(cursor) -> ids`, audits the ids and commits once."""
+    start = time.perf_counter()
+    cursor = session.connection().connection.cursor()
+    try:
+        ids = write(cursor)
+        pending = audit.record(cursor, table_name, action, ids, admin_id)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        cursor.close()
+    # this process sees its own change at once; others hear of it through NOTIFY
+    result_cache.invalidate(table_name)
+    audit.submit(pending)
+    return WriteResult(len(ids), time.perf_counter() - start, ids)
+
+
+def insert_rows(session, table_name, pk_column, rows, admin_id):
+    """Multi-row INSERT of `rows`; returns a WriteResult with the new keys."""
+    check_identifier(table_name)
+    check_identifier(pk_column)
+    rows = prepare_rows(session, table_name, rows)
+    _check_required(session, table_name, rows)
+
+    def write(cursor):
+        ids = []
+        for cols, group in _groups(rows):
+            if not cols:
+                for _ in group:
+                    cursor.execute(f"INSERT INTO {table_name} DEFAULT VALUES RETURNING {pk_column}")
+                    ids.append(cursor.fetchone()[0])
+                continue
+            inserted = execute_values(
+                cursor,
+                f"INSERT INTO {table_name} ({', '.join(cols)}) VALUES %s RETURNING {pk_column}",
+                [tuple(row[c] for c in cols) for row in group],
+                page_size=BATCH_SIZE, fetch=True
+            )
+            ids += [r[0] for r in inserted]
+        return ids
+
+    return _run(session, table_name, "INSERT", admin_id, write)
+
+
+def update_rows(session, table_name, pk_column, rows, admin_id, current=None):
+    """
+    Multi-row UPDATE: every row carries the primary key plus the columns to
+    change, joined against a typed VALUES list. `current` may give the rows'
+    present values (e.g. the record an edit form was filled from), in order:
+    on a partitioned table each row is then matched on its partition key too,
+    so only its own partition is searched. Returns the keys updated.
+    """
+    check_identifier(table_name)
+    check_identifier(pk_column)
+    rows = prepare_rows(session, table_name, rows, key=pk_column)
+    columns = column_map(session, table_name)
+    table = get_table(session, table_name)
+    partition_key = table.partition_key if current is not None and table else None
+    located = None
+    if partition_key:
+        # the value the row has now, under a name no column can clash with
+        located = f"current_{partition_key}"
+        rows = [{**row, located: old[partition_key]} for row, old in zip(rows, current)]
+
+    def write(cursor):
+        ids = []
+        for cols, group in _groups(rows):
+            cols = [pk_column] + [c for c in cols if c not in (pk_column, located)]
+            if len(cols) == 1:
+                continue
+            assignments = ", ".join(f"{c} = v.{c}" for c in cols[1:])
+            types = [columns[c].sql_type for c in cols]
+            where = f"t.{pk_column} = v.{pk_column}"
+            if located:
+                cols, types = cols + [located], types + [columns[partition_key].sql_type]
+                where += f" AND t.{partition_key} = v.{located}"
+            template = "(" + ", ".join(f"%s::{t}" for t in types) + ")"
+            updated = execute_values(
+                cursor,
+                f"""UPDATE {table_name} AS t
+                    SET {assignments}
+                    FROM (VALUES %s) AS v ({', '.join(cols)})
+                    WHERE {where}
+                    RETURNING t.{pk_column}""",
+                [tuple(row[c] for c in cols) for row in group],
+                template=template, page_size=BATCH_SIZE, fetch=True
+            )
+            ids += [r[0] for r in updated]
+        return ids
+
+    return _run(session, table_name, "UPDATE", admin_id, write)
+
+
+def delete_rows(session, table_name, pk_column, keys, admin_id):
+    """DELETE by primary key in batches; returns the keys that existed."""
+    check_identifier(table_name)
+    check_identifier(pk_column)
+    column = column_map(session, table_name)[pk_column]
+    try:
+        keys = [coerce(column, k) for k in keys if not is_blank(k)]
+    except ValueError as e:
+        raise WriteError(1, pk_column, e)
+
+    def write(cursor):
+        ids = []
+        for i in range(0, len(keys), BATCH_SIZE):
+            cursor.execute(
+                f"DELETE FROM {table_name} WHERE {pk_column} = ANY(%s) RETURNING {pk_column}",
+                (keys[i:i + BATCH_SIZE],)
+            )
+            ids += [r[0] for r in cursor.fetchall()]
+        return ids
+
+    return _run(session, table_name, "DELETE", admin_id, write)
+
+
+def describe(result, verb):
+    rate = result.rows / result.seconds if result.seconds else 0
+    return f"✅ {verb} {result.rows:,} rows in {result.seconds:.2f}s ({rate:,.0f} rows/sec)"
+
+
+def read_csv_rows(data):
+    """Rows from CSV text or an uploaded file, every value kept as a string."""
+    if isinstance(data, str):
+        data = io.StringIO(data)
+    df = pd.read_csv(data, dtype=str, keep_default_na=False)
+    return df.to_dict("records")
+
+
+def bulk_write_panel(session, table_name, pk_column, admin_id):
+    """Paste or upload CSV rows and insert, update (by key) or delete them in one transaction."""
+    with st.expander("📥 Bulk changes from CSV"):
+        action = st.radio("Action", ["Insert", "Update", "Delete"], horizontal=True, key="bulk_action")
+        if action == "Insert":
+            cols = ", ".join(c.name for c in insertable_columns(session, table_name))
+            st.caption(f"Header row with any of: {cols}")
+        else:
+            st.caption(f"Header row must include `{pk_column}`"
+                       + ("" if action == "Delete" else " plus the columns to change"))
+        upload = st.file_uploader("CSV file", type=["csv"], key="bulk_file")
+        pasted = st.text_area("…or paste CSV", key="bulk_text")
+
+        if st.button(f"Run bulk {action.lower()}"):
+            source = upload if upload is not None else pasted
+            if not source:
+                st.warning("Provide a CSV file or pasted rows first.")
+                return
+            try:
+                rows = read_csv_rows(source)
+                if action == "Insert":
+                    result = insert_rows(session, table_name, pk_column, rows, admin_id)
+                    st.success(describe(result, "Inserted"))
+                elif action == "Update":
+                    result = update_rows(session, table_name, pk_column, rows, admin_id)
+                    st.success(describe(result, "Updated"))
+                else:
+                    keys = [row.get(pk_column) for row in rows]
+                    result = delete_rows(session, table_name, pk_column, keys, admin_id)
+                    st.success(describe(result, "Deleted"))
+            except Exception as e:
+                st.error(f"❌ Bulk {action.lower()} failed, nothing was changed: {e}")
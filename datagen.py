@@ -0,0 +1,491 @@
+"""
+Deterministic, vectorized synthetic data for the airport schema.
+
+Every table is built column-wise with NumPy in chunks. Rows are drawn in
+fixed blocks of SEED_BLOCK, each from its own generator seeded with (seed,
+table, block start), and a chunk is a whole number of blocks. So the same
+`--seed` and `--scale` always produce the same rows, whatever the chunk
+size, the number of worker processes or the order chunks finish in.
+
+    python datagen.py --scale 10 --format parquet --output-dir data/
+"""
+import argparse
+import os
+import zlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+BASE_RECORDS = 100000  # rows per large table at --scale 1
+NUM_AIRPORTS = 100
+DEFAULT_EPOCH = "2025-01-01"
+
+LETTERS = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+FLIGHT_STATUSES = ['Scheduled', 'Cancelled', 'Delayed', 'Departed']
+FLIGHT_STATUS_WEIGHTS = [0.78, 0.04, 0.12, 0.06]
+BOOKING_STATUSES = ['Confirmed', 'Cancelled']
+BOOKING_STATUS_WEIGHTS = [0.9, 0.1]
+PAYMENT_METHODS = ['Credit Card', 'Debit Card', 'PayPal', 'Bank Transfer', 'Cryptocurrency']
+PAYMENT_METHOD_WEIGHTS = [0.45, 0.3, 0.15, 0.08, 0.02]
+ADMIN_ROLES = ['SuperAdmin', 'Manager', 'Staff']
+AIRCRAFT_TYPES = np.array(['Boeing 737', 'Boeing 747', 'Airbus A320', 'Airbus A380', 'Embraer E190'])
+AIRCRAFT_WEIGHTS = [0.35, 0.08, 0.35, 0.04, 0.18]
+# seats every aircraft layout has (aircraft_layouts, migrations/0003), so each
+# generated seat exists whatever aircraft flies the schedule
+SEAT_LETTERS = np.array(['A', 'B', 'C', 'D'])
+SEAT_ROWS = 25
+SEATS_PER_SCHEDULE = SEAT_ROWS * len(SEAT_LETTERS)
+MESSAGES = np.array([
+    "Your flight has been confirmed",
+    "Your flight is delayed by 1 hour",
+    "Gate change for your flight",
+    "Your booking has been cancelled",
+    "Check-in is now open for your flight",
+    "Your payment was successful",
+    "Boarding has begun for your flight"
+])
+FIRST_NAMES = np.array([
+    "James", "Mary", "Ahmed", "Fatima", "Wei", "Mei", "Carlos", "Sofia", "Ivan", "Olga",
+    "Yasir", "Ayesha", "John", "Emma", "Ali", "Sara", "Hiroshi", "Yuki", "Luca", "Giulia",
+    "Omar", "Layla", "David", "Anna", "Raj", "Priya", "Lucas", "Camila", "Noah", "Zara",
+])
+LAST_NAMES = np.array([
+    "Smith", "Khan", "Wang", "Garcia", "Ivanov", "Ahmed", "Brown", "Tanaka", "Rossi", "Silva",
+    "Müller", "Hassan", "Johnson", "Chen", "Lopez", "Petrov", "Ali", "Sato", "Kumar", "Martin",
+])
+COUNTRIES = np.array([
+    "United States", "Pakistan", "China", "India", "United Kingdom", "Germany", "France",
+    "Brazil", "Japan", "United Arab Emirates", "Turkey", "Canada", "Australia", "Spain",
+    "Italy", "Mexico", "Saudi Arabia", "Russia", "Egypt", "Nigeria",
+])
+SYLLABLES = np.array(["ka", "ra", "chi", "lon", "dub", "is", "tan", "bul", "ma", "dri",
+                      "par", "is", "ber", "lin", "to", "kyo", "sa", "no", "vi", "ta"])
+EMAIL_DOMAINS = np.array(["gmail.com", "yahoo.com", "outlook.com", "hotmail.com", "proton.me"])
+
+TABLE_COLUMNS = {
+    'flight_statuses': ['status_name'],
+    'booking_statuses': ['status_name'],
+    'payment_methods': ['method_name'],
+    'admin_roles': ['role_name'],
+    'airports': ['name', 'city', 'country', 'code'],
+    'terminals': ['airport_id', 'terminal_code'],
+    'gates': ['terminal_id', 'gate_code'],
+    'admins': ['full_name', 'email', 'password', 'role_id'],
+    'flights': ['flight_number', 'origin_airport_id', 'destination_airport_id', 'aircraft_type', 'status_id'],
+    'flight_schedules': ['flight_id', 'departure_time', 'arrival_time', 'gate_id'],
+    'passengers': ['full_name', 'email', 'phone_number', 'passport_number', 'nationality'],
+    'bookings': ['passenger_id', 'schedule_id', 'seat_number', 'status_id', 'booked_at'],
+    'payments': ['booking_id', 'amount', 'method_id', 'payment_status', 'payment_date'],
+    'notifications': ['passenger_id', 'message', 'sent_at'],
+}
+# Small tables built in one piece, in dependency order
+REFERENCE_TABLES = [
+    'flight_statuses', 'booking_statuses', 'payment_methods', 'admin_roles',
+    'airports', 'terminals', 'gates', 'admins',
+]
+# Large tables built in chunks, in dependency order
+CHUNKED_TABLES = ['flights', 'flight_schedules', 'passengers', 'bookings', 'payments', 'notifications']
+
+# Gates: a departure holds its gate from an hour before to 15 minutes after
+# (gate_block() in migrations/0008). Each gate's timeline is cut into slots
+# one block plus some slack long, and every schedule gets its own slot.
+SCHEDULE_DAYS = (-30, 90)
+GATE_BLOCK = (np.timedelta64(60, "m"), np.timedelta64(15, "m"))
+GATE_SLOT_MINUTES = 90
+
+# rows per generator seed; part of the dataset's identity, unlike the chunk size
+SEED_BLOCK = 10000
+
+# `num_schedules` is only known after the schedules have been generated
+Spec = namedtuple("Spec", ["scale", "seed", "epoch", "num_schedules"], defaults=[None])
+
+
+def make_spec(scale=1.0, seed=42, epoch=DEFAULT_EPOCH):
+    return Spec(float(scale), int(seed), str(epoch))
+
+
+def num_records(spec):
+    return max(int(BASE_RECORDS * spec.scale), 1)
+
+
+def _rng(spec, table, start=0):
+    return np.random.default_rng([spec.seed, zlib.crc32(table.encode()), start])
+
+
+def _epoch(spec):
+    return np.datetime64(spec.epoch, "s")
+
+
+def _offsets(rng, size, low_days, high_days, step=60):
+    """Random second offsets between `low_days` and `high_days`, rounded to `step` seconds."""
+    seconds = rng.integers(low_days * 86400 // step, high_days * 86400 // step, size) * step
+    return seconds.astype("timedelta64[s]")
+
+
+def _codes(index, letters, digits):
+    """Unique codes for `index`: `letters` letters followed by `digits` zero-padded digits."""
+    number, rest = index % 10 ** digits, index // 10 ** digits
+    prefix = np.full(len(index), "", dtype=object)
+    for _ in range(letters):
+        rest, pos = np.divmod(rest, len(LETTERS))
+        prefix = LETTERS[pos].astype(object) + prefix
+    if not digits:
+        return prefix
+    return prefix + pd.Series(number).astype(str).str.zfill(digits).to_numpy(dtype=object)
+
+
+def _names(rng, size):
+    first = FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), size)].astype(object)
+    last = LAST_NAMES[rng.integers(0, len(LAST_NAMES), size)].astype(object)
+    return first, last
+
+
+@lru_cache(maxsize=4)
+def reference_data(spec):
+    """
+    Lookup tables, airports, terminals, gates and admins, plus the arrays the
+    chunk builders need: airport popularity and each airport's gate id range.
+    Cached so every worker process builds them once.
+    """
+    rng = _rng(spec, 'reference')
+    frames = {
+        'flight_statuses': pd.DataFrame({'status_name': FLIGHT_STATUSES}),
+        'booking_statuses': pd.DataFrame({'status_name': BOOKING_STATUSES}),
+        'payment_methods': pd.DataFrame({'method_name': PAYMENT_METHODS}),
+        'admin_roles': pd.DataFrame({'role_name': ADMIN_ROLES}),
+    }
+
+    # Airports: city names from syllables, unique three-letter codes
+    n = NUM_AIRPORTS
+    city = SYLLABLES[rng.integers(0, len(SYLLABLES), (n, 3))]
+    city = pd.Series(["".join(parts) for parts in city]).str.capitalize().to_numpy(dtype=object)
+    codes = _codes(rng.choice(26 ** 3, n, replace=False), 3, 0)
+    frames['airports'] = pd.DataFrame({
+        'name': city + " International Airport",
+        'city': city,
+        'country': COUNTRIES[rng.integers(0, len(COUNTRIES), n)],
+        'code': codes,
+    })
+
+    # Hub skew: traffic follows a Zipf-like curve over a random airport ranking
+    rank = rng.permutation(n) + 1
+    popularity = 1.0 / rank ** 1.1
+    popularity /= popularity.sum()
+
+    # Busier airports get more terminals (3-5) and every terminal 10-20 gates
+    terminals_per_airport = np.where(rank <= n // 10, 5, rng.integers(3, 5, n))
+    terminal_airport = np.repeat(np.arange(1, n + 1), terminals_per_airport)
+    terminal_number = np.concatenate([np.arange(1, k + 1) for k in terminals_per_airport])
+    frames['terminals'] = pd.DataFrame({
+        'airport_id': terminal_airport,
+        'terminal_code': "T" + pd.Series(terminal_number).astype(str),
+    })
+
+    gates_per_terminal = rng.integers(10, 21, len(terminal_airport))
+    gate_terminal = np.repeat(np.arange(1, len(terminal_airport) + 1), gates_per_terminal)
+    gate_letter = np.concatenate([np.arange(k) for k in gates_per_terminal])
+    frames['gates'] = pd.DataFrame({
+        'terminal_id': gate_terminal,
+        'gate_code': pd.Series(gate_terminal).astype(str) + LETTERS[gate_letter],
+    })
+
+    # Gate ids are assigned in order, so each airport owns one contiguous range
+    gates_per_airport = np.bincount(terminal_airport, weights=gates_per_terminal, minlength=n + 1)[1:]
+    gate_start = np.concatenate([[1], 1 + np.cumsum(gates_per_airport)[:-1]]).astype(np.int64)
+
+    first, last = _names(rng, 20)
+    frames['admins'] = pd.DataFrame({
+        'full_name': first + " " + last,
+        'email': pd.Series(first + "." + last).str.lower() + "." + pd.Series(np.arange(20)).astype(str) + "@airport.example",
+        'password': "hashed_password_placeholder",
+        'role_id': rng.integers(1, len(ADMIN_ROLES) + 1, 20),
+    })
+    return frames, popularity, gate_start, gates_per_airport.astype(np.int64)
+
+
+def _flight_routes(spec, start, count):
+    _, popularity, _, _ = reference_data(spec)
+    rng = _rng(spec, 'routes', start)
+    origin = rng.choice(NUM_AIRPORTS, count, p=popularity)
+    destination = rng.choice(NUM_AIRPORTS, count, p=popularity)
+    same = destination == origin
+    # shift clashes to any other airport
+    destination[same] = (origin[same] + rng.integers(1, NUM_AIRPORTS, same.sum())) % NUM_AIRPORTS
+    return origin + 1, destination + 1
+
+
+def flights_frame(spec, start, count):
+    rng = _rng(spec, 'flights', start)
+    origin, destination = _flight_routes(spec, start, count)
+    return pd.DataFrame({
+        'flight_number': _codes(np.arange(start, start + count), 3, 4),
+        'origin_airport_id': origin,
+        'destination_airport_id': destination,
+        'aircraft_type': AIRCRAFT_TYPES[rng.choice(len(AIRCRAFT_TYPES), count, p=AIRCRAFT_WEIGHTS)],
+        'status_id': rng.choice(len(FLIGHT_STATUSES), count, p=FLIGHT_STATUS_WEIGHTS) + 1,
+    })
+
+
+@lru_cache(maxsize=4)
+def _airport_schedule_offsets(spec):
+    """
+    {flights block start: schedules each origin airport had in the earlier
+    blocks}, so every block can number its schedules per airport without
+    seeing the others. Rebuilds only the routes and per-flight counts.
+    """
+    total = num_records(spec)
+    offsets = {}
+    running = np.zeros(NUM_AIRPORTS, dtype=np.int64)
+    for start in range(0, total, SEED_BLOCK):
+        count = min(SEED_BLOCK, total - start)
+        offsets[start] = running.copy()
+        origin, _ = _flight_routes(spec, start, count)
+        per_flight = _rng(spec, 'flight_schedules', start).integers(1, 4, count)
+        running += np.bincount(origin - 1, weights=per_flight, minlength=NUM_AIRPORTS).astype(np.int64)
+    return offsets
+
+
+def _gate_slots(spec, origin, rank):
+    """
+    A distinct (gate, time slot) at `origin` for each per-airport `rank`: an
+    affine permutation of the airport's gates x slots, like _seat_slots.
+    Ranks past an airport's capacity get no gate (NA, a remote stand).
+    Returns (gate, slot start in minutes from the first schedule day).
+    """
+    _, _, gate_start, gate_count = reference_data(spec)
+    slots_per_gate = (SCHEDULE_DAYS[1] - SCHEDULE_DAYS[0]) * 24 * 60 // GATE_SLOT_MINUTES
+    capacity = gate_count * slots_per_gate
+    step = np.full(NUM_AIRPORTS, 2654435761, dtype=np.int64) % capacity
+    while (bad := np.gcd(step, capacity) != 1).any():
+        step[bad] += 1
+    airport_capacity = capacity[origin]
+    position = (rank * step[origin] + spec.seed) % airport_capacity
+    gate = gate_start[origin] + position % gate_count[origin]
+    # start every gate's slot grid at a different minute, so departures
+    # are spread over the whole day
+    minute = position // gate_count[origin] * GATE_SLOT_MINUTES + gate * 35 % GATE_SLOT_MINUTES
+    gate = pd.array(gate, dtype="Int64")
+    gate[rank >= airport_capacity] = pd.NA
+    return gate, minute
+
+
+def flight_schedules_frame(spec, start, count):
+    """
+    1-3 schedules for each of flights start+1 .. start+count, departing from
+    an origin gate. No two schedules hold the same gate at the same time.
+    """
+    rng = _rng(spec, 'flight_schedules', start)
+    origin, _ = _flight_routes(spec, start, count)
+    per_flight = rng.integers(1, 4, count)
+    flight_id = np.repeat(np.arange(start + 1, start + count + 1), per_flight)
+    origin = np.repeat(origin, per_flight) - 1
+    size = len(flight_id)
+
+    # number the schedules per origin airport, continuing from earlier blocks
+    order = np.argsort(origin, kind="stable")
+    first = np.searchsorted(origin[order], origin[order])
+    rank = np.empty(size, dtype=np.int64)
+    rank[order] = np.arange(size) - first
+    rank += _airport_schedule_offsets(spec)[start][origin]
+
+    gate, minute = _gate_slots(spec, origin, rank)
+    # the block starts inside the slot and ends before the next one
+    slack = (GATE_SLOT_MINUTES - (GATE_BLOCK[0] + GATE_BLOCK[1]) // np.timedelta64(1, "m")) // 5
+    slot_start = _epoch(spec) + np.timedelta64(SCHEDULE_DAYS[0], "D") + minute.astype("timedelta64[m]")
+    departure = slot_start + GATE_BLOCK[0] + (rng.integers(0, slack + 1, size) * 5).astype("timedelta64[m]")
+    duration = (rng.integers(1, 13, size) * 3600).astype("timedelta64[s]")
+    return pd.DataFrame({
+        'flight_id': flight_id,
+        'departure_time': departure.astype("datetime64[s]"),
+        'arrival_time': (departure + duration).astype("datetime64[s]"),
+        'gate_id': gate,
+    })
+
+
+def passengers_frame(spec, start, count):
+    rng = _rng(spec, 'passengers', start)
+    index = np.arange(start, start + count)
+    first, last = _names(rng, count)
+    domain = EMAIL_DOMAINS[rng.integers(0, len(EMAIL_DOMAINS), count)].astype(object)
+    phone = pd.Series(rng.integers(10 ** 9, 10 ** 10, count)).astype(str).to_numpy(dtype=object)
+    return pd.DataFrame({
+        'full_name': first + " " + last,
+        'email': (pd.Series(first + "." + last).str.lower() + "." + pd.Series(index).astype(str)).to_numpy(dtype=object) + "@" + domain,
+        'phone_number': "+1-" + phone,
+        'passport_number': _codes(index, 2, 7),
+        'nationality': COUNTRIES[rng.integers(0, len(COUNTRIES), count)],
+    })
+
+
+def _seat_slots(spec, index):
+    """
+    Distinct (schedule, seat) slots for booking `index`, so no seat is sold
+    twice: an affine permutation of the schedule x seat space, computed
+    independently in every chunk.
+    """
+    slots = spec.num_schedules * SEATS_PER_SCHEDULE
+    if num_records(spec) > slots:
+        raise ValueError("more bookings than seats on all schedules")
+    step = 2654435761 % slots or 1
+    while np.gcd(step, slots) != 1:
+        step += 1
+    slot = (index * step + spec.seed) % slots
+    return slot // SEATS_PER_SCHEDULE + 1, slot % SEATS_PER_SCHEDULE
+
+
+def bookings_frame(spec, start, count):
+    rng = _rng(spec, 'bookings', start)
+    schedule_id, seat = _seat_slots(spec, np.arange(start, start + count, dtype=np.int64))
+    seat_row = pd.Series(seat // len(SEAT_LETTERS) + 1).astype(str).to_numpy(dtype=object)
+    return pd.DataFrame({
+        'passenger_id': rng.integers(1, num_records(spec) + 1, count),
+        'schedule_id': schedule_id,
+        'seat_number': seat_row + SEAT_LETTERS[seat % len(SEAT_LETTERS)].astype(object),
+        'status_id': rng.choice(len(BOOKING_STATUSES), count, p=BOOKING_STATUS_WEIGHTS) + 1,
+        'booked_at': _epoch(spec) - _offsets(rng, count, 0, 60),
+    })
+
+
+def payments_frame(spec, start, count):
+    """One payment for each of bookings start+1 .. start+count."""
+    rng = _rng(spec, 'payments', start)
+    amount = np.clip(rng.lognormal(np.log(450), 0.6, count), 100, 2000).round(2)
+    return pd.DataFrame({
+        'booking_id': np.arange(start + 1, start + count + 1),
+        'amount': amount,
+        'method_id': rng.choice(len(PAYMENT_METHODS), count, p=PAYMENT_METHOD_WEIGHTS) + 1,
+        'payment_status': np.where(rng.random(count) > 0.1, 'Completed', 'Failed'),
+        'payment_date': _epoch(spec) - _offsets(rng, count, 0, 60),
+    })
+
+
+def notifications_frame(spec, start, count):
+    rng = _rng(spec, 'notifications', start)
+    return pd.DataFrame({
+        'passenger_id': rng.integers(1, num_records(spec) + 1, count),
+        'message': MESSAGES[rng.integers(0, len(MESSAGES), count)],
+        'sent_at': _epoch(spec) - _offsets(rng, count, 0, 60),
+    })
+
+
+FRAME_BUILDERS = {
+    'flights': flights_frame,
+    'flight_schedules': flight_schedules_frame,
+    'passengers': passengers_frame,
+    'bookings': bookings_frame,
+    'payments': payments_frame,
+    'notifications': notifications_frame,
+}
+
+
+def build_chunk(args):
+    """Rows start+1 .. start+count of `table`, built one seed block at a time."""
+    table, spec, start, count = args
+    blocks = [FRAME_BUILDERS[table](spec, block, min(SEED_BLOCK, start + count - block))
+              for block in range(start, start + count, SEED_BLOCK)]
+    df = blocks[0] if len(blocks) == 1 else pd.concat(blocks, ignore_index=True)
+    return df[TABLE_COLUMNS[table]]
+
+
+def copy_chunk(args):
+    """Chunk as (row_count, CSV text) for bulk_loader.parallel_copy."""
+    df = build_chunk(args)
+    return len(df), df.to_csv(index=False, header=False)
+
+
+def chunk_args(table, spec, chunk_size, parent_rows=None):
+    """
+    Work items for `table`. Schedules are chunked by flight and payments by
+    booking, so they need the row count of that parent table. `chunk_size`
+    is rounded to whole seed blocks.
+    """
+    total = parent_rows if table in ('flight_schedules', 'payments') else num_records(spec)
+    chunk_size = max(chunk_size // SEED_BLOCK, 1) * SEED_BLOCK
+    return [(table, spec, start, min(chunk_size, total - start)) for start in range(0, total, chunk_size)]
+
+
+def write_files(spec, output_dir, fmt="csv", workers=None, chunk_size=50000):
+    """Write every table to `output_dir` as CSV or Parquet, one file per table."""
+    os.makedirs(output_dir, exist_ok=True)
+    frames = reference_data(spec)[0]
+    for table in REFERENCE_TABLES:
+        writer = _open_writer(os.path.join(output_dir, table), fmt)
+        writer.write(frames[table])
+        writer.close()
+
+    counts = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for table in CHUNKED_TABLES:
+            parent = {'flight_schedules': 'flights', 'payments': 'bookings'}.get(table)
+            writer = _open_writer(os.path.join(output_dir, table), fmt)
+            counts[table] = 0
+            for df in pool.map(build_chunk, chunk_args(table, spec, chunk_size, counts.get(parent))):
+                writer.write(df)
+                counts[table] += len(df)
+            writer.close()
+            if table == 'flight_schedules':
+                spec = spec._replace(num_schedules=counts[table])
+            print(f"  {table}: {counts[table]:,} rows")
+    return counts
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self.file = open(f"{path}.csv", "w", newline="", encoding="utf-8")
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path):
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+        self.path = f"{path}.parquet"
+        self.writer = None
+
+    def write(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        # one row group per chunk
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def _open_writer(path, fmt):
+    return _ParquetWriter(path) if fmt == "parquet" else _CsvWriter(path)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate the synthetic airport dataset as files.")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help=f"dataset size; 1 means {BASE_RECORDS:,} flights, passengers, bookings and notifications")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--epoch", default=DEFAULT_EPOCH, help="date all timestamps are generated around")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--output-dir", default="data")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=50000,
+                        help="rows per work item, rounded to whole seed blocks; does not change the data")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    write_files(make_spec(args.scale, args.seed, args.epoch), args.output_dir,
+                args.format, args.workers, args.chunk_size)
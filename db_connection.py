@@ -0,0 +1,22 @@
+import os
+import psycopg2
+
+# Database connection parameters (override through the environment)
+DB_NAME = os.environ.get("DB_NAME", "AirportFlightManagement")
+DB_USER = os.environ.get("DB_USER", "yasir")
+DB_PASSWORD = os.environ.get("DB_PASSWORD", "yasir1234")
+DB_HOST = os.environ.get("DB_HOST", "localhost")
+DB_PORT = os.environ.get("DB_PORT", "6677")
+
+
+def connect(**kwargs):
+    """Open a new psycopg2 connection for the command-line scripts."""
+    return psycopg2.connect(
+        dbname=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        host=DB_HOST,
+        port=DB_PORT,
+        client_encoding="utf8",
+        **kwargs
+    )
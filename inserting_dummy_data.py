@@ -1,288 +1,129 @@
-import psycopg2
-from faker import Faker
-import random
+import argparse
+import os
 from datetime import datetime, timedelta
+import datagen
+from bulk_loader import parallel_copy, copy_text, without_secondary_indexes, without_user_triggers
+from db_connection import connect
 
-# Initialize Faker
-fake = Faker()
+CHUNK_SIZE = 50000
 
-# Database connection parameters
-DB_NAME = "AirportFlightManagement"
-DB_USER = "yasir"
-DB_PASSWORD = "yasir1234"
-DB_HOST = "localhost"
-DB_PORT = "6677"
+LOADED_TABLES = [
+    'airports', 'terminals', 'gates', 'flights', 'flight_schedules', 'passengers',
+    'bookings', 'payments', 'admins', 'notifications',
+]
 
-# Connect to PostgreSQL
-conn = psycopg2.connect(
-    dbname=DB_NAME,
-    user=DB_USER,
-    password=DB_PASSWORD,
-    host=DB_HOST,
-    port=DB_PORT
-)
-cursor = conn.cursor()
+# monthly partitioned tables (migration 0007) and their partition keys
+PARTITIONED_TABLES = {
+    'flight_schedules': 'departure_time', 'bookings': 'booked_at',
+    'payments': 'payment_date', 'notifications': 'sent_at',
+}
 
-# Set the number of records you want (adjust as needed)
-NUM_RECORDS = 100000  # For 100k records, adjust based on our system capabilities
 
-def create_dummy_data():
-    print("Starting dummy data generation...")
-    
-    # Clear existing data (optional - comment out if you want to keep existing data)
+def create_partitions(cursor, spec):
+    """Monthly partitions covering every generated timestamp, so no row lands in a DEFAULT partition."""
+    cursor.execute("SELECT to_regproc('create_monthly_partitions') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return
+    epoch = datetime.fromisoformat(spec.epoch).date()
+    first, last = epoch - timedelta(days=61), epoch + timedelta(days=91)
+    for table, key in PARTITIONED_TABLES.items():
+        cursor.execute("SELECT create_monthly_partitions(%s, %s, %s, %s)", (table, key, first, last))
+
+
+def mark_kpis_dirty(cursor):
+    """The KPI dirty-flag triggers are off during the load; flag every view by hand."""
+    cursor.execute("SELECT to_regclass('kpi_refresh_state') IS NOT NULL")
+    if cursor.fetchone()[0]:
+        cursor.execute("UPDATE kpi_refresh_state SET dirty = true")
+
+
+def clear_seat_inventory(cursor):
+    """Seat bitmaps and holds (migration 0009) have no foreign keys and their triggers are off
+    during the load; drop them, to be rebuilt from the bookings on first use."""
+    cursor.execute("SELECT to_regclass('seat_inventory') IS NOT NULL")
+    if cursor.fetchone()[0]:
+        cursor.execute("TRUNCATE TABLE seat_inventory, seat_holds")
+
+
+def notify_table_changes(cursor):
+    """The change-notify triggers are off during the load too; tell the dashboards' caches and boards."""
+    cursor.execute("SELECT pg_notify('table_changes', t) FROM unnest(%s) t",
+                   (list(datagen.REFERENCE_TABLES) + list(datagen.CHUNKED_TABLES),))
+    cursor.execute("SELECT pg_notify('flight_board', 's:*')")
+
+
+def create_dummy_data(conn, spec, workers=None, chunk_size=CHUNK_SIZE):
+    print(f"Starting dummy data generation (scale {spec.scale}, seed {spec.seed})...")
+    started = datetime.now()
+    cursor = conn.cursor()
+
+    # Clear existing data; RESTART IDENTITY makes every table's ids run 1..N,
+    # which is what the generator uses for its foreign keys
     cursor.execute("""
-        TRUNCATE TABLE notifications, payments, bookings, flight_schedules, flights, 
-        passengers, booking_statuses, payment_methods, flight_statuses, 
-        gates, terminals, airports, admins, admin_roles CASCADE;
+        TRUNCATE TABLE notifications, payments, bookings, flight_schedules, flights,
+        passengers, booking_statuses, payment_methods, flight_statuses,
+        gates, terminals, airports, admins, admin_roles RESTART IDENTITY CASCADE;
     """)
+    clear_seat_inventory(cursor)
+    create_partitions(cursor, spec)
     conn.commit()
-    
-    # 1. Create flight statuses
-    flight_statuses = ['Scheduled', 'Cancelled', 'Delayed', 'Departed']
-    for status in flight_statuses:
-        cursor.execute("INSERT INTO flight_statuses (status_name) VALUES (%s)", (status,))
-    conn.commit()
-    
-    # # 2. Create booking statuses
-    booking_statuses = ['Confirmed', 'Cancelled']
-    for status in booking_statuses:
-        cursor.execute("INSERT INTO booking_statuses (status_name) VALUES (%s)", (status,))
-    conn.commit()
-    
-    # # 3. Create payment methods
-    payment_methods = ['Credit Card', 'Debit Card', 'PayPal', 'Bank Transfer', 'Cryptocurrency']
-    for method in payment_methods:
-        cursor.execute("INSERT INTO payment_methods (method_name) VALUES (%s)", (method,))
-    conn.commit()
-    
-    # # 4. Create admin roles
-    admin_roles = ['SuperAdmin', 'Manager', 'Staff']
-    for role in admin_roles:
-        cursor.execute("INSERT INTO admin_roles (role_name) VALUES (%s)", (role,))
-    conn.commit()
-    
-    # 5. Create airports (100 major airports worldwide)
-    print("Creating airports...")
-    airports_data = []
-    for _ in range(100):
-        city = fake.city()
-        country = fake.country()
-        code = fake.unique.lexify(text='???', letters='ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-        name = f"{city} International Airport"
-        airports_data.append((name, city, country, code))
-    
-    cursor.executemany(
-        "INSERT INTO airports (name, city, country, code) VALUES (%s, %s, %s, %s)",
-        airports_data
-    )
-    conn.commit()
-    
-    # # Get all airport IDs
-    cursor.execute("SELECT airport_id FROM airports")
-    airport_ids = [row[0] for row in cursor.fetchall()]
-    
-    # 6. Create terminals (3-5 per airport)
-    print("Creating terminals...")
-    terminals_data = []
-    for airport_id in airport_ids:
-        num_terminals = random.randint(3, 5)
-        for i in range(1, num_terminals + 1):
-            terminal_code = f"T{i}"
-            terminals_data.append((airport_id, terminal_code))
-    
-    cursor.executemany(
-        "INSERT INTO terminals (airport_id, terminal_code) VALUES (%s, %s)",
-        terminals_data
-    )
-    conn.commit()
-    
-    # Get all terminal IDs
-    cursor.execute("SELECT terminal_id FROM terminals")
-    terminal_ids = [row[0] for row in cursor.fetchall()]
-    
-    # 7. Create gates (10-20 per terminal)
-    print("Creating gates...")
-    gates_data = []
-    for terminal_id in terminal_ids:
-        num_gates = random.randint(10, 20)
-        for i in range(1, num_gates + 1):
-            gate_code = f"{terminal_id}{chr(64 + i)}"  # A, B, C, etc.
-            gates_data.append((terminal_id, gate_code))
-    
-    cursor.executemany(
-        "INSERT INTO gates (terminal_id, gate_code) VALUES (%s, %s)",
-        gates_data
-    )
-    conn.commit()
-    
-    # Get all gate IDs
-    cursor.execute("SELECT gate_id FROM gates")
-    gate_ids = [row[0] for row in cursor.fetchall()]
-    
-    # 8. Create flights
-    print("Creating flights...")
-    flights_data = []
-    aircraft_types = ['Boeing 737', 'Boeing 747', 'Airbus A320', 'Airbus A380', 'Embraer E190']
-    
-    for _ in range(NUM_RECORDS ):  # Adjust based on your needs
-        flight_number = fake.unique.bothify(text='??####', letters='ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-        origin = random.choice(airport_ids)
-        destination = random.choice([aid for aid in airport_ids if aid != origin])
-        aircraft = random.choice(aircraft_types)
-        status = random.randint(1, len(flight_statuses))
-        flights_data.append((flight_number, origin, destination, aircraft, status))
-    
-    cursor.executemany(
-        """INSERT INTO flights (flight_number, origin_airport_id, destination_airport_id, 
-           aircraft_type, status_id) VALUES (%s, %s, %s, %s, %s)""",
-        flights_data
-    )
-    conn.commit()
-    
-    # Get all flight IDs
-    cursor.execute("SELECT flight_id FROM flights")
-    flight_ids = [row[0] for row in cursor.fetchall()]
-    
-    # 9. Create flight schedules
-    print("Creating flight schedules...")
-    schedules_data = []
-    
-    for flight_id in flight_ids:
-        # Create 1-3 schedules per flight
-        for _ in range(random.randint(1, 3)):
-            departure_time = fake.date_time_between(start_date='-30d', end_date='+90d')
-            flight_duration = timedelta(hours=random.randint(1, 12))
-            arrival_time = departure_time + flight_duration
-            gate_id = random.choice(gate_ids)
-            schedules_data.append((flight_id, departure_time, arrival_time, gate_id))
-    
-    cursor.executemany(
-        """INSERT INTO flight_schedules (flight_id, departure_time, arrival_time, gate_id) 
-           VALUES (%s, %s, %s, %s)""",
-        schedules_data
-    )
-    conn.commit()
-    
-    # Get all schedule IDs
-    cursor.execute("SELECT schedule_id FROM flight_schedules")
-    schedule_ids = [row[0] for row in cursor.fetchall()]
-    
-    # 10. Create passengers
-    print("Creating passengers...")
-    passengers_data = []
-    for _ in range(NUM_RECORDS):
-        full_name = fake.name()
-        email = fake.unique.email()
-        phone = fake.phone_number()[:20]
-        passport = fake.unique.bothify(text='??#######', letters='ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-        nationality = fake.country()
-        passengers_data.append((full_name, email, phone, passport, nationality))
-    
-    cursor.executemany(
-        """INSERT INTO passengers (full_name, email, phone_number, passport_number, nationality) 
-           VALUES (%s, %s, %s, %s, %s)""",
-        passengers_data
-    )
-    conn.commit()
-    
-    # Get all passenger IDs
-    cursor.execute("SELECT passenger_id FROM passengers")
-    passenger_ids = [row[0] for row in cursor.fetchall()]
-    
-    # 11. Create bookings
-    print("Creating bookings...")
-    bookings_data = []
-    seat_rows = range(1, 40)
-    seat_letters = ['A', 'B', 'C', 'D', 'E', 'F']
-    
-    for _ in range(NUM_RECORDS):
-        passenger_id = random.choice(passenger_ids)
-        schedule_id = random.choice(schedule_ids)
-        seat_number = f"{random.choice(seat_rows)}{random.choice(seat_letters)}"
-        status_id = random.randint(1, len(booking_statuses))
-        booked_at = fake.date_time_between(start_date='-60d', end_date='now')
-        bookings_data.append((passenger_id, schedule_id, seat_number, status_id, booked_at))
-    
-    cursor.executemany(
-        """INSERT INTO bookings (passenger_id, schedule_id, seat_number, status_id, booked_at) 
-           VALUES (%s, %s, %s, %s, %s)""",
-        bookings_data
-    )
-    conn.commit()
-    
-    # Get all booking IDs
-    cursor.execute("SELECT booking_id FROM bookings")
-    booking_ids = [row[0] for row in cursor.fetchall()]
-    
-    # 12. Create payments
-    print("Creating payments...")
-    payments_data = []
-    
-    for booking_id in booking_ids:
-        amount = round(random.uniform(100, 2000), 2)
-        method_id = random.randint(1, len(payment_methods))
-        payment_status = 'Completed' if random.random() > 0.1 else 'Failed'
-        payment_date = fake.date_time_between(start_date='-60d', end_date='now')
-        payments_data.append((booking_id, amount, method_id, payment_status, payment_date))
-    
-    cursor.executemany(
-        """INSERT INTO payments (booking_id, amount, method_id, payment_status, payment_date) 
-           VALUES (%s, %s, %s, %s, %s)""",
-        payments_data
-    )
-    conn.commit()
-    
-    # 13. Create admins
-    print("Creating admins...")
-    admins_data = []
-    for _ in range(20):  # Creating 20 admin accounts
-        full_name = fake.name()
-        email = fake.unique.email()
-        password = "hashed_password_placeholder"  # In real app, use proper password hashing
-        role_id = random.randint(1, len(admin_roles))
-        admins_data.append((full_name, email, password, role_id))
-    
-    cursor.executemany(
-        """INSERT INTO admins (full_name, email, password, role_id) 
-           VALUES (%s, %s, %s, %s)""",
-        admins_data
-    )
-    conn.commit()
-    
-    # 14. Create notifications
-    print("Creating notifications...")
-    notifications_data = []
-    messages = [
-        "Your flight has been confirmed",
-        "Your flight is delayed by 1 hour",
-        "Gate change for your flight",
-        "Your booking has been cancelled",
-        "Check-in is now open for your flight",
-        "Your payment was successful",
-        "Boarding has begun for your flight"
-    ]
-    
-    for _ in range(NUM_RECORDS ):  # Adjust based on your needs
-        passenger_id = random.choice(passenger_ids)
-        message = random.choice(messages)
-        sent_at = fake.date_time_between(start_date='-60d', end_date='now')
-        notifications_data.append((passenger_id, message, sent_at))
-    
-    cursor.executemany(
-        """INSERT INTO notifications (passenger_id, message, sent_at) 
-           VALUES (%s, %s, %s)""",
-        notifications_data
-    )
+
+    with without_secondary_indexes(conn, LOADED_TABLES), without_user_triggers(conn, LOADED_TABLES):
+        # 1-8. Lookup tables, airports, terminals, gates and admins
+        print("Creating reference tables...")
+        frames = datagen.reference_data(spec)[0]
+        for table in datagen.REFERENCE_TABLES:
+            copy_text(cursor, table, datagen.TABLE_COLUMNS[table],
+                      frames[table].to_csv(index=False, header=False), "csv")
+        conn.commit()
+
+        # 9-14. Flights, schedules, passengers, bookings, payments, notifications
+        counts = {}
+        for table in datagen.CHUNKED_TABLES:
+            print(f"Creating {table.replace('_', ' ')}...")
+            parent = {'flight_schedules': 'flights', 'payments': 'bookings'}.get(table)
+            counts[table] = parallel_copy(
+                cursor, table, datagen.TABLE_COLUMNS[table], datagen.copy_chunk,
+                datagen.chunk_args(table, spec, chunk_size, counts.get(parent)),
+                workers, "csv"
+            )
+            conn.commit()
+            if table == 'flight_schedules':
+                spec = spec._replace(num_schedules=counts[table])
+
+    # a seat map opened while bookings were loading holds only part of them
+    clear_seat_inventory(cursor)
+    mark_kpis_dirty(cursor)
+    notify_table_changes(cursor)
+    cursor.execute(f"ANALYZE {', '.join(LOADED_TABLES)}")
     conn.commit()
-    
-    print("Dummy data generation completed successfully!")
+    cursor.close()
+    print(f"Dummy data generation completed successfully in {datetime.now() - started}!")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Seed the database with deterministic dummy data using COPY.")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help=f"dataset size; 1 means {datagen.BASE_RECORDS:,} flights, passengers, bookings and notifications")
+    parser.add_argument("--seed", type=int, default=42, help="same seed and scale give the same dataset")
+    parser.add_argument("--epoch", default=datagen.DEFAULT_EPOCH,
+                        help="date the generated timestamps are spread around")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="processes generating rows in parallel")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="rows generated and copied per chunk, rounded to whole seed blocks; "
+                             "does not change the data")
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
+    args = parse_args()
+    conn = connect()
     try:
-        create_dummy_data()
+        create_dummy_data(conn, datagen.make_spec(args.scale, args.seed, args.epoch),
+                          args.workers, args.chunk_size)
     except Exception as e:
         print(f"Error occurred: {e}")
         conn.rollback()
     finally:
-        cursor.close()
-        conn.close()
\ No newline at end of file
+        conn.close()
@@ -0,0 +1,54 @@
+"""
+Keeps the KPI materialized views (migrations/0003) up to date.
+
+Writes to the source tables only flag the affected views as dirty; this
+script refreshes the dirty ones every --interval seconds. Run it next to the
+dashboard, or once from cron:
+
+    python kpi_refresh.py               # loop forever
+    python kpi_refresh.py --once        # refresh what is dirty and exit
+    python kpi_refresh.py --once --force
+"""
+import argparse
+import time
+from db_connection import connect
+
+
+def refresh(conn, force=False):
+    """CALL refresh_kpis() and return [(view_name, last_duration_ms)] for the views it refreshed."""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT now()")
+        started = cursor.fetchone()[0]
+        cursor.execute("CALL refresh_kpis(%s)", (force,))
+        cursor.execute(
+            "SELECT view_name, last_duration_ms FROM kpi_refresh_state WHERE last_refreshed_at >= %s ORDER BY view_name",
+            (started,)
+        )
+        return cursor.fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the dirty KPI materialized views.")
+    parser.add_argument("--interval", type=float, default=60, help="seconds between refresh passes")
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit")
+    parser.add_argument("--force", action="store_true", help="refresh every view, dirty or not")
+    args = parser.parse_args()
+
+    conn = connect()
+    # the procedure commits between views, which needs autocommit
+    conn.autocommit = True
+    try:
+        while True:
+            for view_name, duration_ms in refresh(conn, args.force):
+                print(f"{time.strftime('%H:%M:%S')} refreshed {view_name} in {duration_ms} ms", flush=True)
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
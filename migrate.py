@@ -0,0 +1,131 @@
+"""
+Versioned schema migrations.
+
+Applies the numbered scripts in migrations/ (NNNN_description.sql) that are
+not yet recorded in the schema_migrations table, in order, each in its own
+transaction. Run it after generating_table.sql and after pulling new code:
+
+    python migrate.py            # apply everything pending
+    python migrate.py --status   # list applied and pending versions
+    python migrate.py --target 0003
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+import time
+from db_connection import connect
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+
+def discover(directory=MIGRATIONS_DIR):
+    """[(version, name, path, checksum)] for every migration file, sorted by version."""
+    found = []
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        path = os.path.join(directory, filename)
+        with open(path, "rb") as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        found.append((match.group(1), match.group(2), path, checksum))
+    return found
+
+
+def ensure_table(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version VARCHAR(4) PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                checksum CHAR(64) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                duration_ms INT
+            )
+        """)
+    conn.commit()
+
+
+def applied_versions(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT version, checksum FROM schema_migrations")
+        return dict(cursor.fetchall())
+
+
+def apply(conn, version, name, path, checksum):
+    with open(path, encoding="utf-8") as f:
+        sql = f.read()
+    start = time.perf_counter()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(sql)
+            duration_ms = int((time.perf_counter() - start) * 1000)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name, checksum, duration_ms) VALUES (%s, %s, %s, %s)",
+                (version, name, checksum, duration_ms)
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return duration_ms
+
+
+def migrate(conn, target=None):
+    """Apply pending migrations up to and including `target`. Returns the versions applied."""
+    ensure_table(conn)
+    applied = applied_versions(conn)
+    done = []
+    for version, name, path, checksum in discover():
+        if target and version > target:
+            break
+        if version in applied:
+            if applied[version] != checksum:
+                print(f"warning: {version}_{name}.sql changed after it was applied")
+            continue
+        print(f"Applying {version}_{name}...", end=" ", flush=True)
+        duration_ms = apply(conn, version, name, path, checksum)
+        print(f"done in {duration_ms} ms")
+        done.append(version)
+    if not done:
+        print("Database is up to date.")
+    return done
+
+
+def status(conn):
+    ensure_table(conn)
+    applied = applied_versions(conn)
+    for version, name, _, checksum in discover():
+        if version not in applied:
+            state = "pending"
+        elif applied[version] != checksum:
+            state = "applied (file changed since)"
+        else:
+            state = "applied"
+        print(f"{version}  {name:<40} {state}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the SQL migrations in migrations/.")
+    parser.add_argument("--status", action="store_true", help="show applied and pending migrations")
+    parser.add_argument("--target", help="stop after this version")
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        if args.status:
+            status(conn)
+        else:
+            migrate(conn, args.target)
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+--  Trigram indexes backing the dashboard "Search Table" box.
+--  modules/search.py turns a search into `col ILIKE '%term%'` over the text
+--  columns of the selected table and ranks matches with similarity(); both are
+--  served by these GIN indexes instead of a sequential scan.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+--  Airports
+CREATE INDEX IF NOT EXISTS idx_airports_name_trgm ON airports USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_airports_city_trgm ON airports USING gin (city gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_airports_country_trgm ON airports USING gin (country gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_airports_code_trgm ON airports USING gin (code gin_trgm_ops);
+
+--  Terminals
+CREATE INDEX IF NOT EXISTS idx_terminals_terminal_code_trgm ON terminals USING gin (terminal_code gin_trgm_ops);
+
+--  Gates
+CREATE INDEX IF NOT EXISTS idx_gates_gate_code_trgm ON gates USING gin (gate_code gin_trgm_ops);
+
+--  Passengers
+CREATE INDEX IF NOT EXISTS idx_passengers_full_name_trgm ON passengers USING gin (full_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_passengers_email_trgm ON passengers USING gin (email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_passengers_phone_number_trgm ON passengers USING gin (phone_number gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_passengers_passport_number_trgm ON passengers USING gin (passport_number gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_passengers_nationality_trgm ON passengers USING gin (nationality gin_trgm_ops);
+
+--  Flights
+CREATE INDEX IF NOT EXISTS idx_flights_flight_number_trgm ON flights USING gin (flight_number gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_flights_aircraft_type_trgm ON flights USING gin (aircraft_type gin_trgm_ops);
+
+--  Bookings
+CREATE INDEX IF NOT EXISTS idx_bookings_seat_number_trgm ON bookings USING gin (seat_number gin_trgm_ops);
+
+--  Payments
+CREATE INDEX IF NOT EXISTS idx_payments_payment_status_trgm ON payments USING gin (payment_status gin_trgm_ops);
+
+--  Admins (password hashes are never searched)
+CREATE INDEX IF NOT EXISTS idx_admins_full_name_trgm ON admins USING gin (full_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_admins_email_trgm ON admins USING gin (email gin_trgm_ops);
+
+--  flight_schedules has no text columns; numeric searches there hit the
+--  primary key and foreign key columns directly.
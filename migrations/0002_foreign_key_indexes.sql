@@ -0,0 +1,45 @@
+--  Indexes for the foreign keys the dashboard joins and deletes through.
+--  PostgreSQL does not index the referencing side of a foreign key, so every
+--  join on these columns and every DELETE/TRUNCATE of a parent row (which has
+--  to check the child table) used to scan the whole child table.
+
+--  Flight schedules: per-flight timeline and per-gate timeline.
+--  The composites also serve plain lookups on flight_id / gate_id.
+CREATE INDEX IF NOT EXISTS idx_flight_schedules_flight_departure ON flight_schedules (flight_id, departure_time);
+CREATE INDEX IF NOT EXISTS idx_flight_schedules_gate_departure ON flight_schedules (gate_id, departure_time);
+
+--  Bookings
+CREATE INDEX IF NOT EXISTS idx_bookings_passenger_id ON bookings (passenger_id);
+
+--  Payments
+CREATE INDEX IF NOT EXISTS idx_payments_booking_id ON payments (booking_id);
+
+--  Notifications
+CREATE INDEX IF NOT EXISTS idx_notifications_passenger_id ON notifications (passenger_id);
+
+--  Flights: routes by origin/destination
+CREATE INDEX IF NOT EXISTS idx_flights_origin_destination ON flights (origin_airport_id, destination_airport_id);
+CREATE INDEX IF NOT EXISTS idx_flights_destination_airport_id ON flights (destination_airport_id);
+
+--  Airport structure
+CREATE INDEX IF NOT EXISTS idx_terminals_airport_id ON terminals (airport_id);
+CREATE INDEX IF NOT EXISTS idx_gates_terminal_id ON gates (terminal_id);
+
+--  The status/method/role lookups (flights.status_id, bookings.status_id,
+--  payments.method_id, admins.role_id) have a handful of values and their
+--  parent rows are never deleted, so they are left unindexed.
+
+--  One booking per seat on a schedule. Existing duplicates keep the seat on
+--  the earliest booking; the later ones are cleared so they can be reseated.
+UPDATE bookings b
+SET seat_number = NULL
+FROM (
+    SELECT booking_id,
+           ROW_NUMBER() OVER (PARTITION BY schedule_id, seat_number ORDER BY booked_at, booking_id) AS n
+    FROM bookings
+    WHERE seat_number IS NOT NULL
+) dup
+WHERE b.booking_id = dup.booking_id AND dup.n > 1;
+
+--  The unique index leads with schedule_id, so it also indexes bookings.schedule_id.
+ALTER TABLE bookings ADD CONSTRAINT uq_bookings_schedule_seat UNIQUE (schedule_id, seat_number);
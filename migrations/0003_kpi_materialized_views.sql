@@ -0,0 +1,169 @@
+--  Operational KPIs, precomputed as materialized views.
+--  The dashboard KPI page reads only these views. Statement-level triggers
+--  on the source tables flag the affected views as dirty, and
+--  CALL refresh_kpis() (run by kpi_refresh.py on a schedule) refreshes just
+--  the dirty ones, CONCURRENTLY so readers are never blocked.
+
+--  Seat layout per aircraft type; capacity = seat_rows * length(seat_letters)
+CREATE TABLE IF NOT EXISTS aircraft_layouts (
+    aircraft_type VARCHAR(50) PRIMARY KEY,
+    seat_rows INT NOT NULL,
+    seat_letters VARCHAR(12) NOT NULL
+);
+
+INSERT INTO aircraft_layouts (aircraft_type, seat_rows, seat_letters) VALUES
+    ('Boeing 737', 31, 'ABCDEF'),
+    ('Boeing 747', 52, 'ABCDEFGHJK'),
+    ('Airbus A320', 30, 'ABCDEF'),
+    ('Airbus A380', 58, 'ABCDEFGHJK'),
+    ('Embraer E190', 25, 'ABCD')
+ON CONFLICT (aircraft_type) DO NOTHING;
+
+--  Load factor per schedule (confirmed bookings / seats)
+CREATE MATERIALIZED VIEW mv_schedule_load_factor AS
+SELECT fs.schedule_id,
+       fs.flight_id,
+       f.flight_number,
+       fs.departure_time,
+       f.origin_airport_id,
+       f.destination_airport_id,
+       f.aircraft_type,
+       COALESCE(l.seat_rows * length(l.seat_letters), 0) AS seat_capacity,
+       COUNT(b.booking_id) AS booked_seats,
+       ROUND(COUNT(b.booking_id)::numeric / NULLIF(l.seat_rows * length(l.seat_letters), 0), 4) AS load_factor
+FROM flight_schedules fs
+JOIN flights f ON f.flight_id = fs.flight_id
+LEFT JOIN aircraft_layouts l ON l.aircraft_type = f.aircraft_type
+LEFT JOIN bookings b ON b.schedule_id = fs.schedule_id
+    AND b.status_id = (SELECT status_id FROM booking_statuses WHERE status_name = 'Confirmed')
+GROUP BY fs.schedule_id, f.flight_id, l.seat_rows, l.seat_letters;
+
+CREATE UNIQUE INDEX ON mv_schedule_load_factor (schedule_id);
+CREATE INDEX ON mv_schedule_load_factor (departure_time);
+
+--  Revenue per route and flight day (completed payments only)
+CREATE MATERIALIZED VIEW mv_route_daily_revenue AS
+SELECT f.origin_airport_id,
+       f.destination_airport_id,
+       fs.departure_time::date AS flight_date,
+       COUNT(p.payment_id) AS payments,
+       SUM(p.amount) AS revenue
+FROM payments p
+JOIN bookings b ON b.booking_id = p.booking_id
+JOIN flight_schedules fs ON fs.schedule_id = b.schedule_id
+JOIN flights f ON f.flight_id = fs.flight_id
+WHERE p.payment_status = 'Completed'
+GROUP BY f.origin_airport_id, f.destination_airport_id, fs.departure_time::date;
+
+CREATE UNIQUE INDEX ON mv_route_daily_revenue (origin_airport_id, destination_airport_id, flight_date);
+CREATE INDEX ON mv_route_daily_revenue (flight_date);
+
+--  Departure punctuality per airport, from the status of each scheduled flight
+CREATE MATERIALIZED VIEW mv_airport_punctuality AS
+SELECT a.airport_id,
+       a.code,
+       a.name,
+       COUNT(*) AS departures,
+       COUNT(*) FILTER (WHERE s.status_name IN ('Scheduled', 'Departed')) AS on_time,
+       COUNT(*) FILTER (WHERE s.status_name = 'Delayed') AS delayed,
+       COUNT(*) FILTER (WHERE s.status_name = 'Cancelled') AS cancelled,
+       ROUND(COUNT(*) FILTER (WHERE s.status_name IN ('Scheduled', 'Departed'))::numeric / COUNT(*), 4) AS on_time_rate,
+       ROUND(COUNT(*) FILTER (WHERE s.status_name = 'Delayed')::numeric / COUNT(*), 4) AS delay_rate
+FROM flight_schedules fs
+JOIN flights f ON f.flight_id = fs.flight_id
+JOIN airports a ON a.airport_id = f.origin_airport_id
+LEFT JOIN flight_statuses s ON s.status_id = f.status_id
+GROUP BY a.airport_id;
+
+CREATE UNIQUE INDEX ON mv_airport_punctuality (airport_id);
+
+--  Failed-payment rate per payment method
+CREATE MATERIALIZED VIEW mv_payment_method_failures AS
+SELECT m.method_id,
+       m.method_name,
+       COUNT(p.payment_id) AS payments,
+       COUNT(p.payment_id) FILTER (WHERE p.payment_status = 'Failed') AS failed,
+       ROUND(COUNT(p.payment_id) FILTER (WHERE p.payment_status = 'Failed')::numeric
+             / NULLIF(COUNT(p.payment_id), 0), 4) AS failure_rate,
+       COALESCE(SUM(p.amount) FILTER (WHERE p.payment_status = 'Failed'), 0) AS failed_amount
+FROM payment_methods m
+LEFT JOIN payments p ON p.method_id = m.method_id
+GROUP BY m.method_id;
+
+CREATE UNIQUE INDEX ON mv_payment_method_failures (method_id);
+
+--  Refresh bookkeeping: one row per view
+CREATE TABLE kpi_refresh_state (
+    view_name VARCHAR(63) PRIMARY KEY,
+    dirty BOOLEAN NOT NULL DEFAULT false,
+    last_refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_duration_ms INT
+);
+
+INSERT INTO kpi_refresh_state (view_name) VALUES
+    ('mv_schedule_load_factor'),
+    ('mv_route_daily_revenue'),
+    ('mv_airport_punctuality'),
+    ('mv_payment_method_failures');
+
+--  Trigger function: TG_ARGV lists the views fed by the table.
+--  Only flips false -> true, so a burst of writes takes the row lock once.
+CREATE OR REPLACE FUNCTION mark_kpis_dirty() RETURNS trigger AS $$
+BEGIN
+    UPDATE kpi_refresh_state SET dirty = true
+    WHERE view_name = ANY(TG_ARGV) AND NOT dirty;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER kpi_dirty_bookings
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON bookings
+    FOR EACH STATEMENT EXECUTE FUNCTION mark_kpis_dirty('mv_schedule_load_factor', 'mv_route_daily_revenue');
+
+CREATE TRIGGER kpi_dirty_payments
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON payments
+    FOR EACH STATEMENT EXECUTE FUNCTION mark_kpis_dirty('mv_route_daily_revenue', 'mv_payment_method_failures');
+
+CREATE TRIGGER kpi_dirty_flight_schedules
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON flight_schedules
+    FOR EACH STATEMENT EXECUTE FUNCTION mark_kpis_dirty('mv_schedule_load_factor', 'mv_route_daily_revenue', 'mv_airport_punctuality');
+
+CREATE TRIGGER kpi_dirty_flights
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON flights
+    FOR EACH STATEMENT EXECUTE FUNCTION mark_kpis_dirty('mv_schedule_load_factor', 'mv_route_daily_revenue', 'mv_airport_punctuality');
+
+CREATE TRIGGER kpi_dirty_airports
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON airports
+    FOR EACH STATEMENT EXECUTE FUNCTION mark_kpis_dirty('mv_airport_punctuality');
+
+CREATE TRIGGER kpi_dirty_payment_methods
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON payment_methods
+    FOR EACH STATEMENT EXECUTE FUNCTION mark_kpis_dirty('mv_payment_method_failures');
+
+CREATE TRIGGER kpi_dirty_aircraft_layouts
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON aircraft_layouts
+    FOR EACH STATEMENT EXECUTE FUNCTION mark_kpis_dirty('mv_schedule_load_factor');
+
+--  Refresh the dirty views (or all of them with force => true).
+--  The dirty flag is cleared and committed before each refresh, so writers
+--  never wait on a refresh and changes made during it mark the view again.
+--  Must be CALLed outside an explicit transaction block.
+CREATE OR REPLACE PROCEDURE refresh_kpis(force BOOLEAN DEFAULT false)
+LANGUAGE plpgsql AS $$
+DECLARE
+    v TEXT;
+    started TIMESTAMP;
+BEGIN
+    FOR v IN SELECT view_name FROM kpi_refresh_state WHERE dirty OR force ORDER BY view_name LOOP
+        UPDATE kpi_refresh_state SET dirty = false WHERE view_name = v;
+        COMMIT;
+        started := clock_timestamp();
+        EXECUTE format('REFRESH MATERIALIZED VIEW CONCURRENTLY %I', v);
+        UPDATE kpi_refresh_state
+        SET last_refreshed_at = clock_timestamp(),
+            last_duration_ms = (EXTRACT(EPOCH FROM clock_timestamp() - started) * 1000)::int
+        WHERE view_name = v;
+        COMMIT;
+    END LOOP;
+END;
+$$;
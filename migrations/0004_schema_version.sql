@@ -0,0 +1,45 @@
+--  Schema version counter for the dashboard's catalog cache (modules/catalog.py).
+--  An event trigger bumps it after every DDL statement on regular objects, so
+--  the cache reloads column and key metadata only when the schema changed.
+--  Event triggers can only be created by a superuser.
+
+CREATE TABLE IF NOT EXISTS schema_version (
+    id BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+    version BIGINT NOT NULL DEFAULT 0,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO schema_version (id) VALUES (true) ON CONFLICT (id) DO NOTHING;
+
+--  Temporary tables (bulk imports) and materialized view refreshes (KPIs)
+--  are DDL too, but do not change what the catalog describes.
+CREATE OR REPLACE FUNCTION bump_schema_version() RETURNS event_trigger AS $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_event_trigger_ddl_commands()
+        WHERE command_tag <> 'REFRESH MATERIALIZED VIEW'
+          AND COALESCE(schema_name, '') NOT LIKE 'pg\_temp%'
+    ) THEN
+        UPDATE schema_version SET version = version + 1, changed_at = CURRENT_TIMESTAMP;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION bump_schema_version_on_drop() RETURNS event_trigger AS $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_event_trigger_dropped_objects()
+        WHERE NOT is_temporary AND object_type IN ('table', 'table column', 'table constraint', 'view', 'materialized view')
+    ) THEN
+        UPDATE schema_version SET version = version + 1, changed_at = CURRENT_TIMESTAMP;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP EVENT TRIGGER IF EXISTS schema_version_ddl;
+CREATE EVENT TRIGGER schema_version_ddl ON ddl_command_end
+    EXECUTE FUNCTION bump_schema_version();
+
+DROP EVENT TRIGGER IF EXISTS schema_version_drop;
+CREATE EVENT TRIGGER schema_version_drop ON sql_drop
+    EXECUTE FUNCTION bump_schema_version_on_drop();
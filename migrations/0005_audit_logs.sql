@@ -0,0 +1,13 @@
+--  Audit trail written by the dashboard in the same transaction as the change.
+--  One row per affected record.
+CREATE TABLE IF NOT EXISTS audit_logs (
+    audit_id BIGSERIAL PRIMARY KEY,
+    table_name VARCHAR(63) NOT NULL,
+    action VARCHAR(10) NOT NULL, -- INSERT, UPDATE, DELETE
+    record_id BIGINT,
+    admin_id INT,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_audit_logs_table_record ON audit_logs (table_name, record_id);
+CREATE INDEX IF NOT EXISTS idx_audit_logs_timestamp ON audit_logs (timestamp);
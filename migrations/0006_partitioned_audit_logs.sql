@@ -0,0 +1,90 @@
+--  audit_logs becomes a monthly range-partitioned table on "timestamp", so
+--  the viewer prunes to the months it shows and old months can be detached
+--  instead of deleted row by row.
+
+--  Creates the monthly partition of `parent` holding `month`
+--  (named <parent>_yYYYYmMM) unless it exists. Rows for that month that
+--  already landed in the default partition are moved into it.
+CREATE OR REPLACE FUNCTION create_monthly_partition(parent TEXT, key_column TEXT, month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    first_day DATE := date_trunc('month', month)::date;
+    next_day DATE := (date_trunc('month', month) + INTERVAL '1 month')::date;
+    part TEXT := format('%s_y%sm%s', parent, to_char(first_day, 'YYYY'), to_char(first_day, 'MM'));
+    default_part TEXT;
+BEGIN
+    IF to_regclass(part) IS NOT NULL THEN
+        RETURN part;
+    END IF;
+
+    SELECT c.relname INTO default_part
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = parent::regclass AND pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT';
+
+    IF default_part IS NULL THEN
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                       part, parent, first_day, next_day);
+    ELSE
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', part, parent);
+        EXECUTE format('WITH moved AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *) INSERT INTO %I SELECT * FROM moved',
+                       default_part, key_column, first_day, key_column, next_day, part);
+        EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                       parent, part, first_day, next_day);
+    END IF;
+    RETURN part;
+END;
+$$ LANGUAGE plpgsql;
+
+--  Partitions for every month from `first_month` through `months_ahead`
+--  months past the current one. Returns the partitions it had to create.
+CREATE OR REPLACE FUNCTION ensure_monthly_partitions(parent TEXT, key_column TEXT, first_month DATE, months_ahead INT DEFAULT 3)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    month DATE;
+BEGIN
+    FOR month IN
+        SELECT generate_series(date_trunc('month', first_month),
+                               date_trunc('month', CURRENT_DATE) + make_interval(months => months_ahead),
+                               INTERVAL '1 month')::date
+    LOOP
+        IF to_regclass(format('%s_y%sm%s', parent, to_char(month, 'YYYY'), to_char(month, 'MM'))) IS NULL THEN
+            RETURN NEXT create_monthly_partition(parent, key_column, month);
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned;
+ALTER INDEX IF EXISTS audit_logs_pkey RENAME TO audit_logs_unpartitioned_pkey;
+DROP INDEX IF EXISTS idx_audit_logs_table_record;
+DROP INDEX IF EXISTS idx_audit_logs_timestamp;
+
+CREATE TABLE audit_logs (
+    audit_id BIGINT NOT NULL DEFAULT nextval('audit_logs_audit_id_seq'),
+    table_name VARCHAR(63) NOT NULL,
+    action VARCHAR(10) NOT NULL, -- INSERT, UPDATE, DELETE
+    record_id BIGINT,
+    admin_id INT,
+    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (audit_id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+ALTER SEQUENCE audit_logs_audit_id_seq OWNED BY audit_logs.audit_id;
+
+--  Catches rows outside the prepared months until maintenance creates them
+CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT;
+
+CREATE INDEX idx_audit_logs_timestamp ON audit_logs (timestamp DESC, audit_id DESC);
+CREATE INDEX idx_audit_logs_table_record ON audit_logs (table_name, record_id);
+
+SELECT ensure_monthly_partitions(
+    'audit_logs', 'timestamp',
+    COALESCE((SELECT MIN(timestamp) FROM audit_logs_unpartitioned), CURRENT_DATE)::date
+);
+
+INSERT INTO audit_logs (audit_id, table_name, action, record_id, admin_id, timestamp)
+SELECT audit_id, table_name, action, record_id, admin_id, COALESCE(timestamp, CURRENT_TIMESTAMP)
+FROM audit_logs_unpartitioned;
+
+DROP TABLE audit_logs_unpartitioned;
@@ -0,0 +1,314 @@
+--  Monthly range partitioning for the tables that grow with time:
+--      flight_schedules (departure_time), bookings (booked_at),
+--      payments (payment_date), notifications (sent_at).
+--  Each table is rebuilt as a partitioned table with one partition per month
+--  plus a DEFAULT partition, and the existing rows are copied across.
+--  partition_maintenance.py creates future months and archives old ones.
+--
+--  A partitioned table's primary key has to include the partition key, so
+--  the keys become (id, timestamp); the ids stay unique because they still
+--  come from the same sequences. Foreign keys can only point at a unique
+--  constraint, so bookings -> flight_schedules and payments -> bookings,
+--  and the one-booking-per-seat rule, are enforced by triggers instead.
+--  Rows without a timestamp get the current time (or the arrival time for
+--  schedules), since the partition key cannot be NULL.
+
+--  Months `from_month` through `to_month` (inclusive) of `parent`.
+CREATE OR REPLACE FUNCTION create_monthly_partitions(parent TEXT, key_column TEXT, from_month DATE, to_month DATE)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    month DATE;
+BEGIN
+    FOR month IN
+        SELECT generate_series(date_trunc('month', from_month), date_trunc('month', to_month), INTERVAL '1 month')::date
+    LOOP
+        IF to_regclass(format('%s_y%sm%s', parent, to_char(month, 'YYYY'), to_char(month, 'MM'))) IS NULL THEN
+            RETURN NEXT create_monthly_partition(parent, key_column, month);
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+--  Detaches the monthly partitions of `parent` that end before the start of
+--  the month `keep_months` months ago and moves them to the archive schema.
+--  Returns the archived table names.
+CREATE SCHEMA IF NOT EXISTS archive;
+
+CREATE OR REPLACE FUNCTION archive_old_partitions(parent TEXT, keep_months INT)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    part TEXT;
+    cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => keep_months))::date;
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = parent::regclass
+          AND c.relname ~ ('^' || parent || '_y\d{4}m\d{2}$')
+          AND to_date(right(c.relname, 8), '"y"YYYY"m"MM') + INTERVAL '1 month' <= cutoff
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', parent, part);
+        EXECUTE format('ALTER TABLE %I SET SCHEMA archive', part);
+        RETURN NEXT part;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+--  Rebuilds `tbl` as a table partitioned by month on `key_column`, with
+--  primary key (pk_column, key_column). Defaults, secondary indexes and
+--  foreign keys to unpartitioned tables are carried over; the old table is
+--  dropped. Foreign keys pointing at `tbl` must be dropped beforehand.
+CREATE OR REPLACE FUNCTION pg_temp.partition_by_month(tbl TEXT, key_column TEXT, pk_column TEXT, key_fallback TEXT)
+RETURNS VOID AS $$
+DECLARE
+    old TEXT := tbl || '_unpartitioned';
+    first_month DATE;
+    r RECORD;
+    index_defs TEXT[] := '{}';
+    fk_defs TEXT[] := '{}';
+    def TEXT;
+BEGIN
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', tbl, old);
+
+    --  secondary indexes are recreated on the new table under the same names
+    FOR r IN
+        SELECT i.indexrelid::regclass::text AS name, pg_get_indexdef(i.indexrelid) AS def
+        FROM pg_index i
+        WHERE i.indrelid = old::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid AND c.conrelid = i.indrelid)
+    LOOP
+        index_defs := index_defs || regexp_replace(r.def, ' ON \S+ USING ', format(' ON %I USING ', tbl));
+        EXECUTE format('DROP INDEX %s', r.name);
+    END LOOP;
+    FOR r IN
+        SELECT conname, pg_get_constraintdef(oid) AS def
+        FROM pg_constraint
+        WHERE conrelid = old::regclass AND contype = 'f'
+    LOOP
+        fk_defs := fk_defs || format('ALTER TABLE %I ADD CONSTRAINT %I %s', tbl, r.conname, r.def);
+    END LOOP;
+    EXECUTE format('ALTER TABLE %I RENAME CONSTRAINT %I TO %I', old, tbl || '_pkey', old || '_pkey');
+
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS) PARTITION BY RANGE (%I)', tbl, old, key_column);
+    EXECUTE format('ALTER TABLE %I ALTER COLUMN %I SET NOT NULL', tbl, key_column);
+    EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (%I, %I)', tbl, pk_column, key_column);
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', tbl || '_default', tbl);
+
+    EXECUTE format('SELECT MIN(%I)::date FROM %I', key_column, old) INTO first_month;
+    PERFORM ensure_monthly_partitions(tbl, key_column, COALESCE(first_month, CURRENT_DATE));
+
+    EXECUTE format('UPDATE %I SET %I = COALESCE(%s, CURRENT_TIMESTAMP) WHERE %I IS NULL',
+                   old, key_column, key_fallback, key_column);
+    EXECUTE format('INSERT INTO %I SELECT * FROM %I', tbl, old);
+
+    EXECUTE format('ALTER SEQUENCE %I OWNED BY %I.%I', tbl || '_' || pk_column || '_seq', tbl, pk_column);
+    EXECUTE format('DROP TABLE %I', old);
+
+    FOREACH def IN ARRAY index_defs LOOP
+        EXECUTE def;
+    END LOOP;
+    FOREACH def IN ARRAY fk_defs LOOP
+        EXECUTE def;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+--  The KPI views read these tables; they are recreated below
+DROP MATERIALIZED VIEW IF EXISTS mv_schedule_load_factor, mv_route_daily_revenue,
+    mv_airport_punctuality, mv_payment_method_failures;
+
+--  Foreign keys between the four tables (the referenced side loses its single-column key)
+ALTER TABLE bookings DROP CONSTRAINT IF EXISTS bookings_schedule_id_fkey;
+ALTER TABLE payments DROP CONSTRAINT IF EXISTS payments_booking_id_fkey;
+
+--  One seat per schedule is checked by a trigger on the partitioned table
+ALTER TABLE bookings DROP CONSTRAINT IF EXISTS uq_bookings_schedule_seat;
+
+SELECT pg_temp.partition_by_month('flight_schedules', 'departure_time', 'schedule_id', 'arrival_time');
+SELECT pg_temp.partition_by_month('bookings', 'booked_at', 'booking_id', 'NULL');
+SELECT pg_temp.partition_by_month('payments', 'payment_date', 'payment_id', 'NULL');
+SELECT pg_temp.partition_by_month('notifications', 'sent_at', 'notification_id', 'NULL');
+
+--  Lookups by id from the referencing side (the primary keys lead with the id)
+CREATE INDEX IF NOT EXISTS idx_bookings_schedule_seat ON bookings (schedule_id, seat_number);
+CREATE INDEX IF NOT EXISTS idx_payments_booking_id ON payments (booking_id);
+
+--  Foreign keys to partitioned tables, as triggers.
+--  Child side: the referenced row must exist; it is locked FOR KEY SHARE
+--  like a real foreign key would, so it cannot be deleted concurrently.
+CREATE OR REPLACE FUNCTION check_booking_schedule() RETURNS trigger AS $$
+BEGIN
+    IF NEW.schedule_id IS NOT NULL THEN
+        PERFORM 1 FROM flight_schedules WHERE schedule_id = NEW.schedule_id FOR KEY SHARE;
+        IF NOT FOUND THEN
+            RAISE EXCEPTION 'schedule_id % is not present in table "flight_schedules"', NEW.schedule_id
+                USING ERRCODE = 'foreign_key_violation';
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION check_payment_booking() RETURNS trigger AS $$
+BEGIN
+    IF NEW.booking_id IS NOT NULL THEN
+        PERFORM 1 FROM bookings WHERE booking_id = NEW.booking_id FOR KEY SHARE;
+        IF NOT FOUND THEN
+            RAISE EXCEPTION 'booking_id % is not present in table "bookings"', NEW.booking_id
+                USING ERRCODE = 'foreign_key_violation';
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER fk_bookings_schedule
+    BEFORE INSERT OR UPDATE OF schedule_id ON bookings
+    FOR EACH ROW EXECUTE FUNCTION check_booking_schedule();
+
+CREATE TRIGGER fk_payments_booking
+    BEFORE INSERT OR UPDATE OF booking_id ON payments
+    FOR EACH ROW EXECUTE FUNCTION check_payment_booking();
+
+--  Parent side: refuse to remove a row that is still referenced. A row that
+--  only moved to another partition (its timestamp changed) still exists by
+--  the time AFTER triggers run, so it passes.
+CREATE OR REPLACE FUNCTION restrict_schedule_delete() RETURNS trigger AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM bookings WHERE schedule_id = OLD.schedule_id)
+       AND NOT EXISTS (SELECT 1 FROM flight_schedules WHERE schedule_id = OLD.schedule_id) THEN
+        RAISE EXCEPTION 'schedule_id % is still referenced from table "bookings"', OLD.schedule_id
+            USING ERRCODE = 'foreign_key_violation';
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION restrict_booking_delete() RETURNS trigger AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM payments WHERE booking_id = OLD.booking_id)
+       AND NOT EXISTS (SELECT 1 FROM bookings WHERE booking_id = OLD.booking_id) THEN
+        RAISE EXCEPTION 'booking_id % is still referenced from table "payments"', OLD.booking_id
+            USING ERRCODE = 'foreign_key_violation';
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER fk_bookings_schedule_restrict
+    AFTER DELETE OR UPDATE OF schedule_id ON flight_schedules
+    FOR EACH ROW EXECUTE FUNCTION restrict_schedule_delete();
+
+CREATE TRIGGER fk_payments_booking_restrict
+    AFTER DELETE OR UPDATE OF booking_id ON bookings
+    FOR EACH ROW EXECUTE FUNCTION restrict_booking_delete();
+
+--  One booking per seat on a schedule. Bookings for the same schedule are
+--  serialized on an advisory lock, so two concurrent inserts cannot both
+--  pass the check.
+CREATE OR REPLACE FUNCTION check_unique_seat() RETURNS trigger AS $$
+BEGIN
+    IF NEW.seat_number IS NOT NULL AND NEW.schedule_id IS NOT NULL THEN
+        PERFORM pg_advisory_xact_lock(hashtext('bookings_seat'), NEW.schedule_id);
+        IF EXISTS (
+            SELECT 1 FROM bookings
+            WHERE schedule_id = NEW.schedule_id AND seat_number = NEW.seat_number
+              AND booking_id <> NEW.booking_id
+        ) THEN
+            RAISE EXCEPTION 'seat % is already booked on schedule %', NEW.seat_number, NEW.schedule_id
+                USING ERRCODE = 'unique_violation', CONSTRAINT = 'uq_bookings_schedule_seat';
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER uq_bookings_schedule_seat
+    BEFORE INSERT OR UPDATE OF schedule_id, seat_number ON bookings
+    FOR EACH ROW EXECUTE FUNCTION check_unique_seat();
+
+--  KPI views and their dirty-flag triggers (as in 0003)
+CREATE MATERIALIZED VIEW mv_schedule_load_factor AS
+SELECT fs.schedule_id,
+       fs.flight_id,
+       f.flight_number,
+       fs.departure_time,
+       f.origin_airport_id,
+       f.destination_airport_id,
+       f.aircraft_type,
+       COALESCE(l.seat_rows * length(l.seat_letters), 0) AS seat_capacity,
+       COUNT(b.booking_id) AS booked_seats,
+       ROUND(COUNT(b.booking_id)::numeric / NULLIF(l.seat_rows * length(l.seat_letters), 0), 4) AS load_factor
+FROM flight_schedules fs
+JOIN flights f ON f.flight_id = fs.flight_id
+LEFT JOIN aircraft_layouts l ON l.aircraft_type = f.aircraft_type
+LEFT JOIN bookings b ON b.schedule_id = fs.schedule_id
+    AND b.status_id = (SELECT status_id FROM booking_statuses WHERE status_name = 'Confirmed')
+GROUP BY fs.schedule_id, fs.flight_id, fs.departure_time, f.flight_id, l.seat_rows, l.seat_letters;
+
+CREATE UNIQUE INDEX ON mv_schedule_load_factor (schedule_id);
+CREATE INDEX ON mv_schedule_load_factor (departure_time);
+
+CREATE MATERIALIZED VIEW mv_route_daily_revenue AS
+SELECT f.origin_airport_id,
+       f.destination_airport_id,
+       fs.departure_time::date AS flight_date,
+       COUNT(p.payment_id) AS payments,
+       SUM(p.amount) AS revenue
+FROM payments p
+JOIN bookings b ON b.booking_id = p.booking_id
+JOIN flight_schedules fs ON fs.schedule_id = b.schedule_id
+JOIN flights f ON f.flight_id = fs.flight_id
+WHERE p.payment_status = 'Completed'
+GROUP BY f.origin_airport_id, f.destination_airport_id, fs.departure_time::date;
+
+CREATE UNIQUE INDEX ON mv_route_daily_revenue (origin_airport_id, destination_airport_id, flight_date);
+CREATE INDEX ON mv_route_daily_revenue (flight_date);
+
+CREATE MATERIALIZED VIEW mv_airport_punctuality AS
+SELECT a.airport_id,
+       a.code,
+       a.name,
+       COUNT(*) AS departures,
+       COUNT(*) FILTER (WHERE s.status_name IN ('Scheduled', 'Departed')) AS on_time,
+       COUNT(*) FILTER (WHERE s.status_name = 'Delayed') AS delayed,
+       COUNT(*) FILTER (WHERE s.status_name = 'Cancelled') AS cancelled,
+       ROUND(COUNT(*) FILTER (WHERE s.status_name IN ('Scheduled', 'Departed'))::numeric / COUNT(*), 4) AS on_time_rate,
+       ROUND(COUNT(*) FILTER (WHERE s.status_name = 'Delayed')::numeric / COUNT(*), 4) AS delay_rate
+FROM flight_schedules fs
+JOIN flights f ON f.flight_id = fs.flight_id
+JOIN airports a ON a.airport_id = f.origin_airport_id
+LEFT JOIN flight_statuses s ON s.status_id = f.status_id
+GROUP BY a.airport_id;
+
+CREATE UNIQUE INDEX ON mv_airport_punctuality (airport_id);
+
+CREATE MATERIALIZED VIEW mv_payment_method_failures AS
+SELECT m.method_id,
+       m.method_name,
+       COUNT(p.payment_id) AS payments,
+       COUNT(p.payment_id) FILTER (WHERE p.payment_status = 'Failed') AS failed,
+       ROUND(COUNT(p.payment_id) FILTER (WHERE p.payment_status = 'Failed')::numeric
+             / NULLIF(COUNT(p.payment_id), 0), 4) AS failure_rate,
+       COALESCE(SUM(p.amount) FILTER (WHERE p.payment_status = 'Failed'), 0) AS failed_amount
+FROM payment_methods m
+LEFT JOIN payments p ON p.method_id = m.method_id
+GROUP BY m.method_id;
+
+CREATE UNIQUE INDEX ON mv_payment_method_failures (method_id);
+
+CREATE TRIGGER kpi_dirty_bookings
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON bookings
+    FOR EACH STATEMENT EXECUTE FUNCTION mark_kpis_dirty('mv_schedule_load_factor', 'mv_route_daily_revenue');
+
+CREATE TRIGGER kpi_dirty_payments
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON payments
+    FOR EACH STATEMENT EXECUTE FUNCTION mark_kpis_dirty('mv_route_daily_revenue', 'mv_payment_method_failures');
+
+CREATE TRIGGER kpi_dirty_flight_schedules
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON flight_schedules
+    FOR EACH STATEMENT EXECUTE FUNCTION mark_kpis_dirty('mv_schedule_load_factor', 'mv_route_daily_revenue', 'mv_airport_punctuality');
+
+UPDATE kpi_refresh_state SET last_refreshed_at = CURRENT_TIMESTAMP, dirty = false;
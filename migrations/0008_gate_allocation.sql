@@ -0,0 +1,50 @@
+--  Gate allocation: no two schedules may hold the same gate at the same time.
+--
+--  A departing flight holds its origin gate from an hour before departure
+--  until 15 minutes after push-back. arrival_time is at the destination
+--  airport, so it does not bound the origin gate. gate_block() is the one
+--  place that rule lives; datagen.py mirrors it when it assigns gates.
+CREATE OR REPLACE FUNCTION gate_block(departure TIMESTAMP) RETURNS TSRANGE AS $$
+    SELECT tsrange(departure - INTERVAL '60 minutes', departure + INTERVAL '15 minutes')
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+ALTER TABLE flight_schedules
+    ADD COLUMN gate_occupancy TSRANGE GENERATED ALWAYS AS (gate_block(departure_time)) STORED;
+
+--  Windowed reports ("every block overlapping this day") use the GiST index.
+CREATE INDEX IF NOT EXISTS idx_flight_schedules_gate_occupancy ON flight_schedules USING gist (gate_occupancy);
+
+--  An EXCLUDE constraint cannot be declared on a partitioned table unless
+--  it includes the partition key, so overlaps are refused by a trigger.
+--  Blocks are far shorter than a day, so the overlap candidates are found
+--  with a range scan on (gate_id, departure_time) within one or two
+--  partitions. Writers to the same gate are serialized on an advisory
+--  lock. The trigger runs AFTER the statement's rows are in place, so a
+--  single UPDATE that swaps gates between schedules is checked as a whole.
+CREATE OR REPLACE FUNCTION check_gate_conflict() RETURNS trigger AS $$
+DECLARE
+    other INT;
+BEGIN
+    IF NEW.gate_id IS NULL OR NEW.departure_time IS NULL THEN
+        RETURN NULL;
+    END IF;
+    PERFORM pg_advisory_xact_lock(hashtext('flight_schedules_gate'), NEW.gate_id);
+    SELECT schedule_id INTO other
+    FROM flight_schedules
+    WHERE gate_id = NEW.gate_id
+      AND departure_time > NEW.departure_time - INTERVAL '1 day'
+      AND departure_time < NEW.departure_time + INTERVAL '1 day'
+      AND gate_occupancy && NEW.gate_occupancy
+      AND schedule_id <> NEW.schedule_id
+    LIMIT 1;
+    IF FOUND THEN
+        RAISE EXCEPTION 'gate % is already held by schedule % during %', NEW.gate_id, other, NEW.gate_occupancy
+            USING ERRCODE = 'exclusion_violation', CONSTRAINT = 'ex_flight_schedules_gate';
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER ex_flight_schedules_gate
+    AFTER INSERT OR UPDATE OF gate_id, departure_time ON flight_schedules
+    FOR EACH ROW EXECUTE FUNCTION check_gate_conflict();
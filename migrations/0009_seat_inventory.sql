@@ -0,0 +1,163 @@
+--  Seat inventory: which seats of a schedule are booked, as one bitmap row.
+--
+--  Seat i of a layout is row i / length(seat_letters) + 1, letter
+--  i % length(seat_letters) + 1, so "12C" on an A320 (ABCDEF) is bit 68.
+--  The row is built the first time a schedule is booked or looked at, from
+--  its aircraft layout and its existing bookings, and is then kept in step
+--  by a trigger on bookings. Holds are short-lived rows in seat_holds; a
+--  hold is taken by inserting its (schedule, seat) key, so two bookers can
+--  never hold the same seat.
+CREATE OR REPLACE FUNCTION seat_index(seat TEXT, seat_rows INT, seat_letters TEXT) RETURNS INT AS $$
+    SELECT (m[1]::int - 1) * length(seat_letters) + strpos(seat_letters, m[2]) - 1
+    FROM regexp_match(upper(seat), '^(\d{1,3})([A-Z])$') AS m
+    WHERE m[1]::int BETWEEN 1 AND seat_rows AND strpos(seat_letters, m[2]) > 0
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+CREATE TABLE IF NOT EXISTS seat_inventory (
+    schedule_id INT PRIMARY KEY,
+    seat_rows INT NOT NULL,
+    seat_letters VARCHAR(12) NOT NULL,
+    booked BIT VARYING NOT NULL,
+    booked_count INT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS seat_holds (
+    schedule_id INT NOT NULL,
+    seat_index INT NOT NULL,
+    hold_token UUID NOT NULL,
+    held_until TIMESTAMP NOT NULL,
+    PRIMARY KEY (schedule_id, seat_index)
+);
+
+CREATE INDEX IF NOT EXISTS idx_seat_holds_token ON seat_holds (hold_token);
+
+--  Builds the inventory row of `sched` if it has none; schedules whose
+--  aircraft type has no layout get no row.
+CREATE OR REPLACE FUNCTION ensure_seat_inventory(sched INT) RETURNS VOID AS $$
+DECLARE
+    layout aircraft_layouts;
+    taken INT[];
+BEGIN
+    IF EXISTS (SELECT 1 FROM seat_inventory WHERE schedule_id = sched) THEN
+        RETURN;
+    END IF;
+    SELECT l.* INTO layout
+    FROM flight_schedules s
+    JOIN flights f ON f.flight_id = s.flight_id
+    JOIN aircraft_layouts l ON l.aircraft_type = f.aircraft_type
+    WHERE s.schedule_id = sched
+    LIMIT 1;
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+    SELECT array_agg(DISTINCT idx) INTO taken
+    FROM (SELECT seat_index(seat_number, layout.seat_rows, layout.seat_letters) AS idx
+          FROM bookings WHERE schedule_id = sched) AS b
+    WHERE idx IS NOT NULL;
+    INSERT INTO seat_inventory (schedule_id, seat_rows, seat_letters, booked, booked_count)
+    SELECT sched, layout.seat_rows, layout.seat_letters,
+           string_agg(CASE WHEN i = ANY(taken) THEN '1' ELSE '0' END, '' ORDER BY i)::varbit,
+           COALESCE(cardinality(taken), 0)
+    FROM generate_series(0, layout.seat_rows * length(layout.seat_letters) - 1) AS i
+    ON CONFLICT (schedule_id) DO NOTHING;
+END;
+$$ LANGUAGE plpgsql;
+
+--  Keeps the bitmap in step with bookings and replaces the advisory-lock
+--  seat check from 0007. Runs AFTER the statement's rows are in place: a
+--  seat is released only when no booking holds it any more, and taking a
+--  seat whose bit is already set is a conflict only when another booking
+--  really has it (a booking moving between partitions is seen twice).
+--  Bookers of one schedule queue on its inventory row lock, for as long as
+--  their transaction lasts.
+CREATE OR REPLACE FUNCTION track_booked_seats() RETURNS trigger AS $$
+DECLARE
+    inv seat_inventory;
+    idx INT;
+BEGIN
+    IF TG_OP <> 'INSERT' AND OLD.schedule_id IS NOT NULL AND OLD.seat_number IS NOT NULL
+       AND (TG_OP = 'DELETE' OR (OLD.schedule_id, OLD.seat_number) IS DISTINCT FROM (NEW.schedule_id, NEW.seat_number)) THEN
+        SELECT * INTO inv FROM seat_inventory WHERE schedule_id = OLD.schedule_id FOR UPDATE;
+        idx := seat_index(OLD.seat_number, inv.seat_rows, inv.seat_letters);
+        IF idx IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM bookings WHERE schedule_id = OLD.schedule_id AND seat_number = OLD.seat_number
+        ) THEN
+            UPDATE seat_inventory SET booked = set_bit(booked, idx, 0), booked_count = booked_count - 1
+            WHERE schedule_id = OLD.schedule_id AND get_bit(booked, idx) = 1;
+        END IF;
+    END IF;
+
+    IF TG_OP <> 'DELETE' AND NEW.schedule_id IS NOT NULL AND NEW.seat_number IS NOT NULL
+       AND (TG_OP = 'INSERT' OR (OLD.schedule_id, OLD.seat_number) IS DISTINCT FROM (NEW.schedule_id, NEW.seat_number)) THEN
+        SELECT * INTO inv FROM seat_inventory WHERE schedule_id = NEW.schedule_id FOR UPDATE;
+        IF NOT FOUND THEN
+            PERFORM ensure_seat_inventory(NEW.schedule_id);
+            SELECT * INTO inv FROM seat_inventory WHERE schedule_id = NEW.schedule_id FOR UPDATE;
+        END IF;
+        IF NOT FOUND THEN
+            -- no layout for this aircraft: only uniqueness can be checked
+            PERFORM pg_advisory_xact_lock(hashtext('bookings_seat'), NEW.schedule_id);
+            idx := NULL;
+        ELSE
+            idx := seat_index(NEW.seat_number, inv.seat_rows, inv.seat_letters);
+            IF idx IS NULL THEN
+                RAISE EXCEPTION 'seat % does not exist on schedule %', NEW.seat_number, NEW.schedule_id
+                    USING ERRCODE = 'check_violation', CONSTRAINT = 'ck_bookings_seat_in_layout';
+            END IF;
+        END IF;
+        IF (idx IS NULL OR get_bit(inv.booked, idx) = 1) AND (
+            SELECT count(*) FROM bookings WHERE schedule_id = NEW.schedule_id AND seat_number = NEW.seat_number
+        ) > 1 THEN
+            RAISE EXCEPTION 'seat % is already booked on schedule %', NEW.seat_number, NEW.schedule_id
+                USING ERRCODE = 'unique_violation', CONSTRAINT = 'uq_bookings_schedule_seat';
+        END IF;
+        IF idx IS NOT NULL AND get_bit(inv.booked, idx) = 0 THEN
+            UPDATE seat_inventory SET booked = set_bit(booked, idx, 1), booked_count = booked_count + 1
+            WHERE schedule_id = NEW.schedule_id;
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS uq_bookings_schedule_seat ON bookings;
+DROP FUNCTION IF EXISTS check_unique_seat();
+
+CREATE TRIGGER uq_bookings_schedule_seat
+    AFTER INSERT OR UPDATE OF schedule_id, seat_number OR DELETE ON bookings
+    FOR EACH ROW EXECUTE FUNCTION track_booked_seats();
+
+--  A schedule that changes aircraft gets its bitmap rebuilt on next use.
+CREATE OR REPLACE FUNCTION reset_seat_inventory() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'flights' THEN
+        DELETE FROM seat_inventory
+        WHERE schedule_id IN (SELECT schedule_id FROM flight_schedules WHERE flight_id = NEW.flight_id);
+    ELSE
+        DELETE FROM seat_inventory WHERE schedule_id = NEW.schedule_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER seat_inventory_aircraft
+    AFTER UPDATE OF aircraft_type ON flights
+    FOR EACH ROW WHEN (OLD.aircraft_type IS DISTINCT FROM NEW.aircraft_type)
+    EXECUTE FUNCTION reset_seat_inventory();
+
+CREATE TRIGGER seat_inventory_flight
+    AFTER UPDATE OF flight_id ON flight_schedules
+    FOR EACH ROW WHEN (OLD.flight_id IS DISTINCT FROM NEW.flight_id)
+    EXECUTE FUNCTION reset_seat_inventory();
+
+--  Reloading bookings starts the inventory over.
+CREATE OR REPLACE FUNCTION truncate_seat_inventory() RETURNS trigger AS $$
+BEGIN
+    TRUNCATE seat_inventory, seat_holds;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER seat_inventory_truncate
+    AFTER TRUNCATE ON bookings
+    FOR EACH STATEMENT EXECUTE FUNCTION truncate_seat_inventory();
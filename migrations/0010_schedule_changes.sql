@@ -0,0 +1,49 @@
+--  Change log for the in-memory route network (dashboard/modules/route_search.py).
+--
+--  Every write that can change a connection (a schedule's times or flight,
+--  a flight's route or status) logs the affected schedule ids; a NULL id
+--  means "reload everything" and is logged when schedules are truncated.
+--  Entries carry the id of the transaction that logged them. A reader
+--  remembers the oldest transaction still running when it last looked
+--  (pg_snapshot_xmin) and next time fetches every entry from that one on,
+--  so a change that commits late is never skipped. Readers reload in full
+--  every few hours and prune entries older than a day then.
+CREATE TABLE IF NOT EXISTS schedule_changes (
+    change_id BIGSERIAL PRIMARY KEY,
+    schedule_id INT,
+    txid XID8 NOT NULL DEFAULT pg_current_xact_id(),
+    changed_at TIMESTAMP NOT NULL DEFAULT LOCALTIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_schedule_changes_txid ON schedule_changes (txid);
+
+CREATE OR REPLACE FUNCTION log_schedule_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        INSERT INTO schedule_changes (schedule_id) VALUES (NULL);
+    ELSIF TG_TABLE_NAME = 'flights' THEN
+        INSERT INTO schedule_changes (schedule_id)
+        SELECT schedule_id FROM flight_schedules WHERE flight_id = NEW.flight_id;
+    ELSE
+        INSERT INTO schedule_changes (schedule_id)
+        SELECT DISTINCT id FROM (VALUES (CASE WHEN TG_OP <> 'INSERT' THEN OLD.schedule_id END),
+                                        (CASE WHEN TG_OP <> 'DELETE' THEN NEW.schedule_id END)) AS v (id)
+        WHERE id IS NOT NULL;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER schedule_changes_log
+    AFTER INSERT OR UPDATE OF flight_id, departure_time, arrival_time OR DELETE ON flight_schedules
+    FOR EACH ROW EXECUTE FUNCTION log_schedule_change();
+
+CREATE TRIGGER schedule_changes_truncate
+    AFTER TRUNCATE ON flight_schedules
+    FOR EACH STATEMENT EXECUTE FUNCTION log_schedule_change();
+
+CREATE TRIGGER schedule_changes_flights
+    AFTER UPDATE OF origin_airport_id, destination_airport_id, status_id ON flights
+    FOR EACH ROW WHEN ((OLD.origin_airport_id, OLD.destination_airport_id, OLD.status_id)
+                       IS DISTINCT FROM (NEW.origin_airport_id, NEW.destination_airport_id, NEW.status_id))
+    EXECUTE FUNCTION log_schedule_change();
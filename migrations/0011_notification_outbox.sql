@@ -0,0 +1,81 @@
+--  Outbox of schedule changes that passengers are told about.
+--
+--  Triggers queue one schedule_events row per change: a new gate or
+--  departure time on a schedule, or a flight whose status becomes Delayed
+--  or Cancelled (schedule_id NULL: every schedule of the flight that had
+--  not departed yet). They wake notification_worker.py with
+--  NOTIFY schedule_events; the worker turns a batch of events into
+--  notifications rows with one INSERT ... SELECT over bookings. Each
+--  (event, schedule, passenger) is recorded in notification_deliveries,
+--  which is the idempotency key: an event that is processed again sends
+--  nothing twice.
+CREATE TABLE IF NOT EXISTS schedule_events (
+    event_id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(20) NOT NULL,
+    flight_id INT NOT NULL,
+    schedule_id INT,
+    old_value TEXT,
+    new_value TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT LOCALTIMESTAMP,
+    processed_at TIMESTAMP,
+    recipients INT
+);
+
+CREATE INDEX IF NOT EXISTS idx_schedule_events_pending ON schedule_events (event_id) WHERE processed_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_schedule_events_processed_at ON schedule_events (processed_at);
+
+CREATE TABLE IF NOT EXISTS notification_deliveries (
+    event_id BIGINT NOT NULL,
+    schedule_id INT NOT NULL,
+    passenger_id INT NOT NULL,
+    PRIMARY KEY (event_id, schedule_id, passenger_id)
+);
+
+--  A schedule UPDATE that moves the row to another month's partition runs
+--  as DELETE + INSERT and fires no AFTER UPDATE triggers, so schedule
+--  changes are caught BEFORE UPDATE; the event rolls back with the update.
+CREATE OR REPLACE FUNCTION queue_schedule_events() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'flights' THEN
+        INSERT INTO schedule_events (kind, flight_id, old_value, new_value)
+        SELECT lower(s.status_name), NEW.flight_id, o.status_name, s.status_name
+        FROM flight_statuses s
+        LEFT JOIN flight_statuses o ON o.status_id = OLD.status_id
+        WHERE s.status_id = NEW.status_id AND s.status_name IN ('Delayed', 'Cancelled');
+    ELSE
+        IF NEW.gate_id IS DISTINCT FROM OLD.gate_id THEN
+            INSERT INTO schedule_events (kind, flight_id, schedule_id, old_value, new_value)
+            VALUES ('gate', NEW.flight_id, NEW.schedule_id, OLD.gate_id::text, NEW.gate_id::text);
+        END IF;
+        IF NEW.departure_time IS DISTINCT FROM OLD.departure_time THEN
+            INSERT INTO schedule_events (kind, flight_id, schedule_id, old_value, new_value)
+            VALUES ('time', NEW.flight_id, NEW.schedule_id, OLD.departure_time::text, NEW.departure_time::text);
+        END IF;
+    END IF;
+    -- one wake-up per transaction: identical notifications are folded
+    PERFORM pg_notify('schedule_events', '');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER schedule_events_queue
+    BEFORE UPDATE OF gate_id, departure_time ON flight_schedules
+    FOR EACH ROW WHEN (OLD.gate_id IS DISTINCT FROM NEW.gate_id OR OLD.departure_time IS DISTINCT FROM NEW.departure_time)
+    EXECUTE FUNCTION queue_schedule_events();
+
+CREATE TRIGGER schedule_events_flights
+    AFTER UPDATE OF status_id ON flights
+    FOR EACH ROW WHEN (OLD.status_id IS DISTINCT FROM NEW.status_id)
+    EXECUTE FUNCTION queue_schedule_events();
+
+--  Reloading schedules drops the events about the old ones.
+CREATE OR REPLACE FUNCTION truncate_schedule_events() RETURNS trigger AS $$
+BEGIN
+    TRUNCATE schedule_events, notification_deliveries;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER schedule_events_truncate
+    AFTER TRUNCATE ON flight_schedules
+    FOR EACH STATEMENT EXECUTE FUNCTION truncate_schedule_events();
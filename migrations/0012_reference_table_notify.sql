@@ -0,0 +1,26 @@
+--  Change notifications for the dashboard's result cache
+--  (dashboard/modules/result_cache.py).
+--
+--  Any write to a reference table, from the dashboard or anywhere else,
+--  sends NOTIFY table_changes with the table name when it commits. Every
+--  dashboard process LISTENs and drops its cached results that read that
+--  table. The triggers are per statement, so a bulk write sends a single
+--  notification, and PostgreSQL folds duplicates within a transaction.
+CREATE OR REPLACE FUNCTION notify_table_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('table_changes', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['airports', 'terminals', 'gates', 'flight_statuses', 'booking_statuses',
+                             'payment_methods', 'admin_roles'] LOOP
+        EXECUTE format('CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I
+                        FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change()', t || '_notify_change', t);
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,57 @@
+--  Change feed for the live flight board (dashboard/modules/flight_board.py).
+--
+--  Every statement that writes flight_schedules or flights sends one
+--  NOTIFY flight_board when it commits, naming the rows it touched:
+--  's:<schedule ids>' or 'f:<flight ids>', comma-separated. The board
+--  re-reads just those rows. When the list would not fit in a payload
+--  (bulk writes), or on TRUNCATE, the payload is 's:*': reload everything.
+--  The triggers are per statement, over transition tables, so a bulk
+--  write costs one notification, not one per row. (schedule_changes from
+--  0010 is polled, and leaves out gate and flight number changes.)
+CREATE OR REPLACE FUNCTION notify_flight_board() RETURNS trigger AS $$
+DECLARE
+    prefix TEXT := CASE TG_TABLE_NAME WHEN 'flights' THEN 'f:' ELSE 's:' END;
+    ids TEXT;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        ids := '*';
+    ELSIF TG_TABLE_NAME = 'flights' THEN
+        SELECT string_agg(DISTINCT flight_id::text, ',') INTO ids FROM changed_rows;
+    ELSE
+        SELECT string_agg(DISTINCT schedule_id::text, ',') INTO ids FROM changed_rows;
+    END IF;
+    IF ids IS NULL THEN
+        RETURN NULL;
+    END IF;
+    IF length(ids) > 7900 THEN
+        -- NOTIFY payloads are limited to 8000 bytes
+        prefix := 's:';
+        ids := '*';
+    END IF;
+    PERFORM pg_notify('flight_board', prefix || ids);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+--  A trigger with transition tables fires on one event only, so there is
+--  one per event. An UPDATE needs only the new rows: the key columns of a
+--  schedule or flight do not change.
+CREATE TRIGGER flight_board_insert
+    AFTER INSERT ON flight_schedules REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_flight_board();
+
+CREATE TRIGGER flight_board_update
+    AFTER UPDATE ON flight_schedules REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_flight_board();
+
+CREATE TRIGGER flight_board_delete
+    AFTER DELETE ON flight_schedules REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_flight_board();
+
+CREATE TRIGGER flight_board_truncate
+    AFTER TRUNCATE ON flight_schedules
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_flight_board();
+
+CREATE TRIGGER flight_board_flights
+    AFTER UPDATE ON flights REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_flight_board();
@@ -0,0 +1,19 @@
+--  Server-side revocation of dashboard session tokens (dashboard/modules/auth.py).
+--
+--  Every token carries the admin's session_version when it was issued and
+--  is refused once the version has moved on. Logout bumps it, and so does
+--  any change to the admin's role or password, so old tokens stop working
+--  at once instead of when they expire.
+ALTER TABLE admins ADD COLUMN IF NOT EXISTS session_version INT NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION bump_session_version() RETURNS trigger AS $$
+BEGIN
+    NEW.session_version := OLD.session_version + 1;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER admins_session_version
+    BEFORE UPDATE OF role_id, password ON admins
+    FOR EACH ROW WHEN (OLD.role_id IS DISTINCT FROM NEW.role_id OR OLD.password IS DISTINCT FROM NEW.password)
+    EXECUTE FUNCTION bump_session_version();
@@ -0,0 +1,5 @@
+--  audit_logs.timestamp is UTC. The dashboard stamps its audit rows in UTC
+--  (modules/audit.py) and the audit viewer filters by UTC dates; rows that
+--  rely on the column default now get the same clock instead of the
+--  server's local time.
+ALTER TABLE audit_logs ALTER COLUMN timestamp SET DEFAULT (CURRENT_TIMESTAMP AT TIME ZONE 'UTC');
@@ -0,0 +1,43 @@
+--  create_monthly_partition (0006) builds a month that has to take rows
+--  over from the DEFAULT partition as a LIKE copy of the parent, then
+--  attaches it. Since 0008 gave flight_schedules a generated column
+--  (gate_occupancy), that copy must keep the column generated, or ATTACH
+--  PARTITION refuses it; and the rows moved across cannot carry a value
+--  for it, so they are inserted with the stored columns only.
+CREATE OR REPLACE FUNCTION create_monthly_partition(parent TEXT, key_column TEXT, month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    first_day DATE := date_trunc('month', month)::date;
+    next_day DATE := (date_trunc('month', month) + INTERVAL '1 month')::date;
+    part TEXT := format('%s_y%sm%s', parent, to_char(first_day, 'YYYY'), to_char(first_day, 'MM'));
+    default_part TEXT;
+    stored_columns TEXT;
+BEGIN
+    IF to_regclass(part) IS NOT NULL THEN
+        RETURN part;
+    END IF;
+
+    SELECT c.relname INTO default_part
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = parent::regclass AND pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT';
+
+    IF default_part IS NULL THEN
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                       part, parent, first_day, next_day);
+    ELSE
+        SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) INTO stored_columns
+        FROM pg_attribute
+        WHERE attrelid = parent::regclass AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)',
+                       part, parent);
+        EXECUTE format('WITH moved AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING %s) '
+                       'INSERT INTO %I (%s) SELECT %s FROM moved',
+                       default_part, key_column, first_day, key_column, next_day, stored_columns,
+                       part, stored_columns, stored_columns);
+        EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                       parent, part, first_day, next_day);
+    END IF;
+    RETURN part;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,46 @@
+--  archive_old_partitions (0007) detached every month past the cutoff. The
+--  foreign keys into flight_schedules and bookings are triggers (0007), and
+--  neither DETACH PARTITION nor dropping an archived table fires them, so a
+--  month could leave the live tables while bookings or payments in a later,
+--  retained month still pointed at its rows. Such a month is now kept, with
+--  a NOTICE, and archived by a later pass once nothing live refers to it.
+CREATE OR REPLACE FUNCTION partition_referenced(parent TEXT, part TEXT) RETURNS BOOLEAN AS $$
+DECLARE
+    referenced BOOLEAN := false;
+BEGIN
+    IF parent = 'flight_schedules' THEN
+        EXECUTE format('SELECT EXISTS (SELECT 1 FROM bookings b JOIN %I s ON s.schedule_id = b.schedule_id)', part)
+            INTO referenced;
+    ELSIF parent = 'bookings' THEN
+        EXECUTE format('SELECT EXISTS (SELECT 1 FROM payments p JOIN %I b ON b.booking_id = p.booking_id)', part)
+            INTO referenced;
+    END IF;
+    RETURN referenced;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION archive_old_partitions(parent TEXT, keep_months INT)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    part TEXT;
+    cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => keep_months))::date;
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = parent::regclass
+          AND c.relname ~ ('^' || parent || '_y\d{4}m\d{2}$')
+          AND to_date(right(c.relname, 8), '"y"YYYY"m"MM') + INTERVAL '1 month' <= cutoff
+        ORDER BY c.relname
+    LOOP
+        IF partition_referenced(parent, part) THEN
+            RAISE NOTICE 'kept %: rows of a retained month still refer to it', part;
+            CONTINUE;
+        END IF;
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', parent, part);
+        EXECUTE format('ALTER TABLE %I SET SCHEMA archive', part);
+        RETURN NEXT part;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,12 @@
+--  Logout revokes the one dashboard session token it is called from
+--  (dashboard/modules/auth.py), so the admin stays logged in elsewhere.
+--  Every token carries a random token_id; a revoked one is listed here
+--  until the token would have expired anyway. "Log out everywhere" still
+--  bumps admins.session_version (0014).
+CREATE TABLE IF NOT EXISTS revoked_session_tokens (
+    token_id TEXT PRIMARY KEY,
+    admin_id INT NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_revoked_session_tokens_expires ON revoked_session_tokens (expires_at);
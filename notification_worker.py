@@ -0,0 +1,163 @@
+"""
+Turns schedule changes into passenger notifications (migrations/0011).
+
+Triggers queue a schedule_events row for every gate or departure change
+and every flight that becomes Delayed or Cancelled, and NOTIFY
+schedule_events. This worker LISTENs, claims pending events in batches
+(FOR UPDATE SKIP LOCKED, so several workers can run side by side) and
+writes the notifications for all their booked passengers with one
+INSERT ... SELECT per batch, in the same transaction that marks the
+events processed. Every batch logs its throughput and queue lag.
+
+    python notification_worker.py              # listen until stopped
+    python notification_worker.py --once       # drain the queue and exit
+"""
+import argparse
+import select
+import time
+from db_connection import connect
+
+# claims a batch of events and fans them out; returns (events, notifications, max lag in seconds)
+FAN_OUT_SQL = """
+WITH claimed AS (
+    SELECT event_id, kind, flight_id, schedule_id, old_value, new_value, created_at
+    FROM schedule_events
+    WHERE processed_at IS NULL
+    ORDER BY event_id
+    LIMIT %(batch_size)s
+    FOR UPDATE SKIP LOCKED
+), affected AS (
+    SELECT c.*, s.schedule_id AS target_id, s.departure_time
+    FROM claimed c JOIN flight_schedules s ON s.schedule_id = c.schedule_id
+    UNION ALL
+    SELECT c.*, s.schedule_id, s.departure_time
+    FROM claimed c JOIN flight_schedules s
+      ON c.schedule_id IS NULL AND s.flight_id = c.flight_id AND s.departure_time >= c.created_at
+), targets AS (
+    SELECT DISTINCT a.event_id, a.target_id, b.passenger_id,
+           CASE a.kind
+               WHEN 'gate' THEN format('Gate change: flight %%s departing %%s now leaves from gate %%s',
+                                       f.flight_number, to_char(a.departure_time, 'YYYY-MM-DD HH24:MI'),
+                                       COALESCE(g.gate_code, 'to be announced'))
+               WHEN 'time' THEN format('Schedule change: flight %%s now departs %%s (was %%s)',
+                                       f.flight_number, to_char(a.new_value::timestamp, 'YYYY-MM-DD HH24:MI'),
+                                       to_char(a.old_value::timestamp, 'YYYY-MM-DD HH24:MI'))
+               WHEN 'delayed' THEN format('Flight %%s departing %%s is delayed',
+                                          f.flight_number, to_char(a.departure_time, 'YYYY-MM-DD HH24:MI'))
+               ELSE format('Flight %%s departing %%s has been cancelled',
+                           f.flight_number, to_char(a.departure_time, 'YYYY-MM-DD HH24:MI'))
+           END AS message
+    FROM affected a
+    JOIN bookings b ON b.schedule_id = a.target_id AND b.status_id = %(confirmed)s
+    JOIN flights f ON f.flight_id = a.flight_id
+    LEFT JOIN gates g ON g.gate_id = CASE WHEN a.kind = 'gate' THEN a.new_value::int END
+), fresh AS (
+    INSERT INTO notification_deliveries (event_id, schedule_id, passenger_id)
+    SELECT event_id, target_id, passenger_id FROM targets
+    ON CONFLICT DO NOTHING
+    RETURNING event_id, schedule_id, passenger_id
+), sent AS (
+    INSERT INTO notifications (passenger_id, message, sent_at)
+    SELECT t.passenger_id, t.message, LOCALTIMESTAMP
+    FROM fresh
+    JOIN targets t ON t.event_id = fresh.event_id AND t.target_id = fresh.schedule_id
+                  AND t.passenger_id = fresh.passenger_id
+    RETURNING 1
+), counts AS (
+    SELECT event_id, count(*) AS recipients FROM fresh GROUP BY event_id
+), done AS (
+    UPDATE schedule_events e
+    SET processed_at = LOCALTIMESTAMP, recipients = COALESCE(n.recipients, 0)
+    FROM claimed c LEFT JOIN counts n ON n.event_id = c.event_id
+    WHERE e.event_id = c.event_id
+    RETURNING e.created_at
+)
+SELECT (SELECT count(*) FROM done), (SELECT count(*) FROM sent),
+       COALESCE(EXTRACT(EPOCH FROM LOCALTIMESTAMP - (SELECT min(created_at) FROM done)), 0)
+"""
+
+
+def confirmed_status(cursor):
+    cursor.execute("SELECT status_id FROM booking_statuses WHERE status_name = 'Confirmed'")
+    return cursor.fetchone()[0]
+
+
+def process_batch(conn, batch_size, confirmed):
+    """Fans out one batch of pending events and commits; returns (events, notifications, lag seconds)."""
+    with conn.cursor() as cursor:
+        cursor.execute(FAN_OUT_SQL, {"batch_size": batch_size, "confirmed": confirmed})
+        events, sent, lag = cursor.fetchone()
+    conn.commit()
+    return events, sent, float(lag)
+
+
+def drain(conn, batch_size, confirmed):
+    """Processes batches until the queue is empty; returns the totals (events, notifications)."""
+    total_events = total_sent = 0
+    while True:
+        start = time.perf_counter()
+        events, sent, lag = process_batch(conn, batch_size, confirmed)
+        if not events:
+            return total_events, total_sent
+        seconds = time.perf_counter() - start
+        total_events += events
+        total_sent += sent
+        print(f"{time.strftime('%H:%M:%S')} {events} events -> {sent} notifications in {seconds * 1000:.0f} ms "
+              f"({sent / seconds:,.0f}/s, lag {lag:.1f}s)", flush=True)
+        if events < batch_size:
+            return total_events, total_sent
+
+
+def prune(conn, retain_days):
+    """Deletes processed events older than `retain_days` and their delivery keys."""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            WITH old AS (
+                DELETE FROM schedule_events
+                WHERE processed_at < LOCALTIMESTAMP - make_interval(days => %s)
+                RETURNING event_id
+            )
+            DELETE FROM notification_deliveries WHERE event_id IN (SELECT event_id FROM old)
+        """, (retain_days,))
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send notifications for schedule changes.")
+    parser.add_argument("--batch-size", type=int, default=200, help="events claimed per transaction")
+    parser.add_argument("--interval", type=float, default=30,
+                        help="seconds to wait for a NOTIFY before checking the queue anyway")
+    parser.add_argument("--retain-days", type=int, default=7, help="keep processed events this long")
+    parser.add_argument("--once", action="store_true", help="drain the queue and exit")
+    args = parser.parse_args()
+
+    conn = connect()
+    listener = connect()
+    listener.autocommit = True
+    started, totals = time.perf_counter(), [0, 0]
+    try:
+        with conn.cursor() as cursor:
+            confirmed = confirmed_status(cursor)
+        conn.commit()
+        listener.cursor().execute("LISTEN schedule_events")
+        while True:
+            events, sent = drain(conn, args.batch_size, confirmed)
+            totals[0] += events
+            totals[1] += sent
+            if args.once:
+                break
+            prune(conn, args.retain_days)
+            if select.select([listener], [], [], args.interval)[0]:
+                listener.poll()
+                listener.notifies.clear()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"{totals[0]:,} events, {totals[1]:,} notifications in {time.perf_counter() - started:.1f}s",
+              flush=True)
+        conn.close()
+        listener.close()
+
+
+if __name__ == "__main__":
+    main()
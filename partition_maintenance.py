@@ -0,0 +1,112 @@
+"""
+Keeps the monthly partitions (migrations/0006 and 0007) rolling.
+
+Each pass creates the partitions for the next --months-ahead months, so new
+rows never land in a DEFAULT partition, and with --retain-months detaches
+the months older than that and moves them to the `archive` schema.
+Archived months can be written out as gzipped CSV and dropped.
+
+The foreign keys into flight_schedules and bookings are triggers (0007),
+which DETACH PARTITION and DROP TABLE do not fire. archive_old_partitions
+(0017) therefore keeps a month while rows of the live tables still refer to
+it; a kept month is reported and tried again on the next pass.
+
+    python partition_maintenance.py --once
+    python partition_maintenance.py --retain-months 12 --export-dir archive/ --drop-archived
+"""
+import argparse
+import gzip
+import os
+import time
+from db_connection import connect
+
+# table -> partition key; children before parents, so that payments and
+# bookings archived in a pass no longer hold back the months they refer to
+PARTITIONED = {
+    "payments": "payment_date",
+    "notifications": "sent_at",
+    "bookings": "booked_at",
+    "flight_schedules": "departure_time",
+    "audit_logs": "timestamp",
+}
+
+
+def create_future_partitions(cursor, months_ahead):
+    """Returns [(table, partition)] for the partitions it had to create."""
+    created = []
+    for table, key in PARTITIONED.items():
+        cursor.execute("SELECT ensure_monthly_partitions(%s, %s, CURRENT_DATE, %s)", (table, key, months_ahead))
+        created += [(table, name) for name, in cursor.fetchall()]
+    return created
+
+
+def archive_partitions(cursor, retain_months):
+    """Detach months older than `retain_months` into the archive schema; returns their names."""
+    archived = []
+    for table in PARTITIONED:
+        cursor.execute("SELECT archive_old_partitions(%s, %s)", (table, retain_months))
+        archived += [name for name, in cursor.fetchall()]
+    return archived
+
+
+def export_archived(cursor, export_dir, drop=False):
+    """COPY every table in the archive schema to <export_dir>/<name>.csv.gz, optionally dropping it."""
+    cursor.execute("SELECT tablename FROM pg_tables WHERE schemaname = 'archive' ORDER BY tablename")
+    names = [name for name, in cursor.fetchall()]
+    for name in names:
+        path = os.path.join(export_dir, f"{name}.csv.gz")
+        with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+            cursor.copy_expert(f'COPY archive."{name}" TO STDOUT WITH (FORMAT csv, HEADER)', f)
+        if drop:
+            cursor.execute(f'DROP TABLE archive."{name}"')
+        print(f"{time.strftime('%H:%M:%S')} exported {name} to {path}", flush=True)
+    return names
+
+
+def run_pass(conn, args):
+    with conn.cursor() as cursor:
+        for table, name in create_future_partitions(cursor, args.months_ahead):
+            print(f"{time.strftime('%H:%M:%S')} created {name}", flush=True)
+        if args.retain_months:
+            del conn.notices[:]
+            for name in archive_partitions(cursor, args.retain_months):
+                print(f"{time.strftime('%H:%M:%S')} archived {name}", flush=True)
+            # months kept because live rows still refer to them
+            for notice in conn.notices:
+                print(f"{time.strftime('%H:%M:%S')} {notice.replace('NOTICE:', '').strip()}", flush=True)
+        conn.commit()
+        if args.export_dir:
+            export_archived(cursor, args.export_dir, args.drop_archived)
+            conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create upcoming monthly partitions and archive old ones.")
+    parser.add_argument("--months-ahead", type=int, default=3, help="months of partitions to keep ready")
+    parser.add_argument("--retain-months", type=int, default=0,
+                        help="archive partitions older than this many months (0 keeps everything)")
+    parser.add_argument("--export-dir", help="write archived partitions here as gzipped CSV")
+    parser.add_argument("--drop-archived", action="store_true", help="drop archived partitions once exported")
+    parser.add_argument("--interval", type=float, default=86400, help="seconds between passes")
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit")
+    args = parser.parse_args()
+    if args.drop_archived and not args.export_dir:
+        parser.error("--drop-archived needs --export-dir")
+    if args.export_dir:
+        os.makedirs(args.export_dir, exist_ok=True)
+
+    conn = connect()
+    try:
+        while True:
+            run_pass(conn, args)
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
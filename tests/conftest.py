@@ -0,0 +1,65 @@
+"""
+Fixtures for the schema tests: a throwaway database with the full schema.
+
+The database (TEST_DB, default airport_test_<pid>) is created on the server
+from db_connection.py and built with generating_table.sql and migrate.py, or
+copied from TEST_TEMPLATE_DB when set (e.g. a database whose extensions are
+already installed, migrated up to any version: the rest are applied), and
+dropped at the end unless TEST_KEEP_DB=1.
+
+    python -m pytest tests
+"""
+import os
+import sys
+import psycopg2
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TEST_DB = os.environ.get("TEST_DB", f"airport_test_{os.getpid()}")
+TEST_TEMPLATE_DB = os.environ.get("TEST_TEMPLATE_DB", "")
+TEST_KEEP_DB = os.environ.get("TEST_KEEP_DB", "0") == "1"
+
+# db_connection.py reads DB_NAME when imported
+os.environ["DB_NAME"] = TEST_DB
+import db_connection  # noqa: E402
+
+
+def _server():
+    conn = psycopg2.connect(dbname="postgres", user=db_connection.DB_USER, password=db_connection.DB_PASSWORD,
+                            host=db_connection.DB_HOST, port=db_connection.DB_PORT)
+    conn.autocommit = True
+    return conn
+
+
+@pytest.fixture(scope="session")
+def database():
+    """psycopg2 connection to the throwaway database, migrated to the latest version."""
+    import migrate
+    server = _server()
+    with server.cursor() as cursor:
+        cursor.execute(f'DROP DATABASE IF EXISTS "{TEST_DB}" WITH (FORCE)')
+        template = f' TEMPLATE "{TEST_TEMPLATE_DB}"' if TEST_TEMPLATE_DB else ""
+        cursor.execute(f'CREATE DATABASE "{TEST_DB}"{template}')
+    conn = db_connection.connect()
+    if not TEST_TEMPLATE_DB:
+        with open(os.path.join(ROOT, "generating_table.sql"), encoding="utf-8") as f, conn.cursor() as cursor:
+            cursor.execute(f.read())
+        conn.commit()
+    migrate.migrate(conn)
+    yield conn
+
+    conn.close()
+    if not TEST_KEEP_DB:
+        with server.cursor() as cursor:
+            cursor.execute(f'DROP DATABASE IF EXISTS "{TEST_DB}" WITH (FORCE)')
+    server.close()
+
+
+@pytest.fixture
+def cursor(database):
+    """A cursor whose work is rolled back after the test."""
+    with database.cursor() as cursor:
+        yield cursor
+    database.rollback()
@@ -0,0 +1,52 @@
+"""Monthly partitions (migrations 0006, 0007) on the fully migrated schema."""
+import datetime
+
+
+def _partition_of(cursor, table, schedule_id):
+    cursor.execute(f"SELECT tableoid::regclass::text FROM {table} WHERE schedule_id = %s", (schedule_id,))
+    return cursor.fetchone()[0]
+
+
+def test_new_flight_schedules_month_after_generated_column(cursor):
+    # a month past every existing partition: its rows sit in the DEFAULT partition
+    cursor.execute("""
+        INSERT INTO flight_schedules (departure_time, arrival_time)
+        VALUES ('2031-05-10 08:00', '2031-05-10 10:00'), ('2031-06-01 08:00', '2031-06-01 10:00')
+        RETURNING schedule_id
+    """)
+    may, june = (r[0] for r in cursor.fetchall())
+    assert _partition_of(cursor, "flight_schedules", may) == "flight_schedules_default"
+
+    cursor.execute("SELECT create_monthly_partitions('flight_schedules', 'departure_time', '2031-05-01', '2031-05-01')")
+    assert [r[0] for r in cursor.fetchall()] == ["flight_schedules_y2031m05"]
+
+    assert _partition_of(cursor, "flight_schedules", may) == "flight_schedules_y2031m05"
+    assert _partition_of(cursor, "flight_schedules", june) == "flight_schedules_default"
+    # the moved row's generated column is computed again in the new partition
+    cursor.execute("SELECT gate_occupancy = gate_block(departure_time) FROM flight_schedules WHERE schedule_id = %s",
+                   (may,))
+    assert cursor.fetchone()[0] is True
+
+
+def test_ensure_monthly_partitions_ahead(cursor):
+    cursor.execute("SELECT ensure_monthly_partitions('flight_schedules', 'departure_time', CURRENT_DATE, 6)")
+    cursor.execute("SELECT to_regclass(format('flight_schedules_y%s', to_char(CURRENT_DATE + INTERVAL '6 months', 'YYYY\"m\"MM')))")
+    assert cursor.fetchone()[0] is not None
+
+
+def test_archive_keeps_months_still_referenced(cursor):
+    cursor.execute("SELECT create_monthly_partitions('flight_schedules', 'departure_time', '2001-01-01', '2001-02-01')")
+    cursor.execute("""
+        INSERT INTO flight_schedules (departure_time, arrival_time)
+        VALUES ('2001-01-10 08:00', '2001-01-10 10:00'), ('2001-02-10 08:00', '2001-02-10 10:00')
+        RETURNING schedule_id
+    """)
+    january, _ = (r[0] for r in cursor.fetchall())
+    # booked in the current month, which is kept
+    cursor.execute("INSERT INTO bookings (schedule_id, status_id) VALUES (%s, NULL)", (january,))
+
+    cursor.execute("SELECT archive_old_partitions('flight_schedules', 1)")
+    archived = [r[0] for r in cursor.fetchall()]
+    assert "flight_schedules_y2001m02" in archived
+    assert "flight_schedules_y2001m01" not in archived
+    assert _partition_of(cursor, "flight_schedules", january) == "flight_schedules_y2001m01"